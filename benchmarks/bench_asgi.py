@@ -0,0 +1,173 @@
+"""
+Drives many simultaneous in-process requests through the ASGI application
+(async views) and the WSGI application (sync views) and reports throughput
+and latency percentiles for each.
+
+    python -m benchmarks.bench_asgi [--tasks 200] [--requests 2000] [--concurrency 50]
+"""
+import argparse
+import asyncio
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import _django
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def urlconf(use_async):
+    from django.urls import include, path
+    from tasks.urls import task_urlpatterns
+
+    class URLs:
+        urlpatterns = [path('api/', include(task_urlpatterns(use_async=use_async)))]
+    return URLs
+
+
+async def asgi_get(application, path, token):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode('ascii'),
+        'query_string': b'',
+        'headers': [(b'host', b'testserver'), (b'authorization', f'Bearer {token}'.encode('ascii'))],
+        'server': ('testserver', 80),
+        'client': ('127.0.0.1', 0),
+    }
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    result = {}
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.Future()  # no disconnect while the request is in flight
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            result['status'] = message['status']
+
+    await application(scope, receive, send)
+    return result['status']
+
+
+def run_asgi(paths, token, concurrency):
+    from django.core.asgi import get_asgi_application
+
+    application = get_asgi_application()
+    latencies = []
+
+    async def one(path, semaphore):
+        async with semaphore:
+            started = time.perf_counter()
+            status = await asgi_get(application, path, token)
+            latencies.append(time.perf_counter() - started)
+            assert status == 200, status
+
+    async def all_requests():
+        semaphore = asyncio.Semaphore(concurrency)
+        await asyncio.gather(*(one(path, semaphore) for path in paths))
+
+    started = time.perf_counter()
+    asyncio.run(all_requests())
+    return time.perf_counter() - started, latencies
+
+
+def run_wsgi(paths, token, concurrency):
+    from django.core.wsgi import get_wsgi_application
+
+    application = get_wsgi_application()
+
+    def one(path):
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'SERVER_NAME': 'testserver',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': 'testserver',
+            'HTTP_AUTHORIZATION': f'Bearer {token}',
+            'wsgi.input': io.BytesIO(),
+            'wsgi.errors': sys.stderr,
+            'wsgi.url_scheme': 'http',
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        status = []
+        started = time.perf_counter()
+        body = application(environ, lambda s, headers, exc_info=None: status.append(s))
+        b''.join(body)
+        body.close()
+        elapsed = time.perf_counter() - started
+        assert status[0].startswith('200'), status
+        return elapsed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one, paths))
+    return time.perf_counter() - started, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tasks', type=int, default=200, help="Tasks owned by the benchmark user.")
+    parser.add_argument('--requests', type=int, default=2000, help="Requests per endpoint and stack.")
+    parser.add_argument('--concurrency', type=int, default=50, help="Requests in flight at once.")
+    args = parser.parse_args()
+
+    _django.setup()
+
+    from datetime import timedelta
+    from django.contrib.auth import get_user_model
+    from django.test import override_settings
+    from django.utils import timezone
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from tasks.models import Task
+    from tasks.serializers import calculate_due_at
+
+    user, _ = get_user_model().objects.get_or_create(username='bench-asgi')
+    Task.objects.filter(user=user).delete()
+    now = timezone.now()
+    Task.objects.bulk_create([
+        Task(user=user, title=f'Task {i}', description='Benchmark task',
+             start_at=now + timedelta(hours=i - args.tasks // 2), duration_in_hours=2,
+             due_at=calculate_due_at(now + timedelta(hours=i - args.tasks // 2), 2))
+        for i in range(args.tasks)
+    ])
+    task_ids = list(Task.objects.filter(user=user).values_list('id', flat=True))
+    token = str(RefreshToken.for_user(user).access_token)
+
+    endpoints = {
+        'list': ['/api/tasks/'] * args.requests,
+        'detail': [f'/api/tasks/{task_ids[i % len(task_ids)]}' for i in range(args.requests)],
+    }
+    stacks = {
+        'wsgi': (run_wsgi, False),
+        'asgi': (run_asgi, True),
+    }
+
+    print(f"{args.requests} requests per run, {args.concurrency} concurrent, {args.tasks} tasks")
+    print(f"{'endpoint':>8} {'stack':>6} {'seconds':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    # Measure the database path; the list cache would otherwise answer almost every request
+    with override_settings(TASK_LIST_CACHE_TIMEOUT=0):
+        for endpoint, paths in endpoints.items():
+            for stack, (run, use_async) in stacks.items():
+                with override_settings(ROOT_URLCONF=urlconf(use_async)):
+                    run(paths[:args.concurrency], token, args.concurrency)  # warm up
+                    seconds, latencies = run(paths, token, args.concurrency)
+                print(f"{endpoint:>8} {stack:>6} {seconds:>8.2f} {len(paths) / seconds:>8.0f} "
+                      f"{percentile(latencies, 0.50) * 1000:>8.1f} {percentile(latencies, 0.99) * 1000:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Compares creating tasks one POST at a time with a single bulk POST.
+
+    python -m benchmarks.bench_bulk_create [--count 1000]
+"""
+import argparse
+import time
+
+from benchmarks import _django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=1000)
+    args = parser.parse_args()
+
+    _django.setup()
+
+    from datetime import timedelta
+    from django.contrib.auth import get_user_model
+    from django.test import override_settings
+    from django.utils import timezone
+    from tasks.models import Task
+
+    user, _ = get_user_model().objects.get_or_create(username='bench-bulk')
+    client = _django.api_client(user)
+    start_at = (timezone.now() + timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%S')
+    payload = [
+        {
+            'title': f'Task {i}',
+            'description': 'Benchmark task',
+            'priority': ('high', 'medium', 'low')[i % 3],
+            'duration_in_hours': 1 + i % 5,
+            'start_at': start_at,
+        }
+        for i in range(args.count)
+    ]
+
+    Task.objects.filter(user=user).delete()
+    started = time.perf_counter()
+    for item in payload:
+        response = client.post('/api/tasks/', item, format='json')
+        assert response.status_code == 201, response.content
+    single = time.perf_counter() - started
+
+    Task.objects.filter(user=user).delete()
+    with override_settings(TASK_BULK_MAX_ITEMS=max(args.count, 1)):
+        started = time.perf_counter()
+        response = client.post('/api/tasks/bulk', payload, format='json')
+        bulk = time.perf_counter() - started
+    assert response.status_code == 201, response.content
+    assert Task.objects.filter(user=user).count() == args.count
+
+    print(f"{'path':>10} {'seconds':>9} {'tasks/s':>10}")
+    print(f"{'single':>10} {single:>9.3f} {args.count / single:>10.0f}")
+    print(f"{'bulk':>10} {bulk:>9.3f} {args.count / bulk:>10.0f}")
+    print(f"speedup: {single / bulk:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
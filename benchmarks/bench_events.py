@@ -0,0 +1,143 @@
+"""
+Holds thousands of idle Server-Sent Events streams (/api/tasks/events) open in
+one event loop, as one ASGI worker would, and reports the memory each one
+costs, how long fanning an event out to a user's streams takes, and the cost
+of one change-log broker poll for that many subscribed users.
+
+    python -m benchmarks.bench_events [--connections 5000] [--users 1000] [--events 200]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from benchmarks import _django
+
+
+class Connection:
+    """
+    An idle client: records when each body chunk arrives and never disconnects.
+    """
+
+    def __init__(self, application, token):
+        self.scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': '/api/tasks/events', 'raw_path': b'/api/tasks/events', 'query_string': b'',
+            'headers': [(b'host', b'testserver'), (b'authorization', b'Bearer ' + token)],
+            'server': ('testserver', 80), 'client': ('127.0.0.1', 0),
+        }
+        self.requested = False
+        self.ready = asyncio.Event()
+        self.received = asyncio.Event()
+        self.received_at = None
+        self.task = asyncio.get_running_loop().create_task(application(self.scope, self.receive, self.send))
+
+    async def receive(self):
+        if not self.requested:
+            self.requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await asyncio.Future()
+
+    async def send(self, message):
+        if message['type'] != 'http.response.body':
+            return
+        if not self.ready.is_set():
+            self.ready.set()
+        else:
+            self.received_at = time.perf_counter()
+            self.received.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--connections', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--events', type=int, default=200, help="Events published, one user at a time.")
+    args = parser.parse_args()
+
+    _django.setup()
+
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.test import override_settings
+    from rest_framework_simplejwt.tokens import AccessToken
+    from tasks.events import ChangeLogBroker, TaskEvent, task_events
+    from tasks.streams import TaskEventStream
+
+    User = get_user_model()
+    User.objects.bulk_create([User(username=f'bench-events-{i}') for i in range(args.users)], ignore_conflicts=True)
+    users = list(User.objects.filter(username__startswith='bench-events-').order_by('pk')[:args.users])
+    tokens = [str(AccessToken.for_user(user)).encode('ascii') for user in users]
+
+    async def nothing(scope, receive, send):
+        pass
+
+    async def run():
+        application = TaskEventStream(nothing)
+        # Warm the user snapshot cache: a reconnecting dashboard usually finds its user there
+        warmup = [Connection(application, token) for token in tokens]
+        await asyncio.gather(*(connection.ready.wait() for connection in warmup))
+        for connection in warmup:
+            connection.task.cancel()
+        await asyncio.sleep(0)
+
+        started = time.perf_counter()
+        connections = [Connection(application, tokens[i % len(tokens)]) for i in range(args.connections)]
+        await asyncio.gather(*(connection.ready.wait() for connection in connections))
+        opened = time.perf_counter() - started
+
+        # Memory is traced over a separate batch: tracing slows everything down
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        traced = [Connection(application, token) for token in tokens]
+        await asyncio.gather(*(connection.ready.wait() for connection in traced))
+        per_connection = (tracemalloc.get_traced_memory()[0] - before) / len(traced)
+        tracemalloc.stop()
+        connections += traced
+        print(f"{args.connections} streams for {len(users)} users opened in {opened:.2f} s "
+              f"({args.connections / opened:.0f}/s); {len(connections)} open, {per_connection / 1024:.1f} KiB each "
+              f"(including this driver's scope and queues)")
+
+        by_user = {}
+        for i, connection in enumerate(connections):
+            by_user.setdefault(users[i % len(users)].pk, []).append(connection)
+        fan_out = len(connections) // len(users)
+
+        # Fan-out: an event published from a worker thread (as a sync view's signal would) reaching
+        # every stream of its user
+        loop = asyncio.get_running_loop()
+        latencies = []
+        for i in range(args.events):
+            user_id = users[i % len(users)].pk
+            streams = by_user[user_id]
+            for connection in streams:
+                connection.received.clear()
+            published = time.perf_counter()
+            await loop.run_in_executor(None, task_events.publish, TaskEvent(user_id, 'deleted', i))
+            await asyncio.gather(*(connection.received.wait() for connection in streams))
+            latencies.append(max(connection.received_at for connection in streams) - published)
+        latencies.sort()
+        print(f"fan-out to {fan_out} streams of one user: "
+              f"median {statistics.median(latencies) * 1e3:.2f} ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:.2f} ms")
+
+        for connection in connections:
+            connection.task.cancel()
+        await asyncio.gather(*(connection.task for connection in connections), return_exceptions=True)
+        task_events.stop()
+
+    with override_settings(TASK_EVENTS_BROKER='tasks.events.LocalBroker', TASK_EVENTS_HEARTBEAT=3600):
+        asyncio.run(run())
+
+    # What each process' change-log broker pays every TASK_EVENTS_POLL_INTERVAL for this many users
+    broker, subscribed = ChangeLogBroker(), {user.pk: 0 for user in users}
+    cursors = {}
+    broker.poll(subscribed, cursors, since=None)
+    seconds = _django.timed(lambda: broker.poll(subscribed, cursors, since=None), repeat=20)
+    print(f"change-log poll of {len(users)} idle users: {seconds * 1e3:.2f} ms "
+          f"(every {settings.TASK_EVENTS_POLL_INTERVAL:g} s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Compares full task reads with sparse fieldsets (?fields= / ?exclude=):
+response size and time per request for a list page and a single task.
+
+The tasks carry descriptions of a few hundred bytes to a few kilobytes, like
+notes pasted into a task; the dashboard's `id,title,status` skips them.
+
+    python -m benchmarks.bench_fieldsets [--tasks 500] [--page-size 100] [--requests 200]
+"""
+import argparse
+import random
+
+from benchmarks import _django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tasks', type=int, default=500)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    _django.setup()
+
+    from datetime import timedelta
+    from django.contrib.auth import get_user_model
+    from django.test import override_settings
+    from django.utils import timezone
+    from tasks.models import Task
+
+    rng = random.Random(1)
+    user, _ = get_user_model().objects.get_or_create(username='bench-fieldsets')
+    Task.objects.filter(user=user).delete()
+    now = timezone.now()
+    Task.objects.bulk_create([
+        Task(user=user, title=f'Task {i}', description='Lorem ipsum dolor sit amet. ' * rng.randint(10, 150),
+             priority=('high', 'medium', 'low')[i % 3], start_at=now + timedelta(hours=i),
+             duration_in_hours=1, due_at=now + timedelta(hours=i + 1))
+        for i in range(args.tasks)
+    ])
+    task_id = Task.objects.filter(user=user).values_list('id', flat=True).first()
+    client = _django.api_client(user)
+
+    variants = {
+        'full': '',
+        'exclude=description': 'exclude=description',
+        'fields=id,title,status': 'fields=id,title,status',
+    }
+    endpoints = {
+        'list': f'/api/tasks/?page_size={args.page_size}',
+        'detail': f'/api/tasks/{task_id}?',
+    }
+
+    print(f"{'endpoint':>8} {'variant':>24} {'bytes':>9} {'ms':>8} {'size':>7} {'time':>7}")
+    with override_settings(TASK_LIST_CACHE_TIMEOUT=0):
+        for endpoint, base in endpoints.items():
+            baseline = None
+            for name, query in variants.items():
+                path = f'{base}&{query}' if query else base
+                size = len(client.get(path).content)
+
+                def run():
+                    for _ in range(args.requests):
+                        response = client.get(path)
+                        assert response.status_code == 200, response.content
+
+                seconds = _django.timed(run) / args.requests
+                baseline = baseline or (size, seconds)
+                print(f"{endpoint:>8} {name:>24} {size:>9} {seconds * 1e3:>8.2f} "
+                      f"{size / baseline[0]:>7.1%} {seconds / baseline[1]:>7.1%}")
+
+
+if __name__ == '__main__':
+    main()
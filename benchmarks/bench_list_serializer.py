@@ -0,0 +1,74 @@
+"""
+Compares TaskSerializer with the TaskListSerializer fast path.
+
+    python -m benchmarks.bench_list_serializer [--sizes 1000 10000 100000]
+"""
+import argparse
+
+from benchmarks import _django
+
+
+def seed(user, count):
+    from datetime import timedelta
+    from django.utils import timezone
+    from tasks.models import Task
+
+    Task.objects.filter(user=user).delete()
+    now = timezone.now()
+    Task.objects.bulk_create(
+        (
+            Task(
+                user=user,
+                title=f'Task {i}',
+                description='Benchmark task ' * 4,
+                priority=('high', 'medium', 'low')[i % 3],
+                duration_in_hours=1 + i % 5,
+                start_at=now + timedelta(minutes=i - count // 2),
+                due_at=now + timedelta(minutes=i - count // 2, hours=1 + i % 5),
+                is_completed=i % 7 == 0,
+                completed_at=now if i % 7 == 0 else None,
+            )
+            for i in range(count)
+        ),
+        batch_size=5000,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    _django.setup()
+
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+    from rest_framework.renderers import JSONRenderer
+    from tasks.models import Task
+    from tasks.serializers import TaskListSerializer, TaskSerializer
+
+    user, _ = get_user_model().objects.get_or_create(username='bench-serializer')
+    renderer = JSONRenderer()
+
+    print(f"{'tasks':>8} {'TaskSerializer':>16} {'TaskListSerializer':>20} {'speedup':>8}")
+    for size in args.sizes:
+        seed(user, size)
+        now = timezone.now()
+        queryset = Task.objects.filter(user=user).with_status(now).order_by('start_at', 'id')
+
+        def slow():
+            return renderer.render(TaskSerializer(queryset.all(), many=True).data)
+
+        def fast():
+            rows = TaskListSerializer.rows(queryset.all())
+            return renderer.render(TaskListSerializer(rows, many=True).data)
+
+        assert slow() == fast(), 'serializers disagree'
+        slow_time = _django.timed(slow, args.repeat)
+        fast_time = _django.timed(fast, args.repeat)
+        print(f"{size:>8} {slow_time * 1000:>14.1f}ms {fast_time * 1000:>18.1f}ms {slow_time / fast_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
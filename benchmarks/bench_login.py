@@ -0,0 +1,59 @@
+"""
+Measures POST /api/auth/login/ per password-hash tier, plus the unknown-username path.
+
+Logins run one after another in this process, so "per core" is logins per
+second of CPU time consumed.
+
+    python -m benchmarks.bench_login [--logins 20]
+"""
+import argparse
+import time
+
+from benchmarks import _django
+
+
+def run(client, username, password, count, expected_status):
+    wall, cpu = time.perf_counter(), time.process_time()
+    for _ in range(count):
+        response = client.post('/api/auth/login/', {'username': username, 'password': password}, format='json')
+        assert response.status_code == expected_status, response.content
+    return time.perf_counter() - wall, time.process_time() - cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--logins', type=int, default=20, help="Logins per tier.")
+    args = parser.parse_args()
+
+    _django.setup()
+
+    from django.contrib.auth import get_user_model
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+    from users.backends import hash_timer
+    from users.hashers import PASSWORD_HASH_TIERS
+
+    User = get_user_model()
+    client = APIClient()
+    password = 'Benchmark123!'
+
+    print(f"{'path':>16} {'iterations':>10} {'ms/login':>9} {'cpu ms':>8} {'logins/s/core':>14}")
+    for tier, iterations in PASSWORD_HASH_TIERS.items():
+        with override_settings(PASSWORD_HASH_TIER=tier, PASSWORD_HASH_ITERATIONS=0):
+            username = f'bench-login-{tier}'
+            User.objects.filter(username=username).delete()
+            User.objects.create_user(username=username, password=password)
+            run(client, username, password, 1, 200)  # warm up
+            wall, cpu = run(client, username, password, args.logins, 200)
+        print(f"{tier:>16} {iterations:>10} {wall / args.logins * 1000:>9.1f} "
+              f"{cpu / args.logins * 1000:>8.1f} {args.logins / cpu:>14.0f}")
+
+    with override_settings(PASSWORD_HASH_TIER='high', PASSWORD_HASH_ITERATIONS=0):
+        hash_timer.reset()  # the timer followed the tiers above; a real process runs one tier
+        wall, cpu = run(client, 'bench-login-unknown', password, args.logins, 400)
+    print(f"{'unknown user':>16} {PASSWORD_HASH_TIERS['high']:>10} {wall / args.logins * 1000:>9.1f} "
+          f"{cpu / args.logins * 1000:>8.1f} {args.logins / cpu:>14.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Measures the request overhead of the metrics instrumentation (MetricsMiddleware,
+the DB query timing it installs and the serializers' TimedSerializerMixin).
+
+The fixed costs are timed directly with timeit: the middleware around a stub
+view, the query wrapper per query and the serializer wrapper per call. Each
+endpoint is then served through the WSGI handler to count its queries and
+serializer calls and to time the request itself; the overhead is the
+instrumentation cost of one request over the CPU time of the request.
+
+The end-to-end difference between a handler with and without metrics is
+printed too, but on a shared machine its noise (A/A runs differ by a few
+percent) is larger than the effect being measured.
+
+    python -m benchmarks.bench_metrics [--requests 3000] [--block 50]
+"""
+import argparse
+import time
+import timeit
+
+from benchmarks import _django
+
+
+def best(func, number=20000, repeat=5):
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=3000, help="Requests per endpoint and variant.")
+    parser.add_argument('--block', type=int, default=50, help="Requests per timed block.")
+    args = parser.parse_args()
+
+    _django.setup()
+
+    from datetime import timedelta
+    from django.contrib.auth import get_user_model
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.http import HttpResponse
+    from django.test import RequestFactory, override_settings
+    from django.urls import resolve
+    from django.utils import timezone
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from taskmanager import metrics
+    from taskmanager.middleware import MetricsMiddleware
+    from taskmanager.warmup import wsgi_request
+    from tasks.models import Task
+    from tasks.serializers import calculate_due_at
+
+    user, _ = get_user_model().objects.get_or_create(username='bench-metrics')
+    Task.objects.filter(user=user).delete()
+    now = timezone.now()
+    Task.objects.bulk_create([
+        Task(user=user, title=f'Task {i}', description='Benchmark task', start_at=now + timedelta(hours=i),
+             duration_in_hours=1, due_at=calculate_due_at(now + timedelta(hours=i), 1))
+        for i in range(20)
+    ])
+    task_id = Task.objects.filter(user=user).values_list('id', flat=True).first()
+    headers = {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+    # Fixed costs
+    response = HttpResponse(b'x' * 4096)
+    response['Content-Length'] = '4096'
+    request = RequestFactory().get('/api/tasks/')
+    request.resolver_match = resolve('/api/tasks/')
+    middleware = MetricsMiddleware(lambda request: response)
+    stub = lambda request: response  # noqa: E731
+    per_request = best(lambda: middleware(request)) - best(lambda: stub(request))
+
+    execute = lambda sql, params, many, context: None  # noqa: E731
+    token = metrics.current_request.set(metrics.RequestStats())
+    per_query = best(lambda: metrics.record_query(execute, '', (), False, {})) - best(lambda: execute('', (), False, {}))
+    metrics.current_request.reset(token)
+
+    def call():
+        return None
+    timed_call = metrics.timed_serializer_call(call)
+    token = metrics.current_request.set(metrics.RequestStats())
+    per_serializer_call = best(timed_call) - best(call)
+    metrics.current_request.reset(token)
+    metrics.registry.reset()
+
+    print(f"instrumentation: {per_request * 1e6:.2f} us per request, {per_query * 1e6:.2f} us per query, "
+          f"{per_serializer_call * 1e6:.2f} us per serializer call")
+
+    with override_settings(METRICS_ENABLED=False):
+        handlers = {'off': WSGIHandler()}
+    handlers['on'] = WSGIHandler()
+    hooks = {'off': metrics.uninstall, 'on': metrics.install}
+
+    def serializer_calls(path):
+        # Count every call into the timed serializer methods, nested ones included
+        calls = [0]
+        mixin = metrics.TimedSerializerMixin
+        is_valid, data = mixin.is_valid, mixin.data
+
+        def counted(func):
+            def wrapper(*args, **kwargs):
+                calls[0] += 1
+                return func(*args, **kwargs)
+            return wrapper
+
+        mixin.is_valid = counted(is_valid)
+        mixin.data = property(counted(data.fget))
+        try:
+            for _ in range(10):
+                wsgi_request(handlers['on'], path, headers=headers)
+        finally:
+            mixin.is_valid, mixin.data = is_valid, data
+        return calls[0] / 10
+
+    endpoints = {
+        'list (cached)': ('/api/tasks/', 60),
+        'list': ('/api/tasks/', 0),
+        'detail': (f'/api/tasks/{task_id}', 0),
+    }
+
+    print(f"{'endpoint':>14} {'request us':>11} {'queries':>8} {'ser calls':>10} {'overhead':>9} "
+          f"{'end-to-end':>11}")
+    for endpoint, (path, cache_timeout) in endpoints.items():
+        blocks = {'off': [], 'on': []}
+        with override_settings(TASK_LIST_CACHE_TIMEOUT=cache_timeout):
+            metrics.install()
+            metrics.registry.reset()
+            for _ in range(10):
+                wsgi_request(handlers['on'], path, headers=headers)
+            queries = metrics.registry.snapshot()['histograms']['taskmanager_db_queries']
+            queries_per_request = sum(counts[-1] for counts in queries.values()) / 10
+            calls = serializer_calls(path)
+
+            for round_ in range(max(args.requests // args.block, 1)):
+                for variant in (('off', 'on') if round_ % 2 == 0 else ('on', 'off')):
+                    hooks[variant]()
+                    started = time.process_time()
+                    for _ in range(args.block):
+                        assert wsgi_request(handlers[variant], path, headers=headers) == 200
+                    blocks[variant].append((time.process_time() - started) / args.block)
+        off, on = min(blocks['off']), min(blocks['on'])
+        cost = per_request + queries_per_request * per_query + calls * per_serializer_call
+        print(f"{endpoint:>14} {off * 1e6:>11.1f} {queries_per_request:>8.1f} {calls:>10.1f} {cost / off:>9.2%} "
+              f"{(on - off) / off:>11.2%}")
+    metrics.registry.reset()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Compares serving the OpenAPI document by generating it per request (stock
+drf_yasg view) with the prebuilt document served from memory, plain, gzipped
+and revalidated with If-None-Match.
+
+    python -m benchmarks.bench_schema [--requests 200]
+"""
+import argparse
+import os
+import tempfile
+
+from benchmarks import _django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200, help="Requests per variant.")
+    args = parser.parse_args()
+
+    _django.setup(migrate=False)
+
+    from django.test import override_settings
+    from django.urls import path
+    from rest_framework.test import APIClient
+    from taskmanager import urls
+    from taskmanager.schema import prebuilt_schema, schema_view
+
+    class LiveURLs:
+        urlpatterns = urls.urlpatterns + [path('live/', schema_view.without_ui(cache_timeout=0))]
+
+    client = APIClient()
+    url = '/swagger/?format=openapi'
+
+    def run(target, **headers):
+        def requests():
+            for _ in range(args.requests):
+                response = client.get(target, **headers)
+                assert response.status_code in (200, 304), response.status_code
+        return requests
+
+    with tempfile.TemporaryDirectory() as directory, override_settings(
+        ROOT_URLCONF=LiveURLs, OPENAPI_SCHEMA_PATH=os.path.join(directory, 'openapi-schema.json'),
+    ):
+        prebuilt_schema.clear()
+        cold = _django.timed(prebuilt_schema.build, repeat=1)
+        prebuilt_schema.clear()
+        load = _django.timed(prebuilt_schema.get, repeat=1)
+        entry = prebuilt_schema.get()
+
+        variants = [
+            ('generated', run('/live/?format=openapi'), len(entry['body'])),
+            ('prebuilt', run(url), len(entry['body'])),
+            ('prebuilt gzip', run(url, HTTP_ACCEPT_ENCODING='gzip'), len(entry['gzip'])),
+            ('prebuilt 304', run(url, HTTP_IF_NONE_MATCH=entry['etag']), 0),
+        ]
+
+        print(f"build {cold * 1000:.1f} ms, load from disk {load * 1000:.1f} ms; {args.requests} requests per variant")
+        print(f"{'variant':>14} {'ms/request':>11} {'req/s':>8} {'bytes':>7}")
+        for name, requests, size in variants:
+            seconds = _django.timed(requests)
+            print(f"{name:>14} {seconds / args.requests * 1000:>11.3f} {args.requests / seconds:>8.0f} {size:>7}")
+        prebuilt_schema.clear()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Times `?q=` searches on the full-text index against a LIKE scan of the same
+user's tasks, for a rare, a medium and a common word: the page query on its
+own and the whole `GET /api/tasks/` request.
+
+Titles and descriptions are drawn from a Zipf-distributed vocabulary, so a
+few words appear in most tasks and most words in very few. The tasks are
+inserted with the index triggers dropped and indexed in one FTS5 'rebuild'
+afterwards, which is how a large existing table gets its index too.
+
+    python -m benchmarks.bench_search [--users 200] [--tasks-per-user 5000] [--requests 50]
+"""
+import argparse
+import random
+import time
+from importlib import import_module
+
+from benchmarks import _django
+
+VOCABULARY = 5000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--tasks-per-user', type=int, default=5000)
+    parser.add_argument('--requests', type=int, default=50, help="Requests per search and backend.")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    _django.setup()
+
+    from datetime import timedelta
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test import override_settings
+    from django.utils import timezone
+    from tasks import search
+    index = import_module('tasks.migrations.0007_task_search')  # the index DDL lives in its migration
+    from tasks.models import Task
+
+    if not isinstance(search.task_search(), search.SQLiteTaskSearch):
+        raise SystemExit("The full-text comparison needs SQLite with FTS5 (run without DATABASE_URL).")
+
+    rng = random.Random(args.seed)
+    words = [f'w{i:04d}x' for i in range(VOCABULARY)]  # no word contains another, so LIKE matches the same
+    weights = [1 / (rank + 1) for rank in range(VOCABULARY)]
+    start_at = timezone.now() + timedelta(days=1)
+
+    users = get_user_model().objects.bulk_create(
+        get_user_model()(username=f'bench-search-{i}') for i in range(args.users)
+    )
+    with connection.cursor() as cursor:
+        for statement in index.SQLITE_UNINSTALL:
+            cursor.execute(statement)
+
+    started = time.perf_counter()
+    for user in users:
+        tasks = []
+        for i in range(args.tasks_per_user):
+            text = rng.choices(words, weights, k=12)
+            tasks.append(Task(user=user, title=' '.join(text[:4]), description=' '.join(text[4:]),
+                              start_at=start_at + timedelta(minutes=i), due_at=start_at + timedelta(minutes=i + 60)))
+        Task.objects.bulk_create(tasks, batch_size=1000)
+    inserted = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with connection.cursor() as cursor:
+        for statement in index.SQLITE_INSTALL:
+            cursor.execute(statement)
+    indexed = time.perf_counter() - started
+    total = args.users * args.tasks_per_user
+    print(f"{total} tasks: inserted in {inserted:.1f}s, indexed in {indexed:.1f}s")
+
+    user = users[len(users) // 2]
+    client = _django.api_client(user)
+    mine = Task.objects.filter(user=user)
+    counts = {}
+    for title, description in mine.values_list('title', 'description'):
+        for word in set(f'{title} {description}'.split()):
+            counts[word] = counts.get(word, 0) + 1
+    by_count = sorted(counts, key=counts.get)
+    searches = {'rare': by_count[0], 'medium': by_count[len(by_count) * 9 // 10], 'common': by_count[-1]}
+
+    def per_query(backend, word, ordering, requests):
+        ranked = ordering == 'search_rank'
+        queryset = backend.filter(mine, word, user.id, ranked).order_by(ordering, 'id').values_list('id')
+
+        def run():
+            for _ in range(requests):
+                list(queryset[:51])
+        return _django.timed(run) / requests
+
+    def per_request(path, requests):
+        def run():
+            for _ in range(requests):
+                response = client.get(path)
+                assert response.status_code == 200, response.content
+        return _django.timed(run) / requests
+
+    backends = {'index': search.SQLiteTaskSearch(), 'like': search.FallbackTaskSearch()}
+    print(f"{'search':>8} {'matches':>8} {'ordering':>10} {'query ms':>17} {'request ms':>17}")
+    print(f"{'':>28} {'index':>8} {'like':>8} {'index':>8} {'like':>8}")
+    with override_settings(TASK_LIST_CACHE_TIMEOUT=0):
+        for name, word in searches.items():
+            matches = search.task_search().filter(mine, word, user.id).count()
+            for ordering, key in (('relevance', 'search_rank'), ('start_at', 'start_at')):
+                path = f'/api/tasks/?q={word}&ordering={ordering}'
+                timings = []
+                for backend in backends.values():
+                    timings.append(per_query(backend, word, key, args.requests))
+                for backend in backends.values():
+                    search._backends['default'] = backend
+                    timings.append(per_request(path, args.requests))
+                search._backends.clear()
+                print(f"{name:>8} {matches:>8} {ordering:>10} " + ' '.join(f'{t * 1e3:>8.2f}' for t in timings))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Measures time to first request for a new worker, each run in a fresh process:
+
+    cold          the worker imports and sets up the application itself (no preload)
+    preload       gunicorn preload_app: the master imported the application, the worker is forked
+    preload+warm  gunicorn.conf.py: the master also ran taskmanager.warmup, the worker opens its
+                  database connection before taking traffic
+
+The request is an authenticated GET /api/tasks/. "ttfr" counts from process
+start (cold) or from the fork (preload) until the first response is complete.
+
+    python -m benchmarks.bench_startup [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks import _django
+
+VARIANTS = ('cold', 'preload', 'preload+warm')
+
+
+def child(variant):
+    started = float(os.environ['BENCH_STARTED'])
+    headers = {'Authorization': f"Bearer {os.environ['BENCH_TOKEN']}"}
+
+    from taskmanager.wsgi import application
+    from taskmanager import warmup
+
+    def serve(ready):
+        first = time.time()
+        status = warmup.wsgi_request(application, '/api/tasks/', headers=headers)
+        done = time.time()
+        assert status == 200, status
+        second = time.perf_counter()
+        warmup.wsgi_request(application, '/api/tasks/', headers=headers)
+        return {'ttfr': done - ready, 'first': done - first, 'second': time.perf_counter() - second}
+
+    if variant == 'cold':
+        boot = time.time() - started
+        result = dict(serve(started), boot=boot)
+    else:
+        if variant == 'preload+warm':
+            warmup.warm_up(application, database=False)
+        boot = time.time() - started
+        read, write = os.pipe()
+        forked = time.time()
+        if os.fork() == 0:
+            if variant == 'preload+warm':
+                warmup.warm_database_connections()
+            os.write(write, json.dumps(serve(forked)).encode())
+            os._exit(0)
+        os.close(write)
+        os.wait()
+        with os.fdopen(read) as f:
+            result = dict(json.load(f), boot=boot)
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5, help="Fresh processes per variant (medians are reported).")
+    parser.add_argument('--child', choices=VARIANTS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return child(args.child)
+
+    _django.setup()
+
+    from datetime import timedelta
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from tasks.models import Task
+    from tasks.serializers import calculate_due_at
+
+    user, _ = get_user_model().objects.get_or_create(username='bench-startup')
+    Task.objects.filter(user=user).delete()
+    now = timezone.now()
+    Task.objects.bulk_create([
+        Task(user=user, title=f'Task {i}', description='Benchmark task', start_at=now + timedelta(hours=i),
+             duration_in_hours=1, due_at=calculate_due_at(now + timedelta(hours=i), 1))
+        for i in range(20)
+    ])
+    env = dict(os.environ, BENCH_TOKEN=str(RefreshToken.for_user(user).access_token))
+
+    print(f"median of {args.runs} runs, ms")
+    print(f"{'variant':>13} {'boot':>8} {'ttfr':>8} {'first':>8} {'second':>8}")
+    for variant in VARIANTS:
+        runs = []
+        for _ in range(args.runs):
+            env['BENCH_STARTED'] = repr(time.time())
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_startup', '--child', variant],
+                cwd=_django.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+        median = {key: statistics.median(run[key] for run in runs) * 1000 for key in runs[0]}
+        print(f"{variant:>13} {median['boot']:>8.1f} {median['ttfr']:>8.1f} {median['first']:>8.1f} "
+              f"{median['second']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Times a delta sync (`/api/tasks/changes?since=`) against re-downloading the
+whole task list, for users with more and more tasks and a fixed number of
+changes since their last sync; then the write cost of the change-log triggers.
+
+    python -m benchmarks.bench_sync [--sizes 1000 10000 100000] [--changes 10] [--requests 20]
+"""
+import argparse
+from importlib import import_module
+
+from benchmarks import _django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help="Tasks per user.")
+    parser.add_argument('--changes', type=int, default=10, help="Tasks changed since the last sync.")
+    parser.add_argument('--requests', type=int, default=20)
+    args = parser.parse_args()
+
+    _django.setup()
+
+    from datetime import timedelta
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test import override_settings
+    from django.utils import timezone
+    from tasks import changes
+    from tasks.models import Task
+
+    start_at = timezone.now() + timedelta(days=1)
+
+    def new_tasks(user, count):
+        return [Task(user=user, title=f'Task {i}', description='Benchmark task',
+                     start_at=start_at + timedelta(minutes=i), due_at=start_at + timedelta(minutes=i + 60))
+                for i in range(count)]
+
+    def per_request(func):
+        return _django.timed(lambda: [func() for _ in range(args.requests)]) / args.requests
+
+    print(f"{'tasks':>8} {'changes':>8} {'delta ms':>9} {'full list ms':>13} {'full pages':>11}")
+    with override_settings(TASK_LIST_CACHE_TIMEOUT=0):
+        for size in args.sizes:
+            user = get_user_model().objects.create(username=f'bench-sync-{size}')
+            Task.objects.bulk_create(new_tasks(user, size), batch_size=5000)
+            client = _django.api_client(user)
+
+            cursor = changes.changes_since(user.pk, 0, size)[1]
+            ids = list(Task.objects.filter(user=user).values_list('id', flat=True)[:args.changes * 2])
+            Task.objects.filter(id__in=ids[:args.changes // 2]).update(title='Edited')
+            Task.objects.filter(id__in=ids[args.changes:args.changes + args.changes - args.changes // 2]).delete()
+
+            def delta():
+                data = client.get(f'/api/tasks/changes?since={cursor}').json()
+                assert len(data['changes']) + len(data['deleted']) == args.changes, data
+
+            pages = []
+
+            def full():
+                url, pages[:] = '/api/tasks/?page_size=500', []
+                while url:
+                    data = client.get(url).json()
+                    pages.append(len(data['data']))
+                    url = data['next']
+
+            delta_seconds = per_request(delta)
+            full_seconds = _django.timed(full, repeat=2)
+            print(f"{size:>8} {args.changes:>8} {delta_seconds * 1e3:>9.2f} {full_seconds * 1e3:>13.1f} "
+                  f"{len(pages):>11}")
+
+    # Write overhead: the same bulk insert / update / delete with and without the triggers
+    user = get_user_model().objects.create(username='bench-sync-writes')
+    log = import_module('tasks.migrations.0008_task_change_log')  # the trigger DDL lives in its migration
+    uninstall = {'sqlite': log.SQLITE_UNINSTALL, 'postgresql': log.POSTGRES_UNINSTALL}[connection.vendor]
+    install = {'sqlite': log.SQLITE_INSTALL, 'postgresql': log.POSTGRES_INSTALL}[connection.vendor]
+    backfill = len(log.BACKFILL)
+
+    def writes():
+        Task.objects.bulk_create(new_tasks(user, 1000))
+        Task.objects.filter(user=user).update(priority='high')
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM tasks_task WHERE user_id = %s', [user.pk])
+
+    timings = {'with log': _django.timed(writes)}
+    with connection.cursor() as cursor:
+        for statement in uninstall:
+            cursor.execute(statement)
+        timings['without log'] = _django.timed(writes)
+        for statement in install[:-backfill]:
+            cursor.execute(statement)
+    print("1000-task bulk insert + update + delete: " + ', '.join(
+        f"{name} {seconds * 1e3:.1f} ms" for name, seconds in timings.items()
+    ))
+
+
+if __name__ == '__main__':
+    main()
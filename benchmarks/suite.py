@@ -0,0 +1,563 @@
+"""
+Benchmarks every endpoint of tasks/urls.py and users/urls.py against a seeded
+dataset and gates the results against a stored baseline.
+
+The dataset is `--users` users with `--tasks-per-user` tasks each. Titles,
+priorities, durations, completion and timestamps come from a random generator
+seeded with `--seed` and anchored at a fixed date (EPOCH), so every run sees the
+same rows. Task times are spread from 2020 to 2030, which keeps the
+pending / overdue / completed mix of the data stable for years.
+
+Each endpoint gets `--requests` requests (`--password-requests` for the ones
+that hash a password) per round, sent in-process through the full middleware
+stack and rotated over the seeded users. The event stream (`/api/tasks/events`)
+is served by the ASGI application instead: a request there opens a stream,
+reads its `ready` event and disconnects. Request bodies, fresh tokens and rows
+to delete are prepared before the timed loop. For each endpoint the suite
+reports throughput (requests per second of one client), p50 / p99 latency and
+database queries per request. Latency and throughput are the best of
+`--rounds` rounds (a single pass on a shared machine varies by a third from
+run to run), queries the fewest of any round.
+
+Results are written as JSON to `--output`. When `--baseline` exists and was
+recorded with the same dataset and database, a p50 / p99 latency or
+throughput worse than the baseline by more than `--tolerance`, or any extra
+query per request, is a regression and the run exits with status 1. An
+endpoint that is slower than the tolerance allows is measured for another
+`--rounds` rounds, up to `--confirm` times, before it counts: a slow stretch
+of the machine passes, a regression does not. Record the baseline on the
+machine that runs the gate, with `--save-baseline`.
+
+Runs against a throwaway SQLite database unless DATABASE_URL is set, e.g. to
+a Postgres database (previous suite users and their tasks are deleted first).
+
+    python -m benchmarks.suite [--users 50] [--tasks-per-user 200] [--requests 200]
+                               [--endpoint task-list ...] [--save-baseline]
+"""
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import sys
+import time
+from collections import namedtuple
+from types import SimpleNamespace
+from urllib.parse import urlencode
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from benchmarks import _django
+
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+FUTURE = datetime(2100, 1, 1, tzinfo=dt_timezone.utc)  # start times of created / updated tasks must not be past
+USERNAME_PREFIX = 'bench-suite-'
+PASSWORD = 'Benchmark123!'
+BULK_ITEMS = 10
+SYNC_CHANGES = 10  # changes a delta sync catches up on
+DEFAULT_BASELINE = _django.BASE_DIR / 'benchmarks' / 'baseline.json'
+DEFAULT_OUTPUT = _django.BASE_DIR / 'benchmark-results.json'
+
+# One benchmarked request: an authenticated client (or None), method (a test client method, or 'stream' for
+# the event stream), path, JSON body and expected status
+Request = namedtuple('Request', 'client method path data status')
+
+# `prepare(dataset, count, rng)` returns the `count` requests to time
+Endpoint = namedtuple('Endpoint', 'method route prepare hashes_password')
+
+
+class Dataset:
+    """
+    The seeded users and tasks, with an authenticated client per user.
+    """
+
+    def __init__(self, user_count, tasks_per_user, seed):
+        self.user_count = user_count
+        self.tasks_per_user = tasks_per_user
+        self.seed = seed
+        self.users = []
+        self.clients = []
+        self.tokens = []
+        self.task_ids = []  # per user, ordered by id
+        self.admin_client = None
+        self.sequence = 0
+
+    def seed_rows(self):
+        from django.contrib.auth import get_user_model
+        from django.contrib.auth.hashers import make_password
+        from rest_framework_simplejwt.tokens import AccessToken
+        from tasks.models import Task
+        from tasks.serializers import calculate_due_at
+
+        User = get_user_model()
+        User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+
+        rng = random.Random(self.seed)
+        password = make_password(PASSWORD)  # hashed once, every suite user shares it
+        User.objects.bulk_create([
+            User(username=f'{USERNAME_PREFIX}{i}', email=f'{USERNAME_PREFIX}{i}@example.com', password=password,
+                 first_name='Bench', last_name=f'User{i}', date_joined=EPOCH)
+            for i in range(self.user_count)
+        ])
+        users = list(User.objects.filter(username__startswith=USERNAME_PREFIX).order_by('id'))
+
+        priorities = [choice for choice, _ in Task.PRIORITY_CHOICES]
+        span_hours = 5 * 365 * 24
+        for user in users:
+            tasks = []
+            for i in range(self.tasks_per_user):
+                start_at = EPOCH + timedelta(hours=rng.randint(-span_hours, span_hours))
+                duration = rng.randint(1, 72)
+                completed = rng.random() < 0.3
+                tasks.append(Task(
+                    user=user, title=f'Task {i}', description=f'Seeded task {i} of {user.username}',
+                    priority=rng.choice(priorities), duration_in_hours=duration, start_at=start_at,
+                    due_at=calculate_due_at(start_at, duration), is_completed=completed,
+                    completed_at=start_at + timedelta(hours=duration) if completed else None,
+                    created_at=start_at - timedelta(days=1),
+                ))
+            Task.objects.bulk_create(tasks, batch_size=1000)
+
+        admin = User.objects.create_user(
+            username=f'{USERNAME_PREFIX}admin', email=f'{USERNAME_PREFIX}admin@example.com', password=PASSWORD,
+            is_staff=True,
+        )
+        self.admin_client = _django.api_client(admin)
+        self.users = users
+        self.clients = [_django.api_client(user) for user in users]
+        self.tokens = [str(AccessToken.for_user(user)) for user in users]
+        ids = {}
+        for user_id, task_id in Task.objects.filter(user__in=users).order_by('id').values_list('user_id', 'id'):
+            ids.setdefault(user_id, []).append(task_id)
+        self.task_ids = [ids.get(user.pk, []) for user in users]
+
+    def rotate(self, count):
+        """
+        The user indexes the next `count` requests are sent as.
+        """
+        return [i % len(self.users) for i in range(count)]
+
+    def unique(self, name):
+        self.sequence += 1
+        return f'{USERNAME_PREFIX}{name}-{self.sequence}'
+
+
+def task_body(rng, title):
+    start_at = FUTURE + timedelta(hours=rng.randint(0, 24 * 365))
+    return {
+        'title': title, 'description': 'Created by the benchmark suite', 'priority': 'medium',
+        'duration_in_hours': rng.randint(1, 72), 'start_at': start_at.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def user_body(dataset, name):
+    username = dataset.unique(name)
+    return {'first_name': 'Bench', 'last_name': 'User', 'username': username,
+            'email': f'{username}@example.com', 'password': PASSWORD}
+
+
+def refresh_token(dataset, index):
+    from users.blacklist import BlacklistRefreshToken
+
+    return str(BlacklistRefreshToken.for_user(dataset.users[index]))
+
+
+def prepare_task_list(dataset, count, rng):
+    return [Request(dataset.clients[i], 'get', '/api/tasks/', None, 200) for i in dataset.rotate(count)]
+
+
+def prepare_task_list_filtered(dataset, count, rng):
+    return [Request(dataset.clients[i], 'get', '/api/tasks/?priority=high,medium&is_completed=false&ordering=-priority',
+                    None, 200)
+            for i in dataset.rotate(count)]
+
+
+def prepare_task_search(dataset, count, rng):
+    return [Request(dataset.clients[i], 'get', '/api/tasks/?' + urlencode({
+                        'q': f'task {rng.randrange(dataset.tasks_per_user)}', 'ordering': 'relevance',
+                    }), None, 200)
+            for i in dataset.rotate(count)]
+
+
+def prepare_task_changes(dataset, count, rng):
+    from tasks.models import TaskChangeSequence
+
+    # A client that last synced SYNC_CHANGES changes ago
+    sequences = dict(TaskChangeSequence.objects.filter(user__in=dataset.users).values_list('user_id', 'sequence'))
+    return [Request(dataset.clients[i], 'get',
+                    f'/api/tasks/changes?since={max(sequences.get(dataset.users[i].pk, 0) - SYNC_CHANGES, 0)}',
+                    None, 200)
+            for i in dataset.rotate(count)]
+
+
+def prepare_task_events(dataset, count, rng):
+    # EventSource cannot send headers: browsers pass the token in the query string
+    return [Request(None, 'stream', f'/api/tasks/events?access_token={dataset.tokens[i]}', None, 200)
+            for i in dataset.rotate(count)]
+
+
+def prepare_task_create(dataset, count, rng):
+    return [Request(dataset.clients[i], 'post', '/api/tasks/', task_body(rng, 'Created task'), 201)
+            for i in dataset.rotate(count)]
+
+
+def prepare_task_bulk_create(dataset, count, rng):
+    return [Request(dataset.clients[i], 'post', '/api/tasks/bulk',
+                    [task_body(rng, f'Bulk task {n}') for n in range(BULK_ITEMS)], 201)
+            for i in dataset.rotate(count)]
+
+
+def prepare_task_bulk_update(dataset, count, rng):
+    return [Request(dataset.clients[i], 'patch', '/api/tasks/bulk',
+                    {'ids': rng.sample(dataset.task_ids[i], min(BULK_ITEMS, len(dataset.task_ids[i]))),
+                     'changes': {'priority': rng.choice(['high', 'medium', 'low'])}}, 200)
+            for i in dataset.rotate(count)]
+
+
+def prepare_task_export(dataset, count, rng):
+    return [Request(dataset.clients[i], 'get', '/api/tasks/export', None, 200) for i in dataset.rotate(count)]
+
+
+def prepare_task_detail(dataset, count, rng):
+    return [Request(dataset.clients[i], 'get', f'/api/tasks/{rng.choice(dataset.task_ids[i])}', None, 200)
+            for i in dataset.rotate(count)]
+
+
+def prepare_task_update(dataset, count, rng):
+    return [Request(dataset.clients[i], 'put', f'/api/tasks/{rng.choice(dataset.task_ids[i])}',
+                    task_body(rng, 'Updated task'), 200)
+            for i in dataset.rotate(count)]
+
+
+def prepare_task_partial_update(dataset, count, rng):
+    return [Request(dataset.clients[i], 'patch', f'/api/tasks/{rng.choice(dataset.task_ids[i])}',
+                    {'priority': rng.choice(['high', 'medium', 'low'])}, 200)
+            for i in dataset.rotate(count)]
+
+
+def prepare_task_delete(dataset, count, rng):
+    from tasks.models import Task
+    from tasks.serializers import calculate_due_at
+
+    # Doomed rows of their own, so the seeded data stays the same for the other endpoints
+    indexes = dataset.rotate(count)
+    tasks = Task.objects.bulk_create([
+        Task(user=dataset.users[i], title='Doomed task', description='Deleted by the benchmark suite',
+             start_at=EPOCH, duration_in_hours=1, due_at=calculate_due_at(EPOCH, 1))
+        for i in indexes
+    ])
+    if tasks[0].pk is None:  # backends without RETURNING
+        tasks = Task.objects.filter(user__in=dataset.users, title='Doomed task').order_by('id')
+    return [Request(dataset.clients[i], 'delete', f'/api/tasks/{task.pk}', None, 200)
+            for i, task in zip(indexes, tasks)]
+
+
+def prepare_register(dataset, count, rng):
+    return [Request(None, 'post', '/api/auth/register/', user_body(dataset, 'registered'), 201)
+            for _ in range(count)]
+
+
+def prepare_user_bulk(dataset, count, rng):
+    return [Request(dataset.admin_client, 'post', '/api/auth/users/bulk',
+                    [user_body(dataset, 'provisioned') for _ in range(BULK_ITEMS)], 200)
+            for _ in range(count)]
+
+
+def prepare_login(dataset, count, rng):
+    return [Request(None, 'post', '/api/auth/login/', {'username': dataset.users[i].username, 'password': PASSWORD},
+                    200)
+            for i in dataset.rotate(count)]
+
+
+def prepare_logout(dataset, count, rng):
+    return [Request(dataset.clients[i], 'post', '/api/auth/logout/', {'refresh': refresh_token(dataset, i)}, 205)
+            for i in dataset.rotate(count)]
+
+
+def prepare_token_refresh(dataset, count, rng):
+    return [Request(None, 'post', '/api/auth/token/refresh/', {'refresh': refresh_token(dataset, i)}, 200)
+            for i in dataset.rotate(count)]
+
+
+# Run in this order: reads before the writes that grow the data, deletes last
+ENDPOINTS = {
+    'task-list': Endpoint('GET', '/api/tasks/', prepare_task_list, False),
+    'task-list-filtered': Endpoint('GET', '/api/tasks/?priority=&is_completed=&ordering=',
+                                   prepare_task_list_filtered, False),
+    'task-search': Endpoint('GET', '/api/tasks/?q=&ordering=relevance', prepare_task_search, False),
+    'task-detail': Endpoint('GET', '/api/tasks/<pk>', prepare_task_detail, False),
+    'task-export': Endpoint('GET', '/api/tasks/export', prepare_task_export, False),
+    'task-changes': Endpoint('GET', '/api/tasks/changes?since=', prepare_task_changes, False),
+    'task-events': Endpoint('GET', '/api/tasks/events', prepare_task_events, False),
+    'task-create': Endpoint('POST', '/api/tasks/', prepare_task_create, False),
+    'task-bulk-create': Endpoint('POST', '/api/tasks/bulk', prepare_task_bulk_create, False),
+    'task-bulk-update': Endpoint('PATCH', '/api/tasks/bulk', prepare_task_bulk_update, False),
+    'task-update': Endpoint('PUT', '/api/tasks/<pk>', prepare_task_update, False),
+    'task-partial-update': Endpoint('PATCH', '/api/tasks/<pk>', prepare_task_partial_update, False),
+    'task-delete': Endpoint('DELETE', '/api/tasks/<pk>', prepare_task_delete, False),
+    'register': Endpoint('POST', '/api/auth/register/', prepare_register, True),
+    'user-bulk': Endpoint('POST', '/api/auth/users/bulk', prepare_user_bulk, True),
+    'login': Endpoint('POST', '/api/auth/login/', prepare_login, True),
+    'logout': Endpoint('POST', '/api/auth/logout/', prepare_logout, False),
+    'token-refresh': Endpoint('POST', '/api/auth/token/refresh/', prepare_token_refresh, False),
+}
+
+
+def percentile(ordered, fraction):
+    # Nearest-rank percentile of an ascending list
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+def send(request):
+    """
+    Send one request through the test client, read the whole body and return the response.
+    """
+    from rest_framework.test import APIClient
+
+    if request.method == 'stream':
+        return open_event_stream(request.path)
+    client = request.client or APIClient()
+    response = getattr(client, request.method)(request.path, request.data, format='json')
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response
+
+
+def open_event_stream(url):
+    """
+    Open the event stream at `url` through the ASGI application, read its first
+    chunk (the `ready` event, or the rejection) and disconnect.
+    """
+    from asgiref.sync import async_to_sync
+    from taskmanager.asgi import application
+
+    path, _, query = url.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode('ascii'), 'query_string': query.encode('ascii'),
+        'headers': [(b'host', b'testserver')], 'server': ('testserver', 80), 'client': ('127.0.0.1', 0),
+    }
+    response = SimpleNamespace(status_code=None, content=b'', streaming=False)
+
+    async def stream():
+        requested, disconnected = False, asyncio.Event()
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response.status_code = message['status']
+            elif not disconnected.is_set():
+                response.content = message['body']
+                disconnected.set()
+
+        await application(scope, receive, send)
+
+    # From this (the main) thread, so the stream's database queries run here and are counted
+    async_to_sync(stream)()
+    return response
+
+
+def measure(requests):
+    from django.db import connection
+
+    queries = [0]
+
+    def count(execute, sql, params, many, context):
+        queries[0] += 1
+        return execute(sql, params, many, context)
+
+    latencies = []
+    with connection.execute_wrapper(count):
+        started = time.perf_counter()
+        for request in requests:
+            sent = time.perf_counter()
+            response = send(request)
+            latencies.append(time.perf_counter() - sent)
+            if response.status_code != request.status:
+                raise AssertionError(f"{request.method.upper()} {request.path} returned {response.status_code}, "
+                                     f"expected {request.status}: {response.content[:200]!r}")
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(requests),
+        'throughput': len(requests) / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'queries': queries[0] / len(requests),
+    }
+
+
+def run_rounds(dataset, names, rounds, args, measured):
+    """
+    Measure each endpoint of `names` for `rounds` more rounds, appending to `measured[name]`.
+    """
+    for _ in range(rounds):
+        for name in names:
+            endpoint = ENDPOINTS[name]
+            count = args.password_requests if endpoint.hashes_password else args.requests
+            warmup = 1 if endpoint.hashes_password else args.warmup  # one is enough to load the hasher
+            rng = random.Random(f'{args.seed}-{name}-{len(measured[name])}')
+            for request in endpoint.prepare(dataset, min(warmup, count), rng):
+                send(request)
+            measured[name].append(measure(endpoint.prepare(dataset, count, rng)))
+
+
+def summarize(measured):
+    # The best round is the one least disturbed by the rest of the machine
+    return {
+        name: {
+            'method': ENDPOINTS[name].method,
+            'route': ENDPOINTS[name].route,
+            'rounds': len(rounds),
+            'requests': sum(r['requests'] for r in rounds),
+            'throughput': max(r['throughput'] for r in rounds),
+            'p50_ms': min(r['p50_ms'] for r in rounds),
+            'p99_ms': min(r['p99_ms'] for r in rounds),
+            'queries': min(r['queries'] for r in rounds),  # steady state, once the auth and list caches are warm
+        }
+        for name, rounds in measured.items()
+    }
+
+
+def suite_config(args):
+    """
+    What a baseline must have been recorded with to be comparable.
+    """
+    from django.conf import settings
+    from django.db import connection
+
+    return {
+        'users': args.users,
+        'tasks_per_user': args.tasks_per_user,
+        'requests': args.requests,
+        'password_requests': args.password_requests,
+        'seed': args.seed,
+        'database': connection.vendor,
+        'password_hash_tier': settings.PASSWORD_HASH_TIER,
+    }
+
+
+def regressions(endpoints, baseline, tolerance):
+    """
+    The metrics of `endpoints` that are worse than `baseline` by more than `tolerance`,
+    as (endpoint, metric, message) tuples.
+    """
+    found = []
+    for name, current in endpoints.items():
+        previous = baseline['endpoints'].get(name)
+        if previous is None:
+            continue
+        for metric in ('p50_ms', 'p99_ms'):
+            if current[metric] > previous[metric] * (1 + tolerance):
+                found.append((name, metric, f"{previous[metric]:.2f} -> {current[metric]:.2f} ms"))
+        if current['throughput'] < previous['throughput'] * (1 - tolerance):
+            found.append((name, 'throughput',
+                          f"{previous['throughput']:.1f} -> {current['throughput']:.1f} req/s"))
+        # Query counts do not depend on the machine: any increase is a regression
+        if current['queries'] > previous['queries'] + 1e-9:
+            found.append((name, 'queries', f"{previous['queries']:.2f} -> {current['queries']:.2f} per request"))
+    return found
+
+
+def report(endpoints, baseline):
+    print(f"{'endpoint':>20} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'queries':>8} {'vs p50':>8}")
+    for name, current in endpoints.items():
+        previous = (baseline or {}).get('endpoints', {}).get(name)
+        change = f"{current['p50_ms'] / previous['p50_ms'] - 1:+.1%}" if previous else ''
+        print(f"{name:>20} {current['throughput']:>9.1f} {current['p50_ms']:>8.2f} {current['p99_ms']:>8.2f} "
+              f"{current['queries']:>8.2f} {change:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=50, help="Seeded users.")
+    parser.add_argument('--tasks-per-user', type=int, default=200, help="Seeded tasks per user.")
+    parser.add_argument('--seed', type=int, default=1, help="Seed for the dataset and the request mix.")
+    parser.add_argument('--requests', type=int, default=200, help="Timed requests per endpoint and round.")
+    parser.add_argument('--password-requests', type=int, default=5,
+                        help="Timed requests per round for the endpoints that hash passwords.")
+    parser.add_argument('--rounds', type=int, default=3,
+                        help="Passes over the endpoints; the best p50 / p99 / throughput is kept.")
+    parser.add_argument('--confirm', type=int, default=2,
+                        help="Times a latency / throughput regression is re-measured before it fails the run.")
+    parser.add_argument('--warmup', type=int, default=10, help="Untimed requests per endpoint before timing.")
+    parser.add_argument('--endpoint', action='append', choices=list(ENDPOINTS),
+                        help="Only run this endpoint (repeatable).")
+    parser.add_argument('--output', default=str(DEFAULT_OUTPUT), help="Where to write the results JSON.")
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help="Baseline results JSON to compare with.")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Allowed relative slowdown of p50 / p99 / throughput before failing.")
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline.")
+    args = parser.parse_args()
+
+    _django.setup()
+
+    from django.db import connection
+
+    config = suite_config(args)
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        baseline = None
+    if baseline is not None and baseline['config'] != config:
+        print(f"{args.baseline} was recorded with {baseline['config']}, not compared", file=sys.stderr)
+        baseline = None
+    if args.save_baseline:
+        baseline = None
+
+    dataset = Dataset(args.users, args.tasks_per_user, args.seed)
+    started = time.perf_counter()
+    dataset.seed_rows()
+    print(f"seeded {args.users} users x {args.tasks_per_user} tasks on {connection.vendor} "
+          f"in {time.perf_counter() - started:.1f} s", file=sys.stderr)
+
+    measured = {name: [] for name in args.endpoint or ENDPOINTS}
+    run_rounds(dataset, list(measured), args.rounds, args, measured)
+    endpoints = summarize(measured)
+
+    found = regressions(endpoints, baseline, args.tolerance) if baseline else []
+    for _ in range(args.confirm):
+        # A slow stretch of the machine passes, a real regression stays: measure the suspects again
+        suspects = sorted({name for name, metric, _ in found if metric != 'queries'})
+        if not suspects:
+            break
+        print(f"re-measuring {', '.join(suspects)}", file=sys.stderr)
+        run_rounds(dataset, suspects, args.rounds, args, measured)
+        endpoints = summarize(measured)
+        found = regressions(endpoints, baseline, args.tolerance)
+
+    results = {
+        'config': config,
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'recorded_at': datetime.now(dt_timezone.utc).isoformat(timespec='seconds'),
+        },
+        'endpoints': endpoints,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    report(endpoints, baseline)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    for name, metric, message in found:
+        print(f"REGRESSION {name} {metric}: {message}", file=sys.stderr)
+    return 1 if found else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
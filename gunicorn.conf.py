@@ -0,0 +1,66 @@
+# gunicorn.conf.py
+#
+# Picked up automatically when gunicorn is started from the repository root:
+#
+#     gunicorn
+#
+# The application is imported and warmed once in the master (preload_app), so
+# forked workers start with settings, apps, URL resolvers, views, serializers
+# and translations already loaded and accept traffic without a cold first
+# request. Each worker only opens its own database connections.
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+import decouple  # not `from decouple import config`: gunicorn reads module globals as settings
+
+wsgi_app = 'taskmanager.wsgi:application'
+bind = decouple.config('GUNICORN_BIND', default=f"0.0.0.0:{decouple.config('PORT', default='8000')}")
+workers = decouple.config('WEB_CONCURRENCY', default=multiprocessing.cpu_count() * 2 + 1, cast=int)
+timeout = decouple.config('GUNICORN_TIMEOUT', default=30, cast=int)
+preload_app = True
+accesslog = '-'
+
+# Workers share their /metrics snapshots through this directory (see taskmanager/metrics.py)
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), f'taskmanager-metrics-{os.getpid()}'))
+
+
+def on_starting(server):
+    # Start from empty counters, as a restarted Prometheus target is expected to
+    shutil.rmtree(os.environ['METRICS_DIR'], ignore_errors=True)
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded application was imported, before any worker is forked
+    from taskmanager.metrics import registry
+    from taskmanager.warmup import warm_up
+
+    timings = warm_up(server.app.wsgi(), database=False)
+    registry.reset()  # the warm-up requests are not traffic
+    server.log.info("Warmed up: %s", ", ".join(
+        f"{name} {count} in {seconds * 1000:.1f} ms" for name, (count, seconds) in timings.items()
+    ))
+
+
+def post_fork(server, worker):
+    # The master never connects (database=False above), so each worker opens its own connections.
+    # With threaded workers only the main thread's connection is opened here, and only when
+    # DB_CONN_MAX_AGE keeps it past the first request (with the default 0 this does nothing).
+    from taskmanager.warmup import warm_database_connections
+
+    warm_database_connections()
+
+
+def worker_exit(server, worker):
+    # Runs in the exiting worker: write what it observed since its last periodic flush
+    from taskmanager.metrics import registry
+
+    registry.flush()
+
+
+def child_exit(server, worker):
+    from taskmanager.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid, os.environ['METRICS_DIR'])
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "taskmanager.settings")
 
 application = get_asgi_application()
+
+# Imported once the app registry is ready; serves /api/tasks/events and hands every other request to Django
+from tasks.streams import TaskEventStream  # noqa: E402
+
+application = TaskEventStream(application)
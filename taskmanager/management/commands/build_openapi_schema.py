@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from taskmanager.schema import prebuilt_schema
+
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI document and store it at OPENAPI_SCHEMA_PATH, where the schema views serve it from."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help="Only verify the stored document matches the current code; exit 1 if it is stale.")
+        parser.add_argument('--force', action='store_true',
+                            help="Regenerate even when the stored document is up to date.")
+
+    def handle(self, *args, **options):
+        if options['check']:
+            if prebuilt_schema.load() is None:
+                raise CommandError(f"{prebuilt_schema.path} is missing or stale; run build_openapi_schema.")
+            self.stdout.write(f"{prebuilt_schema.path} is up to date.")
+            return
+
+        if not options['force'] and prebuilt_schema.load() is not None:
+            self.stdout.write(f"{prebuilt_schema.path} is up to date.")
+            return
+
+        started = time.perf_counter()
+        entry = prebuilt_schema.build()
+        if prebuilt_schema.load() is None:
+            raise CommandError(f"Could not write {prebuilt_schema.path}; see the log for the error.")
+        self.stdout.write(
+            f"Wrote {prebuilt_schema.path} ({len(entry['body'])} bytes, {len(entry['gzip'])} gzipped) "
+            f"in {time.perf_counter() - started:.3f}s"
+        )
@@ -0,0 +1,99 @@
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter under `-X importtime`: phase timings go to stdout as
+# JSON, the import log to stderr.
+CHILD = """
+import json, os, sys, time
+started = time.perf_counter()
+phases = []
+
+def phase(name, func):
+    begin = time.perf_counter()
+    func()
+    phases.append((name, time.perf_counter() - begin))
+
+import django
+from django.conf import settings
+phase('settings', lambda: settings.INSTALLED_APPS)
+phase('apps', django.setup)
+from django.core.wsgi import get_wsgi_application
+application = None
+def load_application():
+    global application
+    application = get_wsgi_application()
+phase('middleware', load_application)
+from taskmanager import warmup
+phase('urls', warmup.warm_url_resolvers)
+if os.environ['PROFILE_STARTUP_WARM'] == '1':
+    phase('warm-up', lambda: warmup.warm_up(application, database=False))
+status = []
+phase('first request', lambda: status.append(warmup.wsgi_request(application, os.environ['PROFILE_STARTUP_PATH'])))
+phase('second request', lambda: warmup.wsgi_request(application, os.environ['PROFILE_STARTUP_PATH']))
+print(json.dumps({'phases': phases, 'status': status[0], 'total': time.perf_counter() - started}))
+"""
+
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+class Command(BaseCommand):
+    help = "Start the application in a fresh interpreter and report where the time goes, imports included."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/tasks/',
+                            help="Path of the (anonymous) request timed after startup (default: /api/tasks/).")
+        parser.add_argument('--warm', action='store_true',
+                            help="Run taskmanager.warmup before the first request, as gunicorn.conf.py does.")
+        parser.add_argument('--top', type=int, default=15,
+                            help="Packages and modules listed in the import breakdown (default: 15).")
+
+    def handle(self, *args, **options):
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'taskmanager.settings'),
+            PROFILE_STARTUP_PATH=options['path'],
+            PROFILE_STARTUP_WARM='1' if options['warm'] else '0',
+        )
+        started = time.perf_counter()
+        child = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', CHILD],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        wall = time.perf_counter() - started
+        if child.returncode != 0:
+            raise CommandError(f"Startup failed:\n{child.stderr[-4000:]}")
+        result = json.loads(child.stdout.strip().splitlines()[-1])
+        imports = [
+            (int(match.group(1)), int(match.group(2)), len(match.group(3)), match.group(4))
+            for match in map(IMPORT_LINE.match, child.stderr.splitlines()) if match
+        ]
+
+        self.stdout.write(f"{'phase':<16} {'ms':>9}")
+        for name, seconds in result['phases']:
+            self.stdout.write(f"{name:<16} {seconds * 1000:>9.1f}")
+        self.stdout.write(
+            f"{'process total':<16} {wall * 1000:>9.1f}  (first request: {options['path']} -> {result['status']})"
+        )
+
+        packages = defaultdict(lambda: [0, 0])
+        for self_us, _cumulative_us, _depth, module in imports:
+            package = packages[module.split('.')[0]]
+            package[0] += self_us
+            package[1] += 1
+        total = sum(self_us for self_us, *_ in imports)
+        self.stdout.write(f"\n{len(imports)} modules imported in {total / 1000:.1f} ms (self time)")
+        self.stdout.write(f"{'package':<28} {'self ms':>9} {'share':>6} {'modules':>8}")
+        for name, (self_us, count) in sorted(packages.items(), key=lambda item: -item[1][0])[:options['top']]:
+            self.stdout.write(f"{name:<28} {self_us / 1000:>9.1f} {self_us / total:>6.1%} {count:>8}")
+
+        self.stdout.write(f"\n{'slowest imports (cumulative)':<48} {'ms':>9}")
+        for _self_us, cumulative_us, depth, module in sorted(imports, key=lambda row: -row[1])[:options['top']]:
+            self.stdout.write(f"{'  ' * min(depth // 2, 4) + module:<48} {cumulative_us / 1000:>9.1f}")
@@ -0,0 +1,374 @@
+# taskmanager/metrics.py
+
+import contextvars
+import functools
+import importlib.util
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.utils.module_loading import import_string
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SERIALIZER_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152)
+
+# name -> (help, label names, buckets); every metric is a histogram
+HISTOGRAMS = {
+    'taskmanager_http_request_duration_seconds': (
+        "Time from the first middleware to the response, by route.", ('route', 'method', 'status'), LATENCY_BUCKETS),
+    'taskmanager_http_response_size_bytes': (
+        "Response body size, by route (streamed responses without Content-Length are not counted).",
+        ('route',), SIZE_BUCKETS),
+    'taskmanager_db_queries': (
+        "Database queries per request, by route.", ('route',), QUERY_BUCKETS),
+    'taskmanager_db_query_duration_seconds': (
+        "Time spent executing database queries per request, by route.", ('route',), LATENCY_BUCKETS),
+    'taskmanager_serializer_duration_seconds': (
+        "Time spent in serializer validation and representation per request, by route.",
+        ('route',), SERIALIZER_BUCKETS),
+}
+
+# Per-process statistics of the in-process caches, exported as `taskmanager_<name>{stat="..."}`
+STATS_SOURCES = {
+    'task_list_cache': 'tasks.cache.task_list_cache',
+    'token_blacklist': 'users.blacklist.token_blacklist',
+}
+
+ARCHIVE = 'archive.json'
+
+
+class RequestStats:
+    __slots__ = ('queries', 'query_seconds', 'serializer_seconds', 'in_serializer')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.in_serializer = False
+
+
+# The stats of the request being handled; copied into sync_to_async threads under ASGI
+current_request = contextvars.ContextVar('current_request', default=None)
+
+
+class MetricsRegistry:
+    """
+    Histograms of this process's requests, aggregated in memory.
+
+    Observations take one lock per request. With METRICS_DIR set, each process
+    also writes its snapshot to `<METRICS_DIR>/<pid>.json` at most every
+    METRICS_FLUSH_INTERVAL seconds, and `collect()` sums the snapshots of all
+    processes, so any gunicorn worker can answer a scrape for the whole
+    server. Snapshots of exited workers are folded into `archive.json` (see
+    `mark_process_dead`) so their counts are not lost. The snapshot files are
+    locked with fcntl, so where it is missing (Windows) METRICS_DIR is ignored
+    and each process reports only itself.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._flushed_at = 0.0
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    @property
+    def directory(self):
+        directory = getattr(settings, 'METRICS_DIR', None)
+        return Path(directory) if directory and _file_locks_available() else None
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+
+    def observe_request(self, route, method, status, seconds, size, stats):
+        # One row of histograms per (route, method, status), in HISTOGRAMS order; the
+        # per-route metrics are summed over methods and statuses by snapshot()
+        key = (route, method, status)
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                row = self._rows[key] = [[0] * (len(buckets) + 2) for _, _, buckets in HISTOGRAMS.values()]
+            _observe(row[0], LATENCY_BUCKETS, seconds)
+            if size is not None:
+                _observe(row[1], SIZE_BUCKETS, size)
+            _observe(row[2], QUERY_BUCKETS, stats.queries)
+            if stats.queries:
+                _observe(row[3], LATENCY_BUCKETS, stats.query_seconds)
+            if stats.serializer_seconds:
+                _observe(row[4], SERIALIZER_BUCKETS, stats.serializer_seconds)
+
+        if self.directory is not None and time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def snapshot(self):
+        with self._lock:
+            rows = [(key, [list(counts) for counts in row]) for key, row in self._rows.items()]
+        histograms = {name: {} for name in HISTOGRAMS}
+        for key, row in rows:
+            for (name, (_, label_names, _)), counts in zip(HISTOGRAMS.items(), row):
+                if not any(counts[:-1]):
+                    continue  # never observed for this key
+                labels = '\t'.join(key[:len(label_names)])
+                merged = histograms[name].get(labels)
+                histograms[name][labels] = counts if merged is None else [a + b for a, b in zip(merged, counts)]
+        stats = {name: import_string(path).stats() for name, path in STATS_SOURCES.items()}
+        return {'histograms': histograms, 'stats': stats}
+
+    def flush(self):
+        """
+        Write this process's snapshot to METRICS_DIR.
+        """
+        self._flushed_at = time.monotonic()
+        directory = self.directory
+        directory.mkdir(parents=True, exist_ok=True)
+        _write_json(directory / f'{os.getpid()}.json', self.snapshot())
+
+    def collect(self):
+        """
+        The snapshot of every process (or only this one without METRICS_DIR), summed.
+        """
+        if self.directory is None:
+            return self.snapshot()
+        self.flush()
+        with _directory_lock(self.directory):
+            snapshots = [_read_json(path) for path in self.directory.glob('*.json')]
+        return merge_snapshots(snapshot for snapshot in snapshots if snapshot)
+
+    def reset(self):
+        """
+        Forget this process's observations (and its snapshot file).
+        """
+        with self._lock:
+            self._rows = {}
+        if self.directory is not None:
+            (self.directory / f'{os.getpid()}.json').unlink(missing_ok=True)
+
+    def _after_fork(self):
+        # A forked worker must not report what its parent observed
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._flushed_at = 0.0
+
+
+def _observe(counts, buckets, value):
+    # counts: [observations per bucket..., observations above the last bucket, sum]
+    counts[bisect_left(buckets, value)] += 1
+    counts[-1] += value
+
+
+registry = MetricsRegistry()
+
+
+def merge_snapshots(snapshots):
+    histograms = {name: {} for name in HISTOGRAMS}
+    stats = {}
+    for snapshot in snapshots:
+        for name, series in snapshot.get('histograms', {}).items():
+            merged = histograms.setdefault(name, {})
+            for labels, counts in series.items():
+                if labels in merged:
+                    merged[labels] = [a + b for a, b in zip(merged[labels], counts)]
+                else:
+                    merged[labels] = list(counts)
+        for name, values in snapshot.get('stats', {}).items():
+            merged = stats.setdefault(name, {})
+            for stat, value in values.items():
+                merged[stat] = merged.get(stat, 0) + value
+    return {'histograms': histograms, 'stats': stats}
+
+
+def mark_process_dead(pid, directory=None):
+    """
+    Fold an exited process's snapshot into the archive (gunicorn's child_exit hook).
+    """
+    directory = Path(directory) if directory else registry.directory
+    if directory is None or not _file_locks_available():
+        return
+    path = directory / f'{pid}.json'
+    with _directory_lock(directory):
+        snapshot = _read_json(path)
+        if snapshot:
+            archive = merge_snapshots([_read_json(directory / ARCHIVE) or {}, snapshot])
+            archive['stats'] = {}  # the caches died with the process
+            _write_json(directory / ARCHIVE, archive)
+        path.unlink(missing_ok=True)
+
+
+def render(snapshot):
+    """
+    Prometheus text exposition format (version 0.0.4).
+    """
+    lines = []
+    for name, (help_text, label_names, buckets) in HISTOGRAMS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for labels, counts in sorted(snapshot['histograms'].get(name, {}).items()):
+            pairs = [f'{key}="{_escape(value)}"' for key, value in zip(label_names, labels.split('\t'))]
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{",".join(pairs + [f"le={_quote(bound)}"])}}} {cumulative}')
+            lines.append(f'{name}_sum{{{",".join(pairs)}}} {_number(counts[-1])}')
+            lines.append(f'{name}_count{{{",".join(pairs)}}} {cumulative}')
+
+    for source, values in sorted(snapshot['stats'].items()):
+        name = f'taskmanager_{source}'
+        lines.append(f'# HELP {name} Statistics of the in-process {source.replace("_", " ")}, summed over processes.')
+        lines.append(f'# TYPE {name} gauge')
+        for stat, value in sorted(values.items()):
+            lines.append(f'{name}{{stat="{stat}"}} {_number(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """
+    GET /metrics: the aggregated metrics of every process, for Prometheus.
+
+    A scraper authenticates with "Authorization: Bearer <METRICS_TOKEN>"; with
+    no METRICS_TOKEN configured, only staff signed in to the admin may read it.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token:
+        allowed = constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+    else:
+        user = getattr(request, 'user', None)
+        allowed = user is not None and user.is_staff
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(render(registry.collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def record_query(execute, sql, params, many, context):
+    stats = current_request.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.query_seconds += time.perf_counter() - started
+
+
+def _add_query_wrapper(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def timed_serializer_call(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        stats = current_request.get()
+        if stats is None or stats.in_serializer:
+            return func(*args, **kwargs)  # nested serializers are part of the outer call
+        stats.in_serializer = True
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats.serializer_seconds += time.perf_counter() - started
+            stats.in_serializer = False
+    return wrapper
+
+
+class TimedSerializerMixin:
+    """
+    Counts a serializer's validation (`is_valid()`) and representation (`.data`)
+    into the current request's serializer time. Mixed into the project's own
+    serializers, ahead of the DRF base class; costs one context variable
+    lookup outside a measured request.
+    """
+
+    @timed_serializer_call
+    def is_valid(self, *args, **kwargs):
+        return super().is_valid(*args, **kwargs)
+
+    @property
+    @timed_serializer_call
+    def data(self):
+        return super().data
+
+
+def install():
+    """
+    Time DB queries on every connection. Idempotent; called by MetricsMiddleware.
+    """
+    from django.db import connections
+
+    connection_created.connect(_add_query_wrapper, dispatch_uid='taskmanager.metrics')
+    for connection in connections.all(initialized_only=True):
+        _add_query_wrapper(connection)
+
+
+def uninstall():
+    """
+    Undo `install()` (for this thread's connections).
+    """
+    from django.db import connections
+
+    connection_created.disconnect(dispatch_uid='taskmanager.metrics')
+    for connection in connections.all(initialized_only=True):
+        if record_query in connection.execute_wrappers:
+            connection.execute_wrappers.remove(record_query)
+
+
+@functools.cache
+def _file_locks_available():
+    return importlib.util.find_spec('fcntl') is not None
+
+
+def _directory_lock(directory):
+    directory.mkdir(parents=True, exist_ok=True)
+    return _FileLock(directory / '.lock')
+
+
+class _FileLock:
+    def __init__(self, path):
+        self.path = path
+
+    def __enter__(self):
+        import fcntl  # POSIX only; see _file_locks_available()
+        self.handle = open(self.path, 'a')
+        fcntl.flock(self.handle, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc_info):
+        import fcntl
+        fcntl.flock(self.handle, fcntl.LOCK_UN)
+        self.handle.close()
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, document):
+    handle, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.metrics-', suffix='.tmp')
+    with os.fdopen(handle, 'w', encoding='utf-8') as f:
+        json.dump(document, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _quote(bound):
+    return f'"{bound}"' if isinstance(bound, str) else f'"{_number(bound)}"'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
@@ -0,0 +1,201 @@
+# taskmanager/schema.py
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import django
+import drf_yasg
+import rest_framework
+from django.apps import apps
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson
+from drf_yasg.renderers import OpenAPIRenderer, SwaggerJSONRenderer
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+
+api_info = openapi.Info(
+    title="Task Management API",
+    default_version='v1.0',
+    description="API documentation for managing tasks",
+)
+
+schema_view = get_schema_view(
+    api_info,
+    public=True,
+    permission_classes=[permissions.AllowAny],
+    url="",
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _accepts_gzip(accept_encoding):
+    """
+    Whether an Accept-Encoding header allows gzip: listed, or covered by `*`,
+    with a non-zero q-value (`gzip;q=0` refuses it).
+    """
+    weights = {}
+    for item in accept_encoding.split(','):
+        coding, *params = (part.strip() for part in item.split(';'))
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.lower()] = weight
+    return weights.get('gzip', weights.get('x-gzip', weights.get('*', 0.0))) > 0
+
+
+class PrebuiltSchema:
+    """
+    The OpenAPI document, generated once and served from memory.
+
+    The document is stored at OPENAPI_SCHEMA_PATH together with a fingerprint of
+    the project's source files and of the Django / DRF / drf_yasg versions. A
+    process loads it from disk on first use and only regenerates it (and
+    rewrites the file) when the fingerprint no longer matches, i.e. when the
+    code changed. `build_openapi_schema` does the same ahead of deployment.
+    """
+
+    def __init__(self, view_class, info):
+        self.view_class = view_class
+        self.info = info
+        self._lock = threading.Lock()
+        self._entry = None
+        self._fingerprint = None
+
+    @property
+    def path(self):
+        return Path(getattr(settings, 'OPENAPI_SCHEMA_PATH', Path(settings.BASE_DIR) / 'openapi-schema.json'))
+
+    def fingerprint(self):
+        if self._fingerprint is None:
+            digest = hashlib.sha1()
+            for package in (django, rest_framework, drf_yasg):
+                digest.update(f'{package.__name__}={package.__version__};'.encode())
+            digest.update(str(settings.ROOT_URLCONF).encode())
+            for path in self.source_files():
+                digest.update(str(path.relative_to(settings.BASE_DIR)).encode())
+                digest.update(path.read_bytes())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    @staticmethod
+    def source_files():
+        """
+        Python files of the project's own apps, whose views and serializers make up the schema.
+        """
+        base_dir = Path(settings.BASE_DIR).resolve()
+        files = []
+        for app_config in apps.get_app_configs():
+            app_dir = Path(app_config.path).resolve()
+            if base_dir not in app_dir.parents:
+                continue
+            for path in app_dir.rglob('*.py'):
+                if 'migrations' in path.parts or 'tests' in path.stem:
+                    continue
+                files.append(path)
+        return sorted(files)
+
+    def get(self):
+        """
+        `{'body', 'gzip', 'etag'}` for the current code, loading or regenerating it on first use.
+        """
+        if self._entry is None:
+            with self._lock:
+                if self._entry is None:
+                    self._entry = self.load() or self.build()
+        return self._entry
+
+    def build(self):
+        """
+        Generate the document, write it to disk and make it the served entry.
+        A read-only or full disk only costs the next process a rebuild.
+        """
+        generator = self.view_class.generator_class(self.info, url=None)
+        schema = json.loads(OpenAPICodecJson(validators=[]).encode(generator.get_schema(request=None, public=True)))
+        self._write({'fingerprint': self.fingerprint(), 'schema': schema})
+        self._entry = self._make_entry(schema)
+        return self._entry
+
+    def clear(self):
+        with self._lock:
+            self._entry = None
+            self._fingerprint = None
+
+    def response(self, request):
+        entry = self.get()
+        response = get_conditional_response(request, etag=entry['etag'])
+        if response is None:
+            if _accepts_gzip(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+                response = HttpResponse(entry['gzip'], content_type='application/json')
+                response['Content-Encoding'] = 'gzip'
+            else:
+                response = HttpResponse(entry['body'], content_type='application/json')
+        response['ETag'] = entry['etag']
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    def load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if stored.get('fingerprint') != self.fingerprint():
+            return None
+        return self._make_entry(stored['schema'])
+
+    def _write(self, document):
+        tmp_path = None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            handle, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix='.openapi-')
+            with os.fdopen(handle, 'w', encoding='utf-8') as f:
+                json.dump(document, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except OSError:
+            logger.exception("Could not store the OpenAPI document at %s; serving it from memory", self.path)
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return False
+        return True
+
+    @staticmethod
+    def _make_entry(schema):
+        body = json.dumps(schema, separators=(',', ':')).encode('utf-8')
+        return {
+            'body': body,
+            'gzip': gzip.compress(body, compresslevel=9, mtime=0),
+            'etag': '"%s"' % hashlib.sha1(body).hexdigest(),
+        }
+
+
+prebuilt_schema = PrebuiltSchema(schema_view, api_info)
+
+
+class PrebuiltSchemaView(schema_view):
+    """
+    drf_yasg's schema view, answering JSON spec requests (the UIs fetch
+    `?format=openapi`) from `prebuilt_schema` instead of introspecting every
+    view per request. YAML and the HTML UI pages keep the stock code path.
+    """
+
+    def get(self, request, version='', format=None):
+        if isinstance(request.accepted_renderer, (OpenAPIRenderer, SwaggerJSONRenderer)) and not version:
+            return prebuilt_schema.response(request)
+        return super().get(request, version, format)
@@ -10,13 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 import os
-import dj_database_url
 from pathlib import Path
 from decouple import config
 from datetime import timedelta
-import os
-from django.utils.timezone import localtime
-import pytz
 
 TIME_ZONE = 'Africa/Lagos'
 USE_TZ = True
@@ -65,7 +61,7 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ],
 
     'DATETIME_FORMAT': "%Y-%m-%d %H:%M:%S",# %Z includes timezone name
@@ -76,11 +72,77 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Task list pagination (see tasks/pagination.py)
+TASK_LIST_PAGE_SIZE = config('TASK_LIST_PAGE_SIZE', default=50, cast=int)
+TASK_LIST_MAX_PAGE_SIZE = config('TASK_LIST_MAX_PAGE_SIZE', default=500, cast=int)
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# e.g. CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache CACHE_LOCATION=/var/tmp/taskmanager
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='taskmanager'),
+    }
+}
+
+# LocMemCache (the default) lives inside each worker process, so a write in one worker cannot evict
+# what another one cached; the caches below that depend on that eviction are off unless it is shared.
+CACHE_IS_SHARED = CACHES['default']['BACKEND'] not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Rendered task list responses, cached per user and query variant (see tasks/cache.py). Each hit is
+# checked against the rows' fingerprint first, so writes from other processes are never served stale.
+# A timeout of 0 disables the cache.
+TASK_LIST_CACHE_ALIAS = config('TASK_LIST_CACHE_ALIAS', default='default')
+TASK_LIST_CACHE_TIMEOUT = config('TASK_LIST_CACHE_TIMEOUT', default=60, cast=int)
+TASK_LIST_CACHE_MAX_ENTRIES = config('TASK_LIST_CACHE_MAX_ENTRIES', default=10000, cast=int)
+
+# Largest batch accepted by the bulk task endpoint (see tasks/views.py TaskBulkView)
+TASK_BULK_MAX_ITEMS = config('TASK_BULK_MAX_ITEMS', default=1000, cast=int)
+
+# Delta sync at /api/tasks/changes (see tasks/changes.py). Tombstones of deleted tasks older than
+# TASK_CHANGES_TOMBSTONE_DAYS are removed by `manage.py compact_task_changes`; clients that last synced
+# before then have to sync again from scratch.
+TASK_CHANGES_PAGE_SIZE = config('TASK_CHANGES_PAGE_SIZE', default=500, cast=int)
+TASK_CHANGES_MAX_PAGE_SIZE = config('TASK_CHANGES_MAX_PAGE_SIZE', default=2000, cast=int)
+TASK_CHANGES_TOMBSTONE_DAYS = config('TASK_CHANGES_TOMBSTONE_DAYS', default=30, cast=int)
+
+# Server-Sent Events at /api/tasks/events, served by taskmanager/asgi.py (see tasks/streams.py).
+# The default broker polls the change log every TASK_EVENTS_POLL_INTERVAL seconds, so all worker
+# processes see every write; tasks.events.LocalBroker only sees this process' model signals.
+TASK_EVENTS_BROKER = config('TASK_EVENTS_BROKER', default='tasks.events.ChangeLogBroker')
+TASK_EVENTS_POLL_INTERVAL = config('TASK_EVENTS_POLL_INTERVAL', default=1.0, cast=float)
+# Events held for a subscriber before it is told to resync instead
+TASK_EVENTS_QUEUE_SIZE = config('TASK_EVENTS_QUEUE_SIZE', default=100, cast=int)
+TASK_EVENTS_HEARTBEAT = config('TASK_EVENTS_HEARTBEAT', default=15.0, cast=float)
+
+# Serve the task list/detail endpoints with the async views (see tasks/async_views.py);
+# only worth enabling when running under ASGI (taskmanager/asgi.py)
+TASK_ASYNC_VIEWS = config('TASK_ASYNC_VIEWS', default=False, cast=bool)
+
 APPEND_SLASH = False
 
+# Request metrics exported at /metrics (taskmanager/metrics.py). METRICS_DIR is a directory shared by
+# all worker processes (gunicorn.conf.py sets one); without it, or on Windows (no fcntl), each process only
+# reports itself.
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_DIR = config('METRICS_DIR', default=None)
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5.0, cast=float)
+# When set, /metrics requires "Authorization: Bearer <METRICS_TOKEN>"; unset, only staff signed in to the
+# admin can read it
+METRICS_TOKEN = config('METRICS_TOKEN', default=None)
+
+# Where the prebuilt OpenAPI document (taskmanager/schema.py) is stored between runs
+OPENAPI_SCHEMA_PATH = config('OPENAPI_SCHEMA_PATH', default=str(BASE_DIR / 'openapi-schema.json'))
+
 MIDDLEWARE = [
+    "taskmanager.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "taskmanager.middleware.AsyncWhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -122,9 +184,15 @@ WSGI_APPLICATION = "taskmanager.wsgi.application"
 
 DATABASE_URL = config('DATABASE_URL', default=None)
 
+# Seconds a worker keeps its database connection between requests (0 closes it after each request, and
+# gunicorn workers then skip opening one at startup; raise it to have them start with a connection)
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=0, cast=int)
+
 if DATABASE_URL:
+    import dj_database_url  # only needed (and only imported at startup) when DATABASE_URL is set
+
     DATABASES = {
-        'default': dj_database_url.parse(DATABASE_URL)
+        'default': dj_database_url.parse(DATABASE_URL, conn_max_age=DB_CONN_MAX_AGE, conn_health_checks=True)
     }
 else:
     DATABASES = {
@@ -135,6 +203,8 @@ else:
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST', default='127.0.0.1'),
         'PORT': config('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
     
@@ -144,6 +214,27 @@ DEBUG = config('DEBUG', cast=bool)
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
+# Password hashing cost: PASSWORD_HASH_TIER picks a preset (high / medium / low, see users/hashers.py)
+# and PASSWORD_HASH_ITERATIONS overrides it. New passwords are hashed at this cost; stored hashes are
+# upgraded or downgraded on the next successful login.
+PASSWORD_HASH_TIER = config('PASSWORD_HASH_TIER', default='high')
+PASSWORD_HASH_ITERATIONS = config('PASSWORD_HASH_ITERATIONS', default=0, cast=int)
+
+PASSWORD_HASHERS = [
+    "users.hashers.TieredPBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
+AUTHENTICATION_BACKENDS = ["users.backends.FastModelBackend"]
+
+# Bulk user provisioning (see users/provisioning.py): largest request accepted by the API, and
+# processes the provision_users command hashes passwords with (0 = one per CPU; the API hashes in-process)
+USER_BULK_MAX_ITEMS = config('USER_BULK_MAX_ITEMS', default=1000, cast=int)
+USER_PROVISION_WORKERS = config('USER_PROVISION_WORKERS', default=0, cast=int)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -204,8 +295,25 @@ SIMPLE_JWT = {
     "SIGNING_KEY": SECRET_KEY,
     "AUTH_HEADER_TYPES": ("Bearer",),
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
+
+    # Answers most blacklist checks from an in-process Bloom filter (see users/blacklist.py)
+    "TOKEN_REFRESH_SERIALIZER": "users.serializers.BlacklistTokenRefreshSerializer",
 }
 
+# Seconds between incremental syncs of the refresh-token blacklist filter with the database, how far
+# back each sync re-reads for rows that committed after newer ones (longer than any blacklisting
+# transaction plus clock skew between servers), and the filter's target false-positive rate (false
+# positives fall back to a database check)
+TOKEN_BLACKLIST_SYNC_INTERVAL = config('TOKEN_BLACKLIST_SYNC_INTERVAL', default=5, cast=int)
+TOKEN_BLACKLIST_SYNC_OVERLAP = config('TOKEN_BLACKLIST_SYNC_OVERLAP', default=60, cast=int)
+TOKEN_BLACKLIST_FALSE_POSITIVE_RATE = config('TOKEN_BLACKLIST_FALSE_POSITIVE_RATE', default=0.001, cast=float)
+
+# Seconds an authenticated user's row is reused by CachedJWTAuthentication before it is re-read, from
+# the AUTH_USER_CACHE_ALIAS cache. Saves and deletes evict it there, which reaches every process only
+# with a shared cache: with the per-process default, other workers see a change within the short TTL.
+AUTH_USER_CACHE_ALIAS = config('AUTH_USER_CACHE_ALIAS', default='default')
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=300 if CACHE_IS_SHARED else 30, cast=int)
+
 # Absolute path to the directory where collectstatic will collect static files
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 
@@ -18,26 +18,34 @@ Including another URLconf
 from django.contrib import admin
 from django.shortcuts import redirect
 from django.urls import path,include
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Task Management API",
-        default_version='v1.0',
-        description="API documentation for managing tasks",
-    ),
-    public=True,
-    permission_classes=[permissions.AllowAny],
-    url="",
-)
+from django.views.decorators.csrf import csrf_exempt
+from .metrics import metrics_view
+
+
+def docs_view(renderer):
+    """
+    The drf_yasg UI view for `renderer`, built on its first request.
+
+    drf_yasg's generator, inspectors and codecs are only needed by the docs,
+    so they are not imported when a worker starts.
+    """
+    views = {}
+
+    @csrf_exempt
+    def view(request, *args, **kwargs):
+        if 'view' not in views:
+            from .schema import PrebuiltSchemaView
+            views['view'] = PrebuiltSchemaView.with_ui(renderer, cache_timeout=0)
+        return views['view'](request, *args, **kwargs)
+    return view
+
 
 urlpatterns = [
     path('', lambda request: redirect('schema-swagger-ui')),  #redirect to swagger page
     path("admin/", admin.site.urls),
     path('api/', include('tasks.urls')),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    path('swagger/', docs_view('swagger'), name='schema-swagger-ui'),
+    path('redoc/', docs_view('redoc'), name='schema-redoc'),
     path('api/auth/', include('users.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
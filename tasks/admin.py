@@ -1,4 +1,6 @@
 from django.contrib import admin
-from .models import Task
+from .models import Task, TaskImportCheckpoint, TaskNotification
 
 admin.site.register(Task)
+admin.site.register(TaskNotification)
+admin.site.register(TaskImportCheckpoint)
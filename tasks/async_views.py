@@ -0,0 +1,191 @@
+# tasks/async_views.py
+
+import asyncio
+
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.http import Http404
+from rest_framework import exceptions, generics, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .cache import task_list_cache
+from .conditional import not_modified
+from .models import Task
+from .search import atask_search
+from .serializers import TaskListSerializer
+from .views import UserTaskDetailView, UserTaskListCreateView
+
+
+def same_schema(sync_method):
+    """
+    Give an async handler the swagger_auto_schema documentation of the sync handler it replaces.
+    """
+    def decorator(method):
+        schema = getattr(sync_method, '_swagger_auto_schema', None)
+        if schema is not None:
+            method._swagger_auto_schema = schema
+        return method
+    return decorator
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView whose handlers are coroutines, for ASGI deployments.
+
+    DRF dispatches synchronously, so this re-implements `dispatch()` around
+    awaited handlers and authenticates with an authenticator's `aauthenticate()`
+    when it has one. Everything else (content negotiation, permissions,
+    exception handling, rendering) is the regular, database-free DRF code.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # csrf_exempt() wraps the view in a plain function; mark it so Django awaits it
+        if cls.view_is_async:
+            markcoroutinefunction(view)
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.perform_async_authentication(request)
+            self.initial(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def perform_async_authentication(self, request):
+        """
+        Resolve `request.user` before `initial()` reads it, without blocking the event loop.
+        """
+        for authenticator in request.authenticators:
+            authenticate = getattr(authenticator, 'aauthenticate', None)
+            try:
+                if authenticate is not None:
+                    user_auth_tuple = await authenticate(request)
+                else:
+                    user_auth_tuple = await sync_to_async(authenticator.authenticate)(request)
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+
+        request._not_authenticated()
+
+    async def options(self, request, *args, **kwargs):
+        # The metadata class may call get_object() synchronously
+        return await sync_to_async(super().options)(request, *args, **kwargs)
+
+
+class AsyncUserTaskListCreateView(AsyncAPIView, UserTaskListCreateView):
+    """
+    `UserTaskListCreateView` on the async ORM; responses are identical.
+    """
+
+    @same_schema(UserTaskListCreateView.get)
+    async def get(self, request, *args, **kwargs):
+        fields = self.get_fieldset()
+        variant = self.get_cache_variant(request)
+        fingerprint = await Task.objects.filter(user=request.user).afingerprint(self.request_now)
+        etag, last_modified = self.get_validators(request, fingerprint)
+        if variant is not None:
+            entry = await task_list_cache.aget(request.user.pk, variant)
+            if self.is_current(entry, etag):
+                return self.cached_response(request, entry)
+
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        queryset = self.get_queryset()
+        await atask_search(queryset.db)  # resolved here so the synchronous search filter finds it cached
+        queryset = TaskListSerializer.rows(self.filter_queryset(queryset), fields, self.get_ordering())
+        tasks = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        return self.list_response(tasks, variant, fingerprint, etag, last_modified)
+
+    @same_schema(UserTaskListCreateView.post)
+    async def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        await serializer.asave(user=request.user)
+        return Response({"data": serializer.data}, status=status.HTTP_201_CREATED)
+
+    async def dispatch(self, request, *args, **kwargs):
+        response = await super().dispatch(request, *args, **kwargs)
+        entry = self.pop_cache_entry(response)
+        if entry is not None:
+            await task_list_cache.aset(self.request.user.pk, *entry)
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        # The cache entry is written by dispatch() with the async cache API
+        return generics.ListCreateAPIView.finalize_response(self, request, response, *args, **kwargs)
+
+
+class AsyncUserTaskDetailView(AsyncAPIView, UserTaskDetailView):
+    """
+    `UserTaskDetailView` on the async ORM; responses are identical.
+    """
+
+    async def aget_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        try:
+            instance = await queryset.aget(**{self.lookup_field: lookup})
+        except Task.DoesNotExist:
+            if await Task.objects.filter(pk=lookup).aexists():
+                raise exceptions.PermissionDenied("You do not have permission to access this task.")
+            raise Http404(f"No {Task._meta.object_name} matches the given query.")
+
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+    @same_schema(UserTaskDetailView.get)
+    async def get(self, request, *args, **kwargs):
+        return self.detail_response(request, await self.aget_object())
+
+    @same_schema(UserTaskDetailView.put)
+    async def put(self, request, *args, **kwargs):
+        return await self.aupdate(request, partial=False)
+
+    @same_schema(UserTaskDetailView.patch)
+    async def patch(self, request, *args, **kwargs):
+        return await self.aupdate(request, partial=True)
+
+    @same_schema(UserTaskDetailView.delete)
+    async def delete(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        await instance.adelete()
+        return Response(
+            {"message": "Task deleted successfully."},
+            status=status.HTTP_200_OK
+        )
+
+    async def aupdate(self, request, partial):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        await serializer.asave()
+        return Response(serializer.data)
@@ -0,0 +1,164 @@
+# tasks/cache.py
+
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+class TaskListCache:
+    """
+    Per-user cache of rendered task list responses, stored in Django's cache framework.
+
+    Every entry key embeds the user's current *generation*. Invalidating a user
+    swaps the generation, so all of their cached variants stop matching at once
+    without enumerating keys. Entries expire after TASK_LIST_CACHE_TIMEOUT seconds
+    (or earlier, see `ttl`), and this process evicts its least recently used keys
+    once it has written more than TASK_LIST_CACHE_MAX_ENTRIES of them.
+
+    Invalidation only reaches the cache backend this process writes to, and
+    only for writes it makes itself, so the views serve an entry only while its
+    ETag still matches the user's current `fingerprint()` (see `is_current`).
+    """
+
+    key_prefix = 'tasklist'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._recent = OrderedDict()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    @property
+    def enabled(self):
+        return self.timeout > 0
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'TASK_LIST_CACHE_TIMEOUT', 60)
+
+    @property
+    def max_entries(self):
+        return getattr(settings, 'TASK_LIST_CACHE_MAX_ENTRIES', 10000)
+
+    @property
+    def backend(self):
+        return caches[getattr(settings, 'TASK_LIST_CACHE_ALIAS', 'default')]
+
+    def ttl(self, now, next_transition):
+        """
+        Seconds an entry may live: the configured timeout, cut short so no
+        cached `status` outlives the user's next pending -> in_progress -> overdue transition.
+        """
+        if next_transition is None:
+            return self.timeout
+        return min(self.timeout, (next_transition - now).total_seconds())
+
+    def get(self, user_id, variant):
+        key = self._entry_key(user_id, self._generation(user_id), variant)
+        return self._record_get(key, self.backend.get(key))
+
+    async def aget(self, user_id, variant):
+        key = self._entry_key(user_id, await self._ageneration(user_id), variant)
+        return self._record_get(key, await self.backend.aget(key))
+
+    def set(self, user_id, variant, entry, timeout):
+        if timeout <= 0:
+            return
+        key = self._entry_key(user_id, self._generation(user_id), variant)
+        self.backend.set(key, entry, timeout)
+        evicted = self._record_set(key)
+        if evicted:
+            self.backend.delete_many(evicted)
+
+    async def aset(self, user_id, variant, entry, timeout):
+        if timeout <= 0:
+            return
+        key = self._entry_key(user_id, await self._ageneration(user_id), variant)
+        await self.backend.aset(key, entry, timeout)
+        evicted = self._record_set(key)
+        if evicted:
+            await self.backend.adelete_many(evicted)
+
+    def _record_get(self, key, entry):
+        with self._lock:
+            if entry is None:
+                self._stats['misses'] += 1
+                self._recent.pop(key, None)
+            else:
+                self._stats['hits'] += 1
+                if key in self._recent:
+                    self._recent.move_to_end(key)
+        return entry
+
+    def _record_set(self, key):
+        """
+        Track a written key and return the least recently used keys to evict.
+        """
+        evicted = []
+        with self._lock:
+            self._recent[key] = None
+            self._recent.move_to_end(key)
+            while len(self._recent) > self.max_entries:
+                evicted.append(self._recent.popitem(last=False)[0])
+            self._stats['evictions'] += len(evicted)
+        return evicted
+
+    def invalidate(self, user_id):
+        """
+        Drop every cached list variant for `user_id`, now and again once the
+        surrounding transaction commits (so a read racing the commit cannot
+        repopulate the new generation with old rows).
+        """
+        self._bump(user_id)
+        transaction.on_commit(lambda: self._bump(user_id))
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._recent))
+
+    def clear(self):
+        """
+        Forget every entry this process wrote and reset the counters.
+        """
+        with self._lock:
+            keys = list(self._recent)
+            self._recent.clear()
+            self._stats = dict.fromkeys(self._stats, 0)
+        self.backend.delete_many(keys)
+
+    def _bump(self, user_id):
+        self.backend.set(self._generation_key(user_id), uuid.uuid4().hex, None)
+        with self._lock:
+            self._stats['invalidations'] += 1
+
+    def _generation(self, user_id):
+        key = self._generation_key(user_id)
+        generation = self.backend.get(key)
+        if generation is None:
+            generation = uuid.uuid4().hex
+            if not self.backend.add(key, generation, None):
+                generation = self.backend.get(key) or generation
+        return generation
+
+    async def _ageneration(self, user_id):
+        key = self._generation_key(user_id)
+        generation = await self.backend.aget(key)
+        if generation is None:
+            generation = uuid.uuid4().hex
+            if not await self.backend.aadd(key, generation, None):
+                generation = await self.backend.aget(key) or generation
+        return generation
+
+    def _generation_key(self, user_id):
+        return f'{self.key_prefix}:gen:{user_id}'
+
+    def _entry_key(self, user_id, generation, variant):
+        digest = hashlib.sha1(variant.encode('utf-8')).hexdigest()
+        return f'{self.key_prefix}:{user_id}:{generation}:{digest}'
+
+
+task_list_cache = TaskListCache()
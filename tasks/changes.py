@@ -0,0 +1,114 @@
+# tasks/changes.py
+
+import time
+
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import Max
+
+from .models import TaskChange, TaskChangeSequence
+
+def is_supported(using='default'):
+    return connections[using].vendor in ('sqlite', 'postgresql')
+
+
+class CompactedCursor(Exception):
+    """
+    The cursor is older than the newest compacted tombstone: deletions since then are lost.
+    """
+
+
+class UnknownCursor(Exception):
+    """
+    The cursor is ahead of every sequence number handed out to the user.
+    """
+
+
+def changes_since(user_id, since, limit):
+    """
+    The user's changes after sequence number `since`, oldest first, at most `limit` of them.
+
+    Returns `(changes, cursor, has_more)`: the `TaskChange` rows (one per task,
+    for its latest change), the sequence number to resume from and whether
+    more changes are waiting. The cost depends on the number of changes read,
+    not on how many tasks the user has.
+    """
+    counter = TaskChangeSequence.objects.filter(user_id=user_id).values_list('sequence', 'compacted_through').first()
+    last, compacted_through = counter or (0, 0)
+    if since > last:
+        raise UnknownCursor(since)
+    if 0 < since < compacted_through:
+        raise CompactedCursor(since)
+
+    changes = list(
+        TaskChange.objects.filter(user_id=user_id, sequence__gt=since)
+        .order_by('sequence')
+        .values_list('task_id', 'sequence', 'deleted', named=True)[:limit + 1]
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    return changes, (changes[-1].sequence if changes else since), has_more
+
+
+class TaskChangeCompactor:
+    """
+    Removes tombstones (change rows of deleted tasks) older than a cut-off.
+
+    Each batch deletes up to `batch_size` tombstones and raises the owners'
+    `compacted_through` in the same transaction, so a sync cursor that could
+    have missed one of them is answered with 410 Gone instead of a silent gap.
+    Live tasks keep their change rows: their count is bounded by the table.
+    """
+
+    max_retries = 5
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+
+    def run(self, cutoff, max_batches=None):
+        """
+        Compact until no tombstone older than `cutoff` is left (or `max_batches` is reached).
+        Returns `{"removed": n, "batches": n, "seconds": s}`.
+        """
+        started = time.perf_counter()
+        removed = batches = 0
+        while max_batches is None or batches < max_batches:
+            count = self.compact_batch(cutoff)
+            if not count:
+                break
+            removed += count
+            batches += 1
+            if count < self.batch_size:
+                break
+        return {'removed': removed, 'batches': batches, 'seconds': time.perf_counter() - started}
+
+    def compact_batch(self, cutoff):
+        for attempt in range(self.max_retries):
+            try:
+                return self._compact_batch(cutoff)
+            except OperationalError as exc:
+                if connection.vendor != 'sqlite' or 'locked' not in str(exc) or attempt == self.max_retries - 1:
+                    raise
+                time.sleep(0.05 * (attempt + 1))
+        return 0
+
+    def _compact_batch(self, cutoff):
+        with transaction.atomic():
+            tombstones = TaskChange.objects.filter(deleted=True, changed_at__lt=cutoff)
+            ids = list(tombstones.order_by('changed_at').values_list('task_id', flat=True)[:self.batch_size])
+            if not ids:
+                return 0
+
+            batch = tombstones.filter(task_id__in=ids)  # a task id revived since is no longer a tombstone
+            for user_id, through in batch.order_by().values_list('user_id').annotate(through=Max('sequence')):
+                TaskChangeSequence.objects.filter(user_id=user_id, compacted_through__lt=through).update(
+                    compacted_through=through
+                )
+            return batch.delete()[0]
+
+
+def forget_user(user_id):
+    """
+    Drop a deleted user's change log (their tasks' tombstones are written as the account is deleted).
+    """
+    TaskChange.objects.filter(user_id=user_id).delete()
+    TaskChangeSequence.objects.filter(user_id=user_id).delete()
@@ -0,0 +1,47 @@
+# tasks/conditional.py
+
+import hashlib
+from calendar import timegm
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """
+    Strong ETag over the given parts (fingerprint values, request path, ...).
+    """
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return quote_etag(digest)
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    Return a 304 (or 412) response when the request's validators match, else None.
+    Nothing has been serialized at this point.
+    """
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=_timestamp(last_modified),
+    )
+    if response is not None:
+        _apply(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    _apply(response, etag, last_modified)
+    return response
+
+
+def _apply(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(_timestamp(last_modified))
+    # Task payloads are per user
+    patch_vary_headers(response, ['Authorization'])
+
+
+def _timestamp(value):
+    return timegm(value.utctimetuple()) if value is not None else None
@@ -0,0 +1,372 @@
+# tasks/events.py
+
+import asyncio
+import functools
+import json
+import logging
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import NamedTuple, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def closing_old_connections(func):
+    """
+    Run `func` between the connection housekeeping Django does around a request.
+
+    The event stream and the change log poller never send request_started or
+    request_finished, so without this a connection that broke or outlived
+    CONN_MAX_AGE would be reused forever. Connections inside a transaction
+    (a test's, for one) are left alone.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        _close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _close_old_connections()
+    return wrapper
+
+
+def _close_old_connections():
+    for connection in connections.all(initialized_only=True):
+        if not connection.in_atomic_block:
+            connection.close_if_unusable_or_obsolete()
+
+
+class TaskEvent(NamedTuple):
+    """
+    A change to one of a user's tasks: `created`, `updated`, `completed` or
+    `deleted`, with the task as the list renders it (None once deleted) and
+    its change log sequence number when the broker knows it.
+    """
+    user_id: int
+    type: str
+    task_id: int
+    task: Optional[dict] = None
+    sequence: Optional[int] = None
+
+    def encode(self):
+        """
+        The event as a Server-Sent Events frame.
+        """
+        data = self.task if self.task is not None else {'id': self.task_id}
+        frame = f'event: task.{self.type}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+        if self.sequence is not None:
+            frame = f'id: {self.sequence}\n' + frame
+        return frame.encode('utf-8')
+
+
+class Subscription:
+    """
+    One stream's queue of events waiting to be sent, at most `max_pending` long.
+
+    The hub never waits for a subscriber: when a client reads too slowly for
+    its queue to drain, the queue is dropped and the stream is told to
+    resynchronize (`overflowed`) instead of holding events for it forever.
+    The broker does the same (`reset()`) when it cannot tell what was missed.
+    """
+
+    def __init__(self, user_id, max_pending, cursor=None):
+        self.user_id = user_id
+        self.cursor = cursor
+        self.max_pending = max_pending
+        self.pending = deque()
+        self.overflowed = False
+        self.closed = False
+        self._wakeup = asyncio.Event()
+
+    def offer(self, event):
+        if self.closed or self.overflowed:
+            return
+        if len(self.pending) >= self.max_pending:
+            self.reset()
+        else:
+            self.pending.append(event)
+            self._wakeup.set()
+
+    def reset(self):
+        """
+        Drop the pending events and have the stream tell its client to resynchronize.
+        """
+        if self.closed:
+            return
+        self.pending.clear()
+        self.overflowed = True
+        self._wakeup.set()
+
+    def close(self):
+        self.closed = True
+        self._wakeup.set()
+
+    async def wait(self, timeout):
+        """
+        Wait up to `timeout` seconds for events; return `(events, overflowed)`, both empty on a timeout.
+        """
+        if not self.pending and not self.overflowed and not self.closed:
+            # A timer callback instead of wait_for(): no extra task per idle connection
+            timer = asyncio.get_running_loop().call_later(timeout, self._wakeup.set)
+            try:
+                await self._wakeup.wait()
+            finally:
+                timer.cancel()
+        self._wakeup.clear()
+        events, self.pending = list(self.pending), deque()
+        overflowed, self.overflowed = self.overflowed, False
+        return events, overflowed
+
+
+class EventHub:
+    """
+    In-process fan-out of task events to the streams open in this worker.
+
+    Events reach the hub through a broker (TASK_EVENTS_BROKER), which the hub
+    starts in the event loop of the first subscriber. Each event is handed to
+    the owner's subscriptions only, in the loop's thread; publishing from
+    another thread (a sync view, a signal handler) is thread-safe.
+    """
+
+    def __init__(self):
+        self.subscriptions = {}
+        self.broker = None
+        self.loop = None
+        self._listener = None
+
+    @property
+    def max_pending(self):
+        return getattr(settings, 'TASK_EVENTS_QUEUE_SIZE', 100)
+
+    def subscribe(self, user_id, cursor=None):
+        """
+        Open a subscription to `user_id`'s events; `cursor` is the change log
+        sequence number the stream told its client it starts from.
+        """
+        self.start()
+        subscription = Subscription(user_id, self.max_pending, cursor)
+        self.subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.close()
+        subscriptions = self.subscriptions.get(subscription.user_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self.subscriptions[subscription.user_id]
+
+    def cursors(self):
+        """
+        The users with a stream open, each with the oldest cursor their streams started from (or None).
+        """
+        return {
+            user_id: min((s.cursor for s in subscriptions if s.cursor is not None), default=None)
+            for user_id, subscriptions in self.subscriptions.items()
+        }
+
+    def wants(self, user_id):
+        """
+        Whether writers in this process have to publish `user_id`'s events (see `Broker.publishes`).
+        """
+        return self.broker is not None and self.broker.publishes and user_id in self.subscriptions
+
+    def publish(self, event):
+        if self.broker is not None:
+            self.broker.publish(self, event)
+
+    def dispatch(self, event):
+        for subscription in list(self.subscriptions.get(event.user_id, ())):
+            subscription.offer(event)
+
+    def reset(self, user_id):
+        for subscription in list(self.subscriptions.get(user_id, ())):
+            subscription.reset()
+
+    def dispatch_threadsafe(self, event):
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self.dispatch(event)
+        else:
+            loop.call_soon_threadsafe(self.dispatch, event)
+
+    def start(self):
+        """
+        Bind the hub to the running event loop and start the broker's listener there.
+        """
+        loop = asyncio.get_running_loop()
+        if self.loop is loop:
+            return
+        self.stop()
+        self.loop = loop
+        self.broker = import_string(getattr(settings, 'TASK_EVENTS_BROKER', 'tasks.events.ChangeLogBroker'))()
+        self._listener = loop.create_task(self._listen(self.broker))
+
+    def stop(self):
+        if self._listener is not None and not self._listener.get_loop().is_closed():
+            self._listener.cancel()
+        for subscriptions in list(self.subscriptions.values()):
+            for subscription in subscriptions:
+                subscription.close()
+        self.subscriptions = {}
+        self.broker = self.loop = self._listener = None
+
+    async def _listen(self, broker):
+        while True:
+            try:
+                await broker.listen(self)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Task event broker failed; restarting it")
+                await asyncio.sleep(1)
+
+
+class Broker(ABC):
+    """
+    Carries task events to the hubs of every worker process.
+
+    `publish()` is called by writers when `publishes` is set (and the owner
+    has a stream open in this process); `listen()` runs in each hub's event
+    loop for as long as the hub does and hands events to `hub.dispatch()`.
+    """
+
+    publishes = True
+
+    @abstractmethod
+    def publish(self, hub, event):
+        pass
+
+    @abstractmethod
+    async def listen(self, hub):
+        pass
+
+
+class LocalBroker(Broker):
+    """
+    Delivers events to this process' hub only, straight from the model signals.
+    A stand-in for tests and single-process deployments: writes that send no
+    signals (bulk updates, imports) are not seen.
+    """
+
+    def publish(self, hub, event):
+        hub.dispatch_threadsafe(event)
+
+    async def listen(self, hub):
+        await asyncio.Event().wait()  # nothing to pull; events are pushed by publish()
+
+
+class ChangeLogBroker(Broker):
+    """
+    Shares events between processes through the database's change log (see tasks/changes.py).
+
+    Every TASK_EVENTS_POLL_INTERVAL seconds one query reads the change
+    counters of the users with a stream open in this process; only users
+    whose counter moved have their new changes read. Because the log is
+    written by triggers, every kind of write is seen, whichever process made
+    it. Changes made between two polls are coalesced: a task created and then
+    completed within one interval arrives as one `created` event carrying its
+    completed state.
+    """
+
+    publishes = False  # the database triggers record every write
+    chunk_size = 500
+
+    @property
+    def interval(self):
+        return getattr(settings, 'TASK_EVENTS_POLL_INTERVAL', 1.0)
+
+    def publish(self, hub, event):
+        pass
+
+    async def listen(self, hub):
+        cursors = {}
+        polled_at = timezone.now()
+        while True:
+            await asyncio.sleep(self.interval)
+            users = hub.cursors()
+            now = timezone.now()
+            if users:
+                events, resets = await sync_to_async(self.poll)(users, cursors, polled_at)
+                for user_id in resets:
+                    hub.reset(user_id)
+                for event in events:
+                    hub.dispatch(event)
+            polled_at = now
+
+    @closing_old_connections
+    def poll(self, users, cursors, since):
+        """
+        Events for the changes of `users` after their `cursors` (updated in place),
+        classified against the previous poll at `since`. A user seen for the first
+        time starts from the cursor their stream announced (`users[user_id]`), or
+        else from their current sequence number.
+
+        Returns `(events, resets)`: `resets` are the users whose cursor is older
+        than their compacted tombstones; their streams have to resynchronize, and
+        they are followed from their current sequence number on.
+        """
+        from .changes import CompactedCursor, changes_since
+        from .models import Task, TaskChangeSequence
+        from .serializers import TaskListSerializer
+
+        for user_id in set(cursors) - set(users):
+            del cursors[user_id]
+
+        moved, latest, user_ids = [], {}, list(users)
+        for start in range(0, len(user_ids), self.chunk_size):
+            counters = TaskChangeSequence.objects.filter(user_id__in=user_ids[start:start + self.chunk_size])
+            for user_id, sequence in counters.values_list('user_id', 'sequence'):
+                latest[user_id] = sequence
+                if user_id not in cursors:
+                    cursors[user_id] = sequence if users[user_id] is None else min(users[user_id], sequence)
+                if sequence > cursors[user_id]:
+                    moved.append(user_id)
+        for user_id in users:
+            cursors.setdefault(user_id, 0)  # no task written yet
+
+        events, resets = [], []
+        now = timezone.now()
+        serializer = TaskListSerializer()
+        represent = serializer.representer(serializer.datetime_formatter())
+        for user_id in moved:
+            try:
+                page, cursors[user_id], _ = changes_since(user_id, cursors[user_id], self.chunk_size)
+            except CompactedCursor:
+                cursors[user_id] = latest[user_id]
+                resets.append(user_id)
+                continue
+            rows = TaskListSerializer.rows(
+                Task.objects.filter(user_id=user_id, id__in=[c.task_id for c in page if not c.deleted])
+                .with_status(now)
+            )
+            by_id = {row.id: row for row in rows}
+            for change in page:
+                row = by_id.get(change.task_id)
+                if row is None:
+                    events.append(TaskEvent(user_id, 'deleted', change.task_id, sequence=change.sequence))
+                    continue
+                if row.created_at >= since:
+                    kind = 'created'
+                elif row.is_completed and row.completed_at and row.completed_at >= since:
+                    kind = 'completed'
+                else:
+                    kind = 'updated'
+                events.append(TaskEvent(user_id, kind, row.id, represent(row), change.sequence))
+        return events, resets
+
+
+task_events = EventHub()
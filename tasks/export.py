@@ -0,0 +1,54 @@
+# tasks/export.py
+
+import csv
+import json
+
+from .serializers import TaskListSerializer, TaskSerializer
+
+EXPORT_FIELDS = TaskSerializer.Meta.fields
+
+
+def export_rows(queryset, chunk_size=2000):
+    """
+    Serialize a `with_status()` queryset row by row, with the same field
+    formatting as the list endpoint, fetching `chunk_size` rows at a time
+    through a server-side cursor where the database supports it.
+    """
+    serializer = TaskListSerializer()
+    fmt = serializer.datetime_formatter()
+    rows = TaskListSerializer.rows(queryset).iterator(chunk_size=chunk_size)
+    for row in rows:
+        yield serializer.represent(row, fmt)
+
+
+def ndjson_stream(queryset, lines_per_chunk=500):
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    chunk = []
+    for item in export_rows(queryset):
+        chunk.append(dumps(item))
+        if len(chunk) >= lines_per_chunk:
+            yield '\n'.join(chunk) + '\n'
+            chunk = []
+    if chunk:
+        yield '\n'.join(chunk) + '\n'
+
+
+class _Echo:
+    """
+    File-like object whose write() hands the CSV line straight back.
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_stream(queryset, lines_per_chunk=500):
+    writer = csv.writer(_Echo())
+    chunk = [writer.writerow(EXPORT_FIELDS)]
+    for item in export_rows(queryset):
+        chunk.append(writer.writerow([item[field] for field in EXPORT_FIELDS]))
+        if len(chunk) >= lines_per_chunk:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
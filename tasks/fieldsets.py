@@ -0,0 +1,59 @@
+# tasks/fieldsets.py
+
+from rest_framework import serializers
+
+# The model columns each task field is rendered from, in output order
+FIELD_COLUMNS = {
+    'id': ('id',),
+    'user': ('user_id',),
+    'title': ('title',),
+    'description': ('description',),
+    'priority': ('priority',),
+    'duration_in_hours': ('duration_in_hours',),
+    'start_at': ('start_at',),
+    'due_at': ('due_at',),
+    'status': ('is_completed', 'start_at', 'due_at'),
+    'is_completed': ('is_completed',),
+    'completed_at': ('completed_at',),
+    'prompted': ('prompted',),
+    'created_at': ('created_at',),
+    'updated_at': ('updated_at',),
+}
+
+# Read by every detail response whatever its fields: the ETag and Last-Modified validators
+DETAIL_COLUMNS = ('id', 'user_id', 'updated_at', 'is_completed', 'start_at', 'due_at')
+
+
+def requested_fields(request):
+    """
+    The task fields a read asked for with ?fields=a,b and / or ?exclude=c,d,
+    in output order, or None when it gets all of them.
+    """
+    selected = list(FIELD_COLUMNS)
+    errors = {}
+    for param in ('fields', 'exclude'):
+        value = request.query_params.get(param)
+        if value is None:
+            continue
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in names if name not in FIELD_COLUMNS]
+        if unknown or not names:
+            errors[param] = f"Must be one or more of: {', '.join(FIELD_COLUMNS)}."
+        elif param == 'fields':
+            selected = [name for name in selected if name in names]
+        else:
+            selected = [name for name in selected if name not in names]
+
+    if errors:
+        raise serializers.ValidationError(errors)
+    if not selected:
+        raise serializers.ValidationError({'exclude': "At least one field has to remain."})
+    return None if len(selected) == len(FIELD_COLUMNS) else tuple(selected)
+
+
+def columns_for(fields, columns=FIELD_COLUMNS, keep=()):
+    """
+    The columns `fields` are rendered from, plus `keep`, without duplicates.
+    """
+    needed = [column for field in fields for column in columns[field]]
+    return list(dict.fromkeys([*needed, *keep]))
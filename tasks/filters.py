@@ -0,0 +1,188 @@
+# tasks/filters.py
+
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+from taskmanager.metrics import TimedSerializerMixin
+
+from .models import PriorityRank, TaskQuerySet
+from .search import task_search
+
+
+class TaskStatusFilter(BaseFilterBackend):
+    """
+    Filter tasks by their computed status (?status=overdue).
+    The status is resolved in the database against the request's single `now`.
+    """
+
+    query_param = 'status'
+
+    def filter_queryset(self, request, queryset, view):
+        value = request.query_params.get(self.query_param)
+        if not value:
+            return queryset
+
+        if value not in TaskQuerySet.STATUSES:
+            raise serializers.ValidationError({
+                self.query_param: f"Must be one of: {', '.join(TaskQuerySet.STATUSES)}."
+            })
+        return queryset.filter_status(value, now=view.request_now)
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Only return tasks with this status.',
+            'schema': {'type': 'string', 'enum': list(TaskQuerySet.STATUSES)},
+        }]
+
+
+class TaskFieldFilterSerializer(TimedSerializerMixin, serializers.Serializer):
+    """
+    Validates the list's field filters. `priority` takes one value or a comma-separated list.
+    """
+
+    priority = serializers.CharField(required=False)
+    is_completed = serializers.BooleanField(required=False)
+    start_at_after = serializers.DateTimeField(required=False, input_formats=['iso-8601'])
+    start_at_before = serializers.DateTimeField(required=False, input_formats=['iso-8601'])
+    due_at_after = serializers.DateTimeField(required=False, input_formats=['iso-8601'])
+    due_at_before = serializers.DateTimeField(required=False, input_formats=['iso-8601'])
+
+    def validate_priority(self, value):
+        priorities = [priority.strip() for priority in value.split(',') if priority.strip()]
+        unknown = [priority for priority in priorities if priority not in PriorityRank.RANKS]
+        if unknown or not priorities:
+            raise serializers.ValidationError(f"Must be one or more of: {', '.join(PriorityRank.RANKS)}.")
+        return priorities
+
+    def validate(self, attrs):
+        for field in ('start_at', 'due_at'):
+            after, before = attrs.get(f'{field}_after'), attrs.get(f'{field}_before')
+            if after is not None and before is not None and after > before:
+                raise serializers.ValidationError({f'{field}_before': f"Must not be earlier than {field}_after."})
+        return attrs
+
+
+class TaskFieldFilter(BaseFilterBackend):
+    """
+    Filter tasks by priority, completion and start / due time windows:
+    ?priority=high,medium&is_completed=false&due_at_after=...&due_at_before=...
+
+    Windows are inclusive. Each filter is a plain column predicate, so it runs
+    on the (user, <column>, id) indexes that also back ?ordering=.
+    """
+
+    lookups = {
+        'priority': 'priority__in',
+        'is_completed': 'is_completed',
+        'start_at_after': 'start_at__gte',
+        'start_at_before': 'start_at__lte',
+        'due_at_after': 'due_at__gte',
+        'due_at_before': 'due_at__lte',
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        params = {name: request.query_params[name] for name in self.lookups if name in request.query_params}
+        if not params:
+            return queryset
+
+        # A plain dict: a QueryDict would make a missing is_completed read as False
+        serializer = TaskFieldFilterSerializer(data=params)
+        serializer.is_valid(raise_exception=True)
+        return queryset.filter(**{self.lookups[name]: value for name, value in serializer.validated_data.items()})
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {'name': 'priority', 'required': False, 'in': 'query',
+             'description': 'Only return tasks with this priority (comma-separate several).',
+             'schema': {'type': 'string'}},
+            {'name': 'is_completed', 'required': False, 'in': 'query',
+             'description': 'Only return completed (true) or open (false) tasks.',
+             'schema': {'type': 'boolean'}},
+        ] + [
+            {'name': name, 'required': False, 'in': 'query',
+             'description': f"Only return tasks with {name.rsplit('_', 1)[0]} "
+                            f"{'at or after' if name.endswith('after') else 'at or before'} this time.",
+             'schema': {'type': 'string', 'format': 'date-time'}}
+            for name in ('start_at_after', 'start_at_before', 'due_at_after', 'due_at_before')
+        ]
+
+
+class TaskSearchFilter(BaseFilterBackend):
+    """
+    Full-text search of the user's task titles and descriptions (?q=weekly report).
+
+    Every word has to match (stop words aside, see tasks/search.py). Results
+    are ordered by relevance unless ?ordering= asks otherwise; the rank is only
+    computed when they are.
+    """
+
+    query_param = 'q'
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.query_param, '').strip()
+        if not text:
+            return queryset
+        ranked = TaskOrderingFilter().get_ordering(request)[0].lstrip('-') == 'search_rank'
+        return task_search(queryset.db).filter(queryset, text, request.user.pk, ranked=ranked)
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Only return tasks whose title or description contain every word of this search.',
+            'schema': {'type': 'string'},
+        }]
+
+
+class TaskOrderingFilter(BaseFilterBackend):
+    """
+    Order tasks by ?ordering=<field> or ?ordering=-<field>, ties broken by id.
+
+    Every ordering has a (user, <key>, id) index, which the keyset paginator
+    walks one page at a time. `priority` sorts by rank (low < medium < high,
+    see `PriorityRank`), not alphabetically. Searches (?q=) default to
+    `relevance`, best match first.
+    """
+
+    query_param = 'ordering'
+    default = 'start_at'
+    search_default = 'relevance'
+    fields = {
+        'start_at': 'start_at',
+        'due_at': 'due_at',
+        'created_at': 'created_at',
+        'priority': 'priority_rank',
+        'relevance': 'search_rank',
+    }
+
+    def get_ordering(self, request):
+        searching = bool(request.query_params.get(TaskSearchFilter.query_param, '').strip())
+        value = request.query_params.get(self.query_param) or (self.search_default if searching else self.default)
+        descending = value.startswith('-')
+        key = self.fields.get(value[1:] if descending else value)
+        if key is None:
+            choices = ', '.join(f'{name}, -{name}' for name in self.fields)
+            raise serializers.ValidationError({self.query_param: f"Must be one of: {choices}."})
+        if key == 'search_rank' and not searching:
+            raise serializers.ValidationError({self.query_param: "Ordering by relevance needs a ?q= search."})
+        return ('-' + key, '-id') if descending else (key, 'id')
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = self.get_ordering(request)
+        if ordering[0].lstrip('-') == 'priority_rank':
+            queryset = queryset.with_priority_rank()
+        return queryset.order_by(*ordering)
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Sort by this field, descending with a leading "-" '
+                           '(default: relevance for searches, start_at otherwise).',
+            'schema': {'type': 'string', 'enum': [f'{sign}{name}' for name in self.fields for sign in ('', '-')]},
+        }]
@@ -0,0 +1,176 @@
+# tasks/importer.py
+
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.utils import timezone
+
+from .models import Task
+from .serializers import calculate_due_at
+
+User = get_user_model()
+
+
+class TaskRowValidator:
+    """
+    Validates one imported row with the same rules and messages as `TaskSerializer`
+    and turns it into `Task` constructor arguments.
+
+    This avoids building a DRF serializer per row, which dominates the cost of
+    importing millions of tasks.
+    """
+
+    start_at_format = "%Y-%m-%dT%H:%M:%S"  # TaskSerializer.start_at input format
+    priorities = {value for value, _ in Task.PRIORITY_CHOICES}
+    title_max_length = Task._meta.get_field('title').max_length
+    true_values = {'true', '1', 'yes'}
+    false_values = {'false', '0', 'no', ''}
+
+    def __init__(self, allow_past_start=False):
+        self.allow_past_start = allow_past_start
+        self.users, self.ambiguous_emails = self.load_users()
+        self.tz = timezone.get_current_timezone()
+
+    @staticmethod
+    def load_users():
+        users, ambiguous = {}, set()
+        for email, pk in User.objects.exclude(email='').values_list('email', 'id').iterator():
+            key = email.lower()
+            if key in users:
+                ambiguous.add(key)
+            users[key] = pk
+        return users, ambiguous
+
+    def validate(self, row, now):
+        """
+        Return `(task_kwargs, None)` for a valid row or `(None, errors)` otherwise.
+        """
+        errors = {}
+        data = {}
+
+        email = (row.get('user_email') or '').strip().lower()
+        if not email:
+            errors['user_email'] = ["This field is required."]
+        elif email in self.ambiguous_emails:
+            errors['user_email'] = ["Multiple users have this email address."]
+        elif email not in self.users:
+            errors['user_email'] = ["User with this email does not exist."]
+        else:
+            data['user_id'] = self.users[email]
+
+        title = row.get('title')
+        if title is None:
+            errors['title'] = ["This field is required."]
+        elif not str(title).strip():
+            errors['title'] = ["This field may not be blank."]
+        elif len(str(title)) > self.title_max_length:
+            errors['title'] = [f"Ensure this field has no more than {self.title_max_length} characters."]
+        else:
+            data['title'] = str(title)
+
+        if 'description' not in row:
+            errors['description'] = ["This field is required."]
+        else:
+            data['description'] = row['description']
+
+        priority = row.get('priority')
+        if priority is None:
+            errors['priority'] = ["This field is required."]
+        elif priority not in self.priorities:
+            errors['priority'] = [f'"{priority}" is not a valid choice.']
+        else:
+            data['priority'] = priority
+
+        duration = self._integer(row.get('duration_in_hours'), 'duration_in_hours', errors)
+        start_at = self._start_at(row.get('start_at'), now, errors)
+
+        completed = row.get('is_completed')
+        if completed is not None and not isinstance(completed, bool):
+            text = str(completed).strip().lower()
+            if text in self.true_values:
+                completed = True
+            elif text in self.false_values:
+                completed = False
+            else:
+                errors['is_completed'] = ["Must be a valid boolean."]
+        data['is_completed'] = bool(completed)
+
+        if errors:
+            return None, errors
+
+        data['duration_in_hours'] = duration
+        data['start_at'] = start_at
+        data['due_at'] = calculate_due_at(start_at, duration)
+        return data, None
+
+    @staticmethod
+    def _integer(value, name, errors):
+        if value is None or value == '':
+            errors[name] = ["This field is required."]
+            return None
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            errors[name] = ["A valid integer is required."]
+            return None
+        if isinstance(value, float) and value != number:
+            errors[name] = ["A valid integer is required."]
+            return None
+        if number < 1:
+            errors[name] = ["Ensure this value is greater than or equal to 1."]
+            return None
+        return number
+
+    def _start_at(self, value, now, errors):
+        if not value:
+            errors['start_at'] = ["This field is required."]
+            return None
+        try:
+            start_at = datetime.strptime(value, self.start_at_format)
+        except (TypeError, ValueError):
+            errors['start_at'] = [f"Datetime has wrong format. Use one of these formats instead: "
+                                  f"YYYY-MM-DDThh:mm:ss."]
+            return None
+        start_at = timezone.make_aware(start_at, self.tz)
+        if not self.allow_past_start and start_at < now:
+            errors['start_at'] = ["Start time cannot be in the past."]
+            return None
+        return start_at
+
+
+class TaskBatchWriter:
+    """
+    Inserts validated rows with a single `executemany` per batch.
+
+    `bulk_create` spends most of its time building model instances and
+    preparing every value through the field API; here the only per-row work
+    left is adapting `start_at` and `due_at`. Like `bulk_create` this sends no
+    signals, so callers invalidate caches themselves.
+    """
+
+    fields = (
+        'user', 'title', 'description', 'priority', 'duration_in_hours', 'start_at', 'due_at',
+        'is_completed', 'completed_at', 'prompted', 'created_at', 'updated_at',
+    )
+
+    def __init__(self, using='default'):
+        self.connection = connections[using]
+        quote = self.connection.ops.quote_name
+        columns = ', '.join(quote(Task._meta.get_field(name).column) for name in self.fields)
+        placeholders = ', '.join(['%s'] * len(self.fields))
+        self.sql = f'INSERT INTO {quote(Task._meta.db_table)} ({columns}) VALUES ({placeholders})'
+
+    def write(self, rows, now):
+        adapt = self.connection.ops.adapt_datetimefield_value
+        stamp = adapt(now)
+        params = [
+            (row['user_id'], row['title'], row['description'], row['priority'], row['duration_in_hours'],
+             adapt(row['start_at']), adapt(row['due_at']),
+             row['is_completed'], stamp if row['is_completed'] else None, False, stamp, stamp)
+            for row in rows
+        ]
+        if params:
+            with self.connection.cursor() as cursor:
+                cursor.executemany(self.sql, params)
+        return len(params)
@@ -0,0 +1,38 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tasks.changes import TaskChangeCompactor
+
+
+class Command(BaseCommand):
+    help = "Remove the tombstones of deleted tasks from the change log once no client should still need them."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=float, default=None,
+                            help="Keep tombstones younger than this many days "
+                                 "(default: TASK_CHANGES_TOMBSTONE_DAYS).")
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Tombstones removed per transaction (default: 1000).")
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep compacting every --interval seconds instead of exiting.")
+        parser.add_argument('--interval', type=float, default=3600.0,
+                            help="Seconds to sleep between cycles with --loop (default: 3600).")
+        parser.add_argument('--max-batches', type=int, default=None,
+                            help="Stop a cycle after this many batches.")
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else settings.TASK_CHANGES_TOMBSTONE_DAYS
+        compactor = TaskChangeCompactor(batch_size=options['batch_size'])
+        while True:
+            result = compactor.run(timezone.now() - timedelta(days=days), max_batches=options['max_batches'])
+            self.stdout.write(
+                f"Removed {result['removed']} tombstone(s) older than {days:g} day(s) "
+                f"in {result['batches']} batch(es), {result['seconds']:.3f}s"
+            )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,153 @@
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from tasks.cache import task_list_cache
+from tasks.importer import TaskBatchWriter, TaskRowValidator
+from tasks.models import TaskImportCheckpoint
+
+
+class Command(BaseCommand):
+    help = ("Bulk import tasks from a CSV or NDJSON file. Rows are validated with the TaskSerializer rules, "
+            "users are resolved by the `user_email` column and progress is checkpointed per batch.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or NDJSON file to import, or '-' for stdin.")
+        parser.add_argument('--format', choices=['csv', 'ndjson'], default=None,
+                            help="Input format (default: inferred from the file extension).")
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="Rows inserted per transaction (default: 5000).")
+        parser.add_argument('--job', default=None,
+                            help="Checkpoint name (default: derived from the absolute file path).")
+        parser.add_argument('--restart', action='store_true',
+                            help="Ignore an existing checkpoint and import from the first row.")
+        parser.add_argument('--allow-past-start', action='store_true',
+                            help="Accept start_at values in the past (historical data).")
+        parser.add_argument('--errors', default=None,
+                            help="Write rejected rows to this file as NDJSON.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        fmt = options['format'] or self.infer_format(path)
+        job = options['job'] or self.default_job(path)
+        checkpoint, _ = TaskImportCheckpoint.objects.get_or_create(job=job)
+        if options['restart']:
+            checkpoint.records_done = checkpoint.imported = checkpoint.rejected = 0
+            checkpoint.save()
+        skip = checkpoint.records_done
+        if skip:
+            self.stdout.write(f"Resuming job {job!r} after {skip} record(s).")
+
+        validator = TaskRowValidator(allow_past_start=options['allow_past_start'])
+        writer = TaskBatchWriter()
+        errors_file = open(options['errors'], 'a', encoding='utf-8') if options['errors'] else None
+        stream = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8', newline='')
+
+        started = time.monotonic()
+        imported = rejected = 0
+        batch, user_ids = [], set()
+        record = 0
+        now = timezone.now()
+        try:
+            for record, row in enumerate(self.read_rows(stream, fmt), start=1):
+                if record <= skip:
+                    continue
+                if row is None:
+                    data, errors = None, {'non_field_errors': ["Invalid JSON object."]}
+                else:
+                    data, errors = validator.validate(row, now)
+                if errors:
+                    rejected += 1
+                    if errors_file:
+                        errors_file.write(json.dumps({'record': record, 'errors': errors}) + '\n')
+                else:
+                    batch.append(data)
+                    user_ids.add(data['user_id'])
+
+                if record % batch_size == 0:
+                    imported += self.flush(writer, checkpoint, batch, user_ids, record, rejected, now)
+                    rejected = 0
+                    now = timezone.now()
+                    batch, user_ids = [], set()
+                    self.report(checkpoint, started, skip)
+                    if errors_file:
+                        errors_file.flush()
+
+            if record > checkpoint.records_done:
+                imported += self.flush(writer, checkpoint, batch, user_ids, record, rejected, now)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            if errors_file:
+                errors_file.close()
+
+        self.report(checkpoint, started, skip)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} task(s) in this run; job {job!r} totals "
+            f"{checkpoint.imported} imported, {checkpoint.rejected} rejected."
+        ))
+
+    @staticmethod
+    def flush(writer, checkpoint, batch, user_ids, record, rejected, now):
+        """
+        Insert one batch and advance the checkpoint in the same transaction,
+        so a crash never leaves rows inserted without their checkpoint.
+        """
+        with transaction.atomic():
+            count = writer.write(batch, now)
+            checkpoint.records_done = record
+            checkpoint.imported += count
+            checkpoint.rejected += rejected
+            checkpoint.save(update_fields=['records_done', 'imported', 'rejected', 'updated_at'])
+            for user_id in user_ids:
+                task_list_cache.invalidate(user_id)
+        return count
+
+    def report(self, checkpoint, started, skip):
+        elapsed = time.monotonic() - started
+        rate = (checkpoint.records_done - skip) / elapsed if elapsed else 0.0
+        self.stdout.write(
+            f"{checkpoint.records_done} record(s) processed, {checkpoint.imported} imported, "
+            f"{checkpoint.rejected} rejected, {elapsed:.1f}s ({rate:.0f} rows/s)"
+        )
+
+    @staticmethod
+    def read_rows(stream, fmt):
+        if fmt == 'csv':
+            yield from csv.DictReader(stream)
+            return
+        for line in stream:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield row if isinstance(row, dict) else None
+
+    @staticmethod
+    def infer_format(path):
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.csv':
+            return 'csv'
+        if extension in ('.ndjson', '.jsonl'):
+            return 'ndjson'
+        raise CommandError("Cannot infer the input format, pass --format csv or --format ndjson.")
+
+    @staticmethod
+    def default_job(path):
+        if path == '-':
+            raise CommandError("Pass --job when importing from stdin so the import can be resumed.")
+        digest = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:12]
+        return f'{os.path.basename(path)}:{digest}'
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tasks.sweeper import OverdueSweeper
+
+
+class Command(BaseCommand):
+    help = "Prompt users about overdue tasks: flip Task.prompted and queue a notification for each task."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Tasks claimed per transaction (default: 500).")
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep sweeping every --interval seconds instead of exiting.")
+        parser.add_argument('--interval', type=float, default=30.0,
+                            help="Seconds to sleep between cycles with --loop (default: 30).")
+        parser.add_argument('--max-batches', type=int, default=None,
+                            help="Stop a cycle after this many batches.")
+
+    def handle(self, *args, **options):
+        sweeper = OverdueSweeper(batch_size=options['batch_size'])
+        while True:
+            result = sweeper.run(max_batches=options['max_batches'])
+            rate = result['claimed'] / result['seconds'] if result['seconds'] else 0.0
+            self.stdout.write(
+                f"Prompted {result['claimed']} overdue task(s) in {result['batches']} batch(es), "
+                f"{result['seconds']:.3f}s ({rate:.0f} tasks/s)"
+            )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
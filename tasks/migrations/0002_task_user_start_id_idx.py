@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-17 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'start_at', 'id'], name='task_user_start_id_idx'),
+        ),
+    ]
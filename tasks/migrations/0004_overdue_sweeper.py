@@ -0,0 +1,45 @@
+# Generated by Django 4.2.23 on 2026-10-17 11:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0003_task_status_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('overdue', 'Overdue')], max_length=20)),
+                ('message', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('delivered_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_completed', False), ('prompted', False)), fields=['due_at', 'id'], name='task_unprompted_due_idx'),
+        ),
+        migrations.AddField(
+            model_name='tasknotification',
+            name='task',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='tasks.task'),
+        ),
+        migrations.AddField(
+            model_name='tasknotification',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_notifications', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='tasknotification',
+            index=models.Index(condition=models.Q(('delivered_at__isnull', True)), fields=['created_at', 'id'], name='notification_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.23 on 2026-10-17 13:00
+
+from django.db import migrations, models
+import tasks.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_task_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'due_at', 'id'], name='task_user_due_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='task_user_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(models.F('user'), tasks.models.PriorityRank(), models.F('id'), name='task_user_priority_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'priority', 'start_at', 'id'], name='task_user_priority_start_idx'),
+        ),
+    ]
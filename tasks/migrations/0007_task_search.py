@@ -0,0 +1,108 @@
+from django.db import migrations
+
+# The DDL is frozen here rather than imported from tasks/search.py, so later edits to that
+# module cannot change what this migration did. The names must match the ones search.py queries.
+SQLITE_TABLE = 'tasks_task_fts'
+POSTGRES_COLUMN = 'search_vector'
+POSTGRES_CONFIG = 'english'
+
+SQLITE_INSTALL = [
+    f"""
+    CREATE VIRTUAL TABLE "{SQLITE_TABLE}" USING fts5(
+        user_id, title, description,
+        content='tasks_task', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER "{SQLITE_TABLE}_insert" AFTER INSERT ON "tasks_task" BEGIN
+        INSERT INTO "{SQLITE_TABLE}" (rowid, user_id, title, description)
+        VALUES (new.id, new.user_id, new.title, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER "{SQLITE_TABLE}_delete" AFTER DELETE ON "tasks_task" BEGIN
+        INSERT INTO "{SQLITE_TABLE}" ("{SQLITE_TABLE}", rowid, user_id, title, description)
+        VALUES ('delete', old.id, old.user_id, old.title, old.description);
+    END
+    """,
+    # Only writes to the indexed columns touch the index (not completion, prompting, ...)
+    f"""
+    CREATE TRIGGER "{SQLITE_TABLE}_update" AFTER UPDATE OF user_id, title, description ON "tasks_task" BEGIN
+        INSERT INTO "{SQLITE_TABLE}" ("{SQLITE_TABLE}", rowid, user_id, title, description)
+        VALUES ('delete', old.id, old.user_id, old.title, old.description);
+        INSERT INTO "{SQLITE_TABLE}" (rowid, user_id, title, description)
+        VALUES (new.id, new.user_id, new.title, new.description);
+    END
+    """,
+    f"""INSERT INTO "{SQLITE_TABLE}" ("{SQLITE_TABLE}") VALUES ('rebuild')""",
+]
+
+SQLITE_UNINSTALL = [
+    f'DROP TRIGGER IF EXISTS "{SQLITE_TABLE}_insert"',
+    f'DROP TRIGGER IF EXISTS "{SQLITE_TABLE}_delete"',
+    f'DROP TRIGGER IF EXISTS "{SQLITE_TABLE}_update"',
+    f'DROP TABLE IF EXISTS "{SQLITE_TABLE}"',
+]
+
+# A stored generated column is kept in step with title / description by Postgres itself
+POSTGRES_INSTALL = [
+    f"""
+    ALTER TABLE "tasks_task" ADD COLUMN "{POSTGRES_COLUMN}" tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{POSTGRES_CONFIG}', coalesce("title", '')), 'A') ||
+        setweight(to_tsvector('{POSTGRES_CONFIG}', coalesce("description", '')), 'B')
+    ) STORED
+    """,
+    f'CREATE INDEX "task_search_vector_idx" ON "tasks_task" USING GIN ("{POSTGRES_COLUMN}")',
+]
+
+POSTGRES_UNINSTALL = [
+    'DROP INDEX IF EXISTS "task_search_vector_idx"',
+    f'ALTER TABLE "tasks_task" DROP COLUMN IF EXISTS "{POSTGRES_COLUMN}"',
+]
+
+
+def install(apps, schema_editor):
+    """
+    Create the full-text index of the database's vendor.
+    """
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite' and sqlite_has_fts5(connection):
+        statements = SQLITE_INSTALL
+    elif connection.vendor == 'postgresql':
+        statements = POSTGRES_INSTALL
+    else:
+        return  # searched with LIKE (see FallbackTaskSearch)
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def uninstall(apps, schema_editor):
+    statements = {'sqlite': SQLITE_UNINSTALL, 'postgresql': POSTGRES_UNINSTALL}
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if cursor.fetchone()[0]:
+            return True
+        # Builds that load FTS5 as an extension do not report the compile option
+        cursor.execute("SELECT 1 FROM pragma_module_list WHERE name = 'fts5'")
+        return cursor.fetchone() is not None
+
+
+class Migration(migrations.Migration):
+    """
+    Full-text index over task titles and descriptions (see tasks/search.py):
+    an FTS5 table kept in sync by triggers on SQLite, a generated tsvector
+    column with a GIN index on Postgres.
+    """
+
+    dependencies = [
+        ('tasks', '0006_task_list_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,141 @@
+# Generated by Django 4.2.23 on 2026-10-17 13:43
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# The DDL is frozen here rather than imported from tasks/changes.py, so later edits to that
+# module cannot change what this migration did. The tables are the ones created below.
+CHANGE_TABLE = 'tasks_taskchange'
+SEQUENCE_TABLE = 'tasks_taskchangesequence'
+
+
+def sqlite_trigger(event, row, deleted):
+    """
+    SQLite trigger logging `row` (new / old) of a tasks_task `event`: bump the
+    owner's counter and point the task's change row at the new sequence number.
+    """
+    return f"""
+    CREATE TRIGGER "{CHANGE_TABLE}_{event.lower()}" AFTER {event} ON "tasks_task" BEGIN
+        INSERT INTO "{SEQUENCE_TABLE}" (user_id, sequence, compacted_through) VALUES ({row}.user_id, 1, 0)
+            ON CONFLICT (user_id) DO UPDATE SET sequence = sequence + 1;
+        INSERT INTO "{CHANGE_TABLE}" (task_id, user_id, sequence, deleted, changed_at)
+            VALUES ({row}.id, {row}.user_id,
+                    (SELECT sequence FROM "{SEQUENCE_TABLE}" WHERE user_id = {row}.user_id),
+                    {int(deleted)}, CURRENT_TIMESTAMP)
+            ON CONFLICT (task_id) DO UPDATE SET user_id = excluded.user_id, sequence = excluded.sequence,
+                                                deleted = excluded.deleted, changed_at = excluded.changed_at;
+    END
+    """
+
+
+# Every task already in the table is logged once, numbered per user in id order
+BACKFILL = [
+    f"""
+    INSERT INTO "{CHANGE_TABLE}" (task_id, user_id, sequence, deleted, changed_at)
+    SELECT id, user_id, ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY id), 1 = 0, CURRENT_TIMESTAMP
+    FROM "tasks_task"
+    """,
+    f"""
+    INSERT INTO "{SEQUENCE_TABLE}" (user_id, sequence, compacted_through)
+    SELECT user_id, COUNT(*), 0 FROM "tasks_task" GROUP BY user_id
+    """,
+]
+
+SQLITE_INSTALL = [
+    sqlite_trigger('INSERT', 'new', deleted=False),
+    sqlite_trigger('UPDATE', 'new', deleted=False),
+    sqlite_trigger('DELETE', 'old', deleted=True),
+    *BACKFILL,
+]
+
+SQLITE_UNINSTALL = [
+    f'DROP TRIGGER IF EXISTS "{CHANGE_TABLE}_{event}"' for event in ('insert', 'update', 'delete')
+]
+
+# The upsert on the counter row locks it until the writing transaction commits, so one user's
+# changes commit in sequence order and a reader never sees sequence n + 1 before n
+POSTGRES_INSTALL = [
+    f"""
+    CREATE FUNCTION "{CHANGE_TABLE}_log"() RETURNS trigger LANGUAGE plpgsql AS $$
+    DECLARE
+        task "tasks_task";
+        next_sequence bigint;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN task := OLD; ELSE task := NEW; END IF;
+        INSERT INTO "{SEQUENCE_TABLE}" (user_id, sequence, compacted_through) VALUES (task.user_id, 1, 0)
+            ON CONFLICT (user_id) DO UPDATE SET sequence = "{SEQUENCE_TABLE}".sequence + 1
+            RETURNING sequence INTO next_sequence;
+        INSERT INTO "{CHANGE_TABLE}" (task_id, user_id, sequence, deleted, changed_at)
+            VALUES (task.id, task.user_id, next_sequence, TG_OP = 'DELETE', now())
+            ON CONFLICT (task_id) DO UPDATE SET user_id = EXCLUDED.user_id, sequence = EXCLUDED.sequence,
+                                                deleted = EXCLUDED.deleted, changed_at = EXCLUDED.changed_at;
+        RETURN NULL;
+    END
+    $$
+    """,
+    f"""
+    CREATE TRIGGER "{CHANGE_TABLE}_log" AFTER INSERT OR UPDATE OR DELETE ON "tasks_task"
+    FOR EACH ROW EXECUTE FUNCTION "{CHANGE_TABLE}_log"()
+    """,
+    *BACKFILL,
+]
+
+POSTGRES_UNINSTALL = [
+    f'DROP TRIGGER IF EXISTS "{CHANGE_TABLE}_log" ON "tasks_task"',
+    f'DROP FUNCTION IF EXISTS "{CHANGE_TABLE}_log"()',
+]
+
+
+def install(apps, schema_editor):
+    """
+    Create the change-logging triggers and log the existing tasks.
+    """
+    statements = {'sqlite': SQLITE_INSTALL, 'postgresql': POSTGRES_INSTALL}
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def uninstall(apps, schema_editor):
+    statements = {'sqlite': SQLITE_UNINSTALL, 'postgresql': POSTGRES_UNINSTALL}
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+    """
+    Change log behind /api/tasks/changes (see tasks/changes.py): triggers on
+    tasks_task record every insert, update and delete, and the existing tasks
+    are logged once.
+    """
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0007_task_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskChangeSequence',
+            fields=[
+                ('user', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('sequence', models.BigIntegerField(default=0)),
+                ('compacted_through', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TaskChange',
+            fields=[
+                ('task', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='+', serialize=False, to='tasks.task')),
+                ('sequence', models.BigIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('changed_at', models.DateTimeField()),
+                ('user', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'sequence'], name='task_change_user_seq_idx'), models.Index(condition=models.Q(('deleted', True)), fields=['changed_at'], name='task_change_tombstone_idx')],
+            },
+        ),
+        migrations.RunPython(install, uninstall),
+    ]
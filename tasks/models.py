@@ -12,6 +12,106 @@ class TimeStampedModel(models.Model):
     class Meta:
         abstract = True
 
+class PriorityRank(models.Func):
+    """
+    A task's priority as a number that sorts low < medium < high.
+
+    The ranks are written into the SQL as constants rather than bound as
+    parameters: a query only uses the expression index on the rank
+    (`task_user_priority_rank_idx`) when its expression is identical to the
+    indexed one, which a CASE with placeholders is not.
+    """
+
+    RANKS = {'low': 1, 'medium': 2, 'high': 3}
+    output_field = models.PositiveSmallIntegerField()
+
+    def __init__(self, expression='priority', **extra):
+        super().__init__(models.F(expression) if isinstance(expression, str) else expression, **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        column, params = compiler.compile(self.source_expressions[0])
+        whens = ' '.join(f"WHEN '{value}' THEN {rank}" for value, rank in self.RANKS.items())
+        return f'CASE {column} {whens} ELSE 0 END', params
+
+
+class TaskQuerySet(models.QuerySet):
+    STATUSES = ('completed', 'overdue', 'in_progress', 'pending')
+
+    @staticmethod
+    def status_q(status, now):
+        """
+        Plain column predicates for one status, mirroring `Task.status_at`.
+        Kept free of CASE expressions so the partial open-task indexes apply.
+        """
+        if status == 'completed':
+            return models.Q(is_completed=True)
+        if status == 'overdue':
+            return models.Q(is_completed=False, due_at__lt=now)
+        if status == 'in_progress':
+            return models.Q(is_completed=False, due_at__gte=now, start_at__lte=now)
+        if status == 'pending':
+            return models.Q(is_completed=False, due_at__gte=now, start_at__gt=now)
+        raise ValueError(f"Unknown status: {status}")
+
+    def with_status(self, now=None):
+        """
+        Annotate each row with `annotated_status`, computed in SQL against a single `now`.
+        """
+        now = now or timezone.now()
+        return self.annotate(annotated_status=models.Case(
+            models.When(is_completed=True, then=models.Value('completed')),
+            models.When(due_at__lt=now, then=models.Value('overdue')),
+            models.When(start_at__lte=now, then=models.Value('in_progress')),
+            default=models.Value('pending'),
+            output_field=models.CharField(max_length=11),
+        ))
+
+    def with_priority_rank(self):
+        """
+        Annotate each row with `priority_rank` (see `PriorityRank`).
+        """
+        return self.annotate(priority_rank=PriorityRank())
+
+    def filter_status(self, status, now=None):
+        return self.filter(self.status_q(status, now or timezone.now()))
+
+    def fingerprint(self, now=None):
+        """
+        Cheap one-query summary that changes whenever the rows or their statuses change.
+
+        Writes move `updated_at`, deletes move `total`, and time-driven status
+        transitions (pending -> in_progress -> overdue) move the two counters.
+        `last_modified` is the latest write or status transition, and
+        `next_transition` the earliest one still to come.
+        """
+        now = now or timezone.now()
+        return self._summarize(self.aggregate(**self._fingerprint_aggregates(now)))
+
+    async def afingerprint(self, now=None):
+        now = now or timezone.now()
+        return self._summarize(await self.aaggregate(**self._fingerprint_aggregates(now)))
+
+    def _fingerprint_aggregates(self, now):
+        return dict(
+            next_start=models.Min('start_at', filter=models.Q(is_completed=False, start_at__gt=now)),
+            next_due=models.Min('due_at', filter=models.Q(is_completed=False, due_at__gte=now)),
+            updated=models.Max('updated_at'),
+            started=models.Max('start_at', filter=models.Q(is_completed=False, start_at__lte=now)),
+            overdue_since=models.Max('due_at', filter=models.Q(is_completed=False, due_at__lt=now)),
+            total=models.Count('id'),
+            in_progress=models.Count('id', filter=self.status_q('in_progress', now)),
+            overdue=models.Count('id', filter=self.status_q('overdue', now)),
+        )
+
+    @staticmethod
+    def _summarize(summary):
+        moments = [summary.pop(key) for key in ('updated', 'started', 'overdue_since')]
+        summary['last_modified'] = max((m for m in moments if m is not None), default=None)
+        upcoming = [summary.pop(key) for key in ('next_start', 'next_due')]
+        summary['next_transition'] = min((m for m in upcoming if m is not None), default=None)
+        return summary
+
+
 class Task(TimeStampedModel, models.Model):
     PRIORITY_CHOICES = [
         ('high', 'High'),
@@ -32,14 +132,49 @@ class Task(TimeStampedModel, models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     prompted = models.BooleanField(default=False)  # check whether the user has been prompted after due date
 
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Backs keyset pagination of a user's task list (see tasks/pagination.py)
+            models.Index(fields=['user', 'start_at', 'id'], name='task_user_start_id_idx'),
+            # Back ?status= filtering of open tasks (see TaskQuerySet.status_q)
+            models.Index(fields=['user', 'due_at'], condition=models.Q(is_completed=False),
+                         name='task_open_user_due_idx'),
+            models.Index(fields=['user', 'start_at'], condition=models.Q(is_completed=False),
+                         name='task_open_user_start_idx'),
+            # Back the list's ?ordering= values and range filters (see tasks/filters.py)
+            models.Index(fields=['user', 'due_at', 'id'], name='task_user_due_id_idx'),
+            models.Index(fields=['user', 'created_at', 'id'], name='task_user_created_id_idx'),
+            models.Index(models.F('user'), PriorityRank(), models.F('id'), name='task_user_priority_rank_idx'),
+            # Backs ?priority= under the default start_at ordering
+            models.Index(fields=['user', 'priority', 'start_at', 'id'], name='task_user_priority_start_idx'),
+            # Lets the overdue sweeper walk only the tasks it still has to prompt (see tasks/sweeper.py)
+            models.Index(fields=['due_at', 'id'], condition=models.Q(is_completed=False, prompted=False),
+                         name='task_unprompted_due_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
     @property
     def dynamic_status(self):
-        now = timezone.now()
+        return self.status_at(timezone.now())
+
+    def status_changed_at(self, now):
+        """
+        When this task last changed, counting time-driven status transitions as changes.
+        """
+        moments = [self.updated_at]
+        if not self.is_completed:
+            if self.start_at <= now:
+                moments.append(self.start_at)
+            if self.due_at < now:
+                moments.append(self.due_at)
+        return max(moments)
 
+    def status_at(self, now):
+        # Keep in step with TaskQuerySet.with_status, which computes the same thing in SQL
         if self.is_completed:
             return 'completed'
         if now > self.due_at:
@@ -48,4 +183,93 @@ class Task(TimeStampedModel, models.Model):
             return 'in_progress'
         if now < self.start_at:
             return 'pending'
-        return 'pending'  # fallback
\ No newline at end of file
+        return 'pending'  # fallback
+
+
+class TaskNotification(models.Model):
+    """
+    Outbox of notifications waiting to be delivered to users.
+
+    Rows are written by the overdue sweeper in the same transaction that flips
+    `Task.prompted`, and are kept even if the task is deleted afterwards.
+    """
+    KIND_CHOICES = [
+        ('overdue', 'Overdue'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='task_notifications')
+    task = models.ForeignKey(Task, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    message = models.CharField(max_length=255)
+    created_at = models.DateTimeField(default=timezone.now)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], condition=models.Q(delivered_at__isnull=True),
+                         name='notification_pending_idx'),
+        ]
+
+    def __str__(self):
+        return self.message
+
+
+class TaskChange(models.Model):
+    """
+    The latest change of each of a user's tasks, numbered by the user's change sequence.
+
+    Rows are written by database triggers on every insert, update and delete
+    of a task (see tasks/changes.py), so bulk writes and raw imports are
+    logged too. A deleted task keeps its row, flagged `deleted`, as a
+    tombstone until `compact_task_changes` removes it.
+    """
+    task = models.OneToOneField(Task, on_delete=models.DO_NOTHING, db_constraint=False, primary_key=True,
+                                related_name='+')
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False,
+                             related_name='+')
+    sequence = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
+    changed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # Backs /api/tasks/changes?since=, which reads a user's changes after a sequence number
+            models.Index(fields=['user', 'sequence'], name='task_change_user_seq_idx'),
+            # Lets compaction find old tombstones without reading live rows
+            models.Index(fields=['changed_at'], condition=models.Q(deleted=True), name='task_change_tombstone_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.task_id} @ {self.sequence}'
+
+
+class TaskChangeSequence(models.Model):
+    """
+    A user's change counter: the last sequence number handed out, and the
+    newest tombstone compaction has removed. A sync cursor older than
+    `compacted_through` may have missed deletions.
+    """
+    user = models.OneToOneField(User, on_delete=models.DO_NOTHING, db_constraint=False, primary_key=True,
+                                related_name='+')
+    sequence = models.BigIntegerField(default=0)
+    compacted_through = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.user_id}: {self.sequence}'
+
+
+class TaskImportCheckpoint(models.Model):
+    """
+    How many records of an import job have been committed.
+
+    Updated in the same transaction as each imported batch, so a resumed
+    `import_tasks` run neither skips nor duplicates rows.
+    """
+    job = models.CharField(max_length=255, unique=True)
+    records_done = models.PositiveBigIntegerField(default=0)
+    imported = models.PositiveBigIntegerField(default=0)
+    rejected = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.job}: {self.records_done} records'
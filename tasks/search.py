@@ -0,0 +1,165 @@
+# tasks/search.py
+
+import re
+from abc import ABC, abstractmethod
+
+from asgiref.sync import sync_to_async
+from django.db import connections, models
+from django.db.models.expressions import RawSQL
+
+SQLITE_TABLE = 'tasks_task_fts'
+POSTGRES_COLUMN = 'search_vector'
+POSTGRES_CONFIG = 'english'
+MAX_TERMS = 10
+
+# Postgres' 'english' configuration drops these itself; SQLite's tokenizer keeps every word, and a term
+# found in most tasks makes bm25() read its whole posting list to weigh it.
+STOP_WORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between
+both but by can did do does doing down during each few for from further had has have having he her here
+hers herself him himself his how i if in into is it its itself just me more most my myself no nor not now
+of off on once only or other our ours ourselves out over own same she should so some such than that the
+their theirs them themselves then there these they this those through to too under until up very was we
+were what when where which while who whom why will with you your yours yourself yourselves
+""".split())
+
+# bm25() column weights: the owner column only scopes the match, a title hit counts more than a description hit
+SQLITE_RANK = f'bm25("{SQLITE_TABLE}", 0.0, 10.0, 1.0)'
+
+
+def search_terms(text):
+    """
+    The words of a search, lower-cased, without stop words and duplicates, at most MAX_TERMS.
+    """
+    terms = []
+    for word in re.findall(r'\w+', text.lower()):
+        if word not in STOP_WORDS and word not in terms:
+            terms.append(word)
+    return terms[:MAX_TERMS]
+
+
+class TaskSearch(ABC):
+    """
+    Full-text search of a user's tasks on the database's inverted index.
+
+    `filter()` narrows a queryset to the tasks whose title or description
+    contain every word of the search. With `ranked`, matches are annotated
+    with `search_rank`, lower for better matches (so ascending order puts the
+    best first), which the list orders and pages by.
+    """
+
+    def filter(self, queryset, text, user_id, ranked=False):
+        terms = search_terms(text)
+        if terms:
+            return self.match(queryset, terms, user_id, ranked)
+        queryset = queryset.none()  # only stop words: nothing to look for
+        if ranked:
+            queryset = queryset.annotate(search_rank=models.Value(0.0, output_field=models.FloatField()))
+        return queryset
+
+    @abstractmethod
+    def match(self, queryset, terms, user_id, ranked):
+        pass
+
+
+class SQLiteTaskSearch(TaskSearch):
+    """
+    FTS5 index over (user_id, title, description), kept in sync by triggers.
+
+    The owner's id is part of every match, so FTS5 intersects the search
+    words' posting lists with the user's own instead of matching every
+    user's tasks first. Unranked matches are looked up by rowid; ranked ones
+    join the index to read bm25() for each match.
+
+    A migration that makes SQLite rebuild `tasks_task` (most AlterField /
+    RemoveField operations) drops its triggers along with the old table, so
+    it has to run migration 0007's trigger statements again.
+    """
+
+    def match_expression(self, terms, user_id):
+        words = ' AND '.join(f'"{term}"' for term in terms)
+        return f'user_id : "{int(user_id)}" AND {{title description}} : ({words})'
+
+    def match(self, queryset, terms, user_id, ranked):
+        match = self.match_expression(terms, user_id)
+        if not ranked:
+            return queryset.filter(id__in=RawSQL(
+                f'SELECT rowid FROM "{SQLITE_TABLE}" WHERE "{SQLITE_TABLE}" MATCH %s', (match,)
+            ))
+
+        # A join, not a per-row subquery: FTS5 evaluates the whole match again for every correlated lookup
+        return queryset.extra(
+            tables=[SQLITE_TABLE],
+            where=[f'"{SQLITE_TABLE}".rowid = "tasks_task"."id"', f'"{SQLITE_TABLE}" MATCH %s'],
+            params=[match],
+        ).annotate(search_rank=RawSQL(SQLITE_RANK, (), output_field=models.FloatField()))
+
+
+class PostgresTaskSearch(TaskSearch):
+    """
+    GIN-indexed `tsvector` column generated from the title (weight A) and description (weight B),
+    queried with `websearch_to_tsquery` and ranked with `ts_rank`.
+    """
+
+    def match(self, queryset, terms, user_id, ranked):
+        query = ' '.join(terms)
+        tsquery = 'websearch_to_tsquery(%s::regconfig, %s)'
+        queryset = queryset.filter(RawSQL(
+            f'"tasks_task"."{POSTGRES_COLUMN}" @@ {tsquery}', (POSTGRES_CONFIG, query),
+            output_field=models.BooleanField(),
+        ))
+        if ranked:
+            queryset = queryset.annotate(search_rank=RawSQL(
+                f'-ts_rank("tasks_task"."{POSTGRES_COLUMN}", {tsquery})', (POSTGRES_CONFIG, query),
+                output_field=models.FloatField(),
+            ))
+        return queryset
+
+
+class FallbackTaskSearch(TaskSearch):
+    """
+    LIKE scan of the user's tasks, for databases without an index installed by migration 0007.
+    Every match ranks the same.
+    """
+
+    def match(self, queryset, terms, user_id, ranked):
+        for term in terms:
+            queryset = queryset.filter(models.Q(title__icontains=term) | models.Q(description__icontains=term))
+        if ranked:
+            queryset = queryset.annotate(search_rank=models.Value(0.0, output_field=models.FloatField()))
+        return queryset
+
+
+_backends = {}
+
+
+def task_search(using='default'):
+    """
+    The TaskSearch for database `using`, chosen once per process from its vendor and installed index.
+    """
+    backend = _backends.get(using)
+    if backend is None:
+        connection = connections[using]
+        if connection.vendor == 'sqlite' and SQLITE_TABLE in connection.introspection.table_names():
+            backend = SQLiteTaskSearch()
+        elif connection.vendor == 'postgresql' and POSTGRES_COLUMN in postgres_columns(connection):
+            backend = PostgresTaskSearch()
+        else:
+            backend = FallbackTaskSearch()
+        _backends[using] = backend
+    return backend
+
+
+async def atask_search(using='default'):
+    """
+    `task_search()` for async views: the first lookup introspects the database, which only sync code may do.
+    """
+    backend = _backends.get(using)
+    if backend is None:
+        backend = await sync_to_async(task_search)(using)
+    return backend
+
+
+def postgres_columns(connection):
+    with connection.cursor() as cursor:
+        return {column.name for column in connection.introspection.get_table_description(cursor, 'tasks_task')}
@@ -1,14 +1,29 @@
-from datetime import timedelta
+import math
+from datetime import datetime, timedelta
 from venv import logger
 
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Value, When
 from django.utils import timezone
-from .models import Task
+from taskmanager.metrics import TimedSerializerMixin
+from .fieldsets import FIELD_COLUMNS, columns_for
+from .models import Task, TaskQuerySet
 from django.contrib.auth.models import User
 from rest_framework import serializers
 from django.utils.timezone import localtime
 import logging
 
-class TaskSerializer(serializers.ModelSerializer):
+
+# Naive: `datetime_formatter` adds the UTC offset itself
+LOCAL_EPOCH = datetime(1970, 1, 1)
+
+
+def calculate_due_at(start_at, duration_in_hours):
+    return start_at + timedelta(hours=duration_in_hours)
+
+
+class TaskSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     is_completed = serializers.BooleanField(required=False)
     prompted = serializers.BooleanField(required=False)
     status = serializers.SerializerMethodField()
@@ -25,6 +40,13 @@ class TaskSerializer(serializers.ModelSerializer):
     )
 
 
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            # Sparse fieldset (?fields= / ?exclude=): fields nobody asked for are never rendered
+            for name in [name for name in self.fields if name not in fields]:
+                self.fields.pop(name)
+
     class Meta:
         model = Task
         fields = [
@@ -62,7 +84,8 @@ class TaskSerializer(serializers.ModelSerializer):
         return self.format_datetime(obj.updated_at)
 
     def get_status(self, obj):
-        return obj.dynamic_status
+        # List querysets carry the status computed in SQL (TaskQuerySet.with_status)
+        return getattr(obj, 'annotated_status', None) or obj.dynamic_status
 
     def validate_is_completed(self, value):
         return value if value is not None else False
@@ -76,6 +99,12 @@ class TaskSerializer(serializers.ModelSerializer):
         return value
 
     def create(self, validated_data):
+        return super().create(self.get_create_data(validated_data))
+
+    async def acreate(self, validated_data):
+        return await Task.objects.acreate(**self.get_create_data(validated_data))
+
+    def get_create_data(self, validated_data):
         user = self.context['request'].user
         start_at = validated_data.get('start_at')
         duration = validated_data.get('duration_in_hours')
@@ -88,17 +117,39 @@ class TaskSerializer(serializers.ModelSerializer):
                 'duration_in_hours': "Duration must be a positive integer."
             })
 
-        validated_data['due_at'] = start_at + timedelta(hours=duration)
+        validated_data['due_at'] = calculate_due_at(start_at, duration)
         validated_data['user'] = user
-        return super().create(validated_data)
+        return validated_data
 
     def update(self, instance, validated_data):
+        instance.save(update_fields=self.apply_update(instance, validated_data))
+        return instance
+
+    async def aupdate(self, instance, validated_data):
+        await instance.asave(update_fields=self.apply_update(instance, validated_data))
+        return instance
+
+    async def asave(self, **kwargs):
+        """
+        Async counterpart of `save()` for the async views.
+        """
+        validated_data = {**self.validated_data, **kwargs}
+        if self.instance is not None:
+            self.instance = await self.aupdate(self.instance, validated_data)
+        else:
+            self.instance = await self.acreate(validated_data)
+        return self.instance
+
+    def apply_update(self, instance, validated_data):
+        """
+        Validate and apply `validated_data` to `instance`, returning the fields to save.
+        """
 
         request = self.context.get('request')
         user = request.user if request else None
 
         # Only the owner of the task can update it
-        if instance.user != user:
+        if user is None or instance.user_id != user.pk:
             raise serializers.ValidationError("You do not have permission to modify this task!")
 
         #logger = logging.getLogger(__name__)
@@ -127,7 +178,275 @@ class TaskSerializer(serializers.ModelSerializer):
         duration = validated_data.get('duration_in_hours', instance.duration_in_hours)
 
         if 'start_at' in validated_data or 'duration_in_hours' in validated_data:
-            validated_data['due_at'] = start_at + timedelta(hours=duration)
+            validated_data['due_at'] = calculate_due_at(start_at, duration)
+
+        # Write only the columns that changed instead of the whole row
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        return [*validated_data, 'updated_at']
+
+
+
+class TaskBulkCreateSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    """
+    Validates a list of tasks with the `TaskSerializer` rules and inserts them
+    with a single `bulk_create` inside one transaction.
+    """
+
+    def create(self, validated_data):
+        user = self.context['request'].user
+        tasks = [
+            Task(
+                user=user,
+                due_at=calculate_due_at(item['start_at'], item['duration_in_hours']),
+                **item,
+            )
+            for item in validated_data
+        ]
+        with transaction.atomic():
+            tasks = Task.objects.bulk_create(tasks)
+
+        now = timezone.now()
+        for task in tasks:
+            task.annotated_status = task.status_at(now)
+        return tasks
+
+    def item_errors(self):
+        """
+        Per-item errors as `[{"index": 2, "errors": {...}}]`, skipping valid items.
+        """
+        errors = self.errors
+        if isinstance(errors, dict):
+            return [{'index': None, 'errors': errors}]
+        return [
+            {'index': index, 'errors': item}
+            for index, item in enumerate(errors)
+            if item
+        ]
+
+
+class TaskChangeSetSerializer(TaskSerializer):
+    """
+    The fields a bulk update may change, validated with the `TaskSerializer` rules.
+    """
+
+    status = completed_at = due_at = created_at = updated_at = prompted = None
+
+    class Meta(TaskSerializer.Meta):
+        fields = ['title', 'description', 'priority', 'duration_in_hours', 'start_at', 'is_completed']
+        read_only_fields = ()
+
+
+class TaskBulkFilterSerializer(TimedSerializerMixin, serializers.Serializer):
+    status = serializers.ChoiceField(choices=TaskQuerySet.STATUSES, required=False)
+    priority = serializers.ChoiceField(choices=Task.PRIORITY_CHOICES, required=False)
+    is_completed = serializers.BooleanField(required=False)
+
+
+class TaskBulkUpdateSerializer(TimedSerializerMixin, serializers.Serializer):
+    """
+    Applies one change set to many tasks with set-based UPDATEs.
+
+    Targets are picked by `ids` or by `filter`. The single-task invariants hold:
+    completed tasks cannot be marked incomplete (their ids are rejected),
+    `completed_at` is stamped only once and `due_at` follows `start_at` and
+    `duration_in_hours`.
+    """
+
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, allow_empty=False)
+    filter = TaskBulkFilterSerializer(required=False)
+    changes = serializers.DictField()
+
+    def validate_ids(self, value):
+        if len(value) > settings.TASK_BULK_MAX_ITEMS:
+            raise serializers.ValidationError(f"At most {settings.TASK_BULK_MAX_ITEMS} ids are allowed.")
+        return list(dict.fromkeys(value))
+
+    def validate_changes(self, value):
+        changes = TaskChangeSetSerializer(data=value, partial=True, context=self.context)
+        changes.is_valid(raise_exception=True)
+        if not changes.validated_data:
+            raise serializers.ValidationError(
+                f"Provide at least one of: {', '.join(TaskChangeSetSerializer.Meta.fields)}."
+            )
+        return changes.validated_data
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError("Provide either 'ids' or 'filter'.")
+        return attrs
+
+    def perform(self, queryset):
+        """
+        Apply the change set to the matching tasks in `queryset` (already scoped to the user).
+        Returns `{"updated": <rows changed>, "rejected": [<ids>]}`.
+        """
+        data = self.validated_data
+        changes = dict(data['changes'])
+        now = timezone.now()
+        rejected = []
+
+        if 'ids' in data:
+            targets = queryset.filter(id__in=data['ids'])
+        else:
+            targets = queryset
+            criteria = data['filter']
+            if 'status' in criteria:
+                targets = targets.filter_status(criteria['status'], now=now)
+            if 'priority' in criteria:
+                targets = targets.filter(priority=criteria['priority'])
+            if 'is_completed' in criteria:
+                targets = targets.filter(is_completed=criteria['is_completed'])
+
+        with transaction.atomic():
+            if 'ids' in data:
+                found = set(targets.values_list('id', flat=True))
+                rejected.extend(pk for pk in data['ids'] if pk not in found)
+
+            is_completed = changes.pop('is_completed', None)
+            if is_completed is False:
+                # A completed task cannot be marked as incomplete
+                completed = list(targets.filter(is_completed=True).values_list('id', flat=True))
+                rejected.extend(completed)
+                targets = targets.filter(is_completed=False)
+            elif is_completed is True:
+                changes['is_completed'] = True
+                changes['completed_at'] = Case(
+                    When(is_completed=True, then=F('completed_at')),
+                    default=Value(now),
+                )
+
+            changes['updated_at'] = now
+            start_at = changes.get('start_at')
+            duration = changes.get('duration_in_hours')
+
+            if start_at is not None and duration is None:
+                # due_at depends on each row's own duration: one UPDATE per distinct duration
+                updated = 0
+                durations = targets.order_by().values_list('duration_in_hours', flat=True).distinct()
+                for hours in list(durations):
+                    updated += targets.filter(duration_in_hours=hours).update(
+                        due_at=calculate_due_at(start_at, hours), **changes
+                    )
+            else:
+                if start_at is not None:
+                    changes['due_at'] = calculate_due_at(start_at, duration)
+                elif duration is not None:
+                    changes['due_at'] = F('start_at') + timedelta(hours=duration)
+                updated = targets.update(**changes)
+
+        return {'updated': updated, 'rejected': rejected}
+
+
+class TaskRowListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    """
+    Renders a page of `values_list()` rows in one pass, resolving the
+    current timezone once for the whole batch.
+    """
+
+    def to_representation(self, data):
+        represent = self.child.representer(self.child.datetime_formatter())
+        return [represent(row) for row in data]
+
+
+class TaskListSerializer(TimedSerializerMixin, serializers.BaseSerializer):
+    """
+    Read-only fast path for task listings.
+
+    Works on named `values_list()` rows (see `rows()`), or on instances carrying
+    an `annotated_status`, and produces exactly the same output as `TaskSerializer`
+    ('%Y-%m-%d %H:%M:%S' in the current timezone).
+    """
+
+    columns = (
+        'id', 'user_id', 'title', 'description', 'priority', 'duration_in_hours',
+        'start_at', 'due_at', 'annotated_status', 'is_completed', 'completed_at',
+        'prompted', 'created_at', 'updated_at',
+    )
+    # The status is computed in SQL, so the row carries it instead of the columns it is derived from
+    field_columns = {**FIELD_COLUMNS, 'status': ('annotated_status',)}
+
+    renderers = {
+        'id': lambda row, fmt: row.id,
+        'user': lambda row, fmt: row.user_id,
+        'title': lambda row, fmt: row.title,
+        'description': lambda row, fmt: row.description,
+        'priority': lambda row, fmt: row.priority,
+        'duration_in_hours': lambda row, fmt: row.duration_in_hours,
+        'start_at': lambda row, fmt: fmt(row.start_at),
+        'due_at': lambda row, fmt: fmt(row.due_at),
+        'status': lambda row, fmt: row.annotated_status,
+        'is_completed': lambda row, fmt: row.is_completed,
+        'completed_at': lambda row, fmt: fmt(row.completed_at) if row.completed_at else "Not completed",
+        'prompted': lambda row, fmt: row.prompted,
+        'created_at': lambda row, fmt: fmt(row.created_at),
+        'updated_at': lambda row, fmt: fmt(row.updated_at),
+    }
+
+    class Meta:
+        list_serializer_class = TaskRowListSerializer
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.selected_fields = fields
+
+    @classmethod
+    def rows(cls, queryset, fields=None, keep=()):
+        """
+        Narrow a `with_status()` queryset to the named rows this serializer reads,
+        keeping any other annotation (such as the `priority_rank` a page is ordered by).
+
+        With `fields`, only the columns those fields are rendered from are read,
+        plus the `keep` columns (the ones a page is ordered by).
+        """
+        columns = cls.columns
+        if fields is not None:
+            columns = columns_for(fields, cls.field_columns, [name.lstrip('-') for name in keep])
+        extra = [name for name in queryset.query.annotations if name not in cls.columns and name not in columns]
+        return queryset.values_list(*columns, *extra, named=True)
+
+    def datetime_formatter(self):
+        """
+        Return a formatter bound to the current timezone.
+
+        UTC offsets are looked up once per 15-minute bucket and applied
+        arithmetically, which avoids a tz-aware `localtime()` conversion for
+        every timestamp. A bucket whose first and last second disagree holds a
+        transition (historical LMT offsets such as Paris's +00:09:21 do not
+        fall on quarter hours), so its timestamps are converted one by one.
+        """
+        tz = timezone.get_current_timezone()
+        offsets = {}
+        floor = math.floor
+
+        def bucket_offset(bucket):
+            first, last = (datetime.fromtimestamp(bucket * 900 + second, tz).utcoffset() for second in (0, 899))
+            return first.total_seconds() if first == last else None
+
+        def fmt(dt):
+            ts = dt.timestamp()
+            bucket = ts // 900
+            try:
+                offset = offsets[bucket]
+            except KeyError:
+                offset = offsets[bucket] = bucket_offset(bucket)
+            if offset is None:
+                offset = dt.astimezone(tz).utcoffset().total_seconds()
+            # Floored, not truncated: a timestamp before 1970 is negative
+            return (LOCAL_EPOCH + timedelta(seconds=floor(ts + offset))).isoformat(' ')
+
+        return fmt
+
+    def representer(self, fmt):
+        """
+        Return a function rendering one row, limited to the selected fields.
+        """
+        names = self.renderers if self.selected_fields is None else self.selected_fields
+        renderers = [(name, self.renderers[name]) for name in names]
+        return lambda row: {name: render(row, fmt) for name, render in renderers}
 
-        return super().update(instance, validated_data)
+    def represent(self, row, fmt):
+        return {name: render(row, fmt) for name, render in self.renderers.items()}
 
+    def to_representation(self, instance):
+        return self.representer(self.datetime_formatter())(instance)
@@ -0,0 +1,49 @@
+# tasks/signals.py
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import task_list_cache
+from .changes import forget_user
+from .events import TaskEvent, task_events
+from .models import Task
+from .serializers import TaskSerializer
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task_list_cache(sender, instance, **kwargs):
+    task_list_cache.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Task)
+def publish_task_saved(sender, instance, created, update_fields=None, **kwargs):
+    if not task_events.wants(instance.user_id):
+        return
+    if created:
+        kind = 'created'
+    elif update_fields and 'completed_at' in update_fields and instance.is_completed:
+        kind = 'completed'
+    else:
+        kind = 'updated'
+    task_events.publish(TaskEvent(instance.user_id, kind, instance.pk, dict(TaskSerializer(instance).data)))
+
+
+@receiver(post_delete, sender=Task)
+def publish_task_deleted(sender, instance, **kwargs):
+    if task_events.wants(instance.user_id):
+        task_events.publish(TaskEvent(instance.user_id, 'deleted', instance.pk))
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_user_task_list_cache(sender, instance, created=False, **kwargs):
+    # A new or removed account must never see a list cached under a reused id
+    if created or kwargs.get('signal') is post_delete:
+        task_list_cache.invalidate(instance.pk)
+
+
+@receiver(post_delete, sender=get_user_model())
+def forget_user_task_changes(sender, instance, **kwargs):
+    forget_user(instance.pk)
@@ -0,0 +1,144 @@
+# tasks/streams.py
+
+import asyncio
+import json
+import time
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework.exceptions import AuthenticationFailed
+
+from users.authentication import CachedJWTAuthentication
+
+from .events import closing_old_connections, task_events
+
+
+@closing_old_connections
+def current_cursor(user_id):
+    from .changes import is_supported
+    from .models import TaskChangeSequence
+
+    if not is_supported():
+        return None
+    return TaskChangeSequence.objects.filter(user_id=user_id).values_list('sequence', flat=True).first() or 0
+
+
+def frame(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'.encode('utf-8')
+
+
+class TaskEventStream:
+    """
+    ASGI application serving `GET /api/tasks/events`, a Server-Sent Events
+    stream of the authenticated user's task changes; every other request is
+    passed on to `application` (the Django application).
+
+    The stream is served here rather than by a Django view so an idle
+    connection costs one coroutine and one small queue in the event loop, and
+    a disconnect is noticed (and the subscription dropped) as soon as the
+    server reports it. It opens with a `ready` event carrying the current
+    delta sync cursor, then sends `task.created`, `task.updated`,
+    `task.completed` and `task.deleted` events (with `id:` set to the change's
+    sequence number when the broker knows it) and a comment every
+    TASK_EVENTS_HEARTBEAT seconds to keep proxies from timing it out.
+
+    A client too slow to keep up, or whose missed changes have been compacted
+    away, is sent a `reset` event instead of the events it missed: it should
+    catch up with `/api/tasks/changes?since=<cursor>` (or reload on 410 Gone).
+    EventSource cannot set headers, so the access token may be passed as
+    `?access_token=`; the stream ends when the token expires.
+    """
+
+    path = '/api/tasks/events'
+    retry_ms = 3000
+
+    def __init__(self, application, hub=task_events):
+        self.application = application
+        self.hub = hub
+        self.authentication = CachedJWTAuthentication()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] != self.path:
+            return await self.application(scope, receive, send)
+
+        if scope['method'] != 'GET':
+            return await self.reject(send, 405, "Method not allowed.", [(b'allow', b'GET')])
+        try:
+            user, token = await self.authenticate(scope)
+        except AuthenticationFailed as exc:
+            return await self.reject(send, 401, str(exc.detail), [(b'www-authenticate', b'Bearer realm="api"')])
+        await self.stream(scope, receive, send, user, token)
+
+    async def authenticate(self, scope):
+        raw_token = None
+        header = dict(scope['headers']).get(b'authorization')
+        if header is not None:
+            raw_token = self.authentication.get_raw_token(header)
+        else:
+            tokens = parse_qs(scope.get('query_string', b'').decode('latin-1')).get('access_token')
+            if tokens:
+                raw_token = tokens[0].encode('latin-1')
+        if raw_token is None:
+            raise AuthenticationFailed("Authentication credentials were not provided.")
+
+        validated_token = self.authentication.get_validated_token(raw_token)
+        user = await sync_to_async(closing_old_connections(self.authentication.get_user))(validated_token)
+        return user, validated_token
+
+    def headers(self, scope, content_type):
+        headers = [(b'content-type', content_type), (b'cache-control', b'no-cache')]
+        origin = dict(scope['headers']).get(b'origin')
+        if origin is not None and (getattr(settings, 'CORS_ALLOW_ALL_ORIGINS', False)
+                                   or origin.decode('latin-1') in getattr(settings, 'CORS_ALLOWED_ORIGINS', ())):
+            headers.append((b'access-control-allow-origin', origin))
+        return headers
+
+    async def reject(self, send, status, detail, headers):
+        body = json.dumps({'detail': detail}).encode('utf-8')
+        await send({'type': 'http.response.start', 'status': status, 'headers': [
+            (b'content-type', b'application/json'), (b'content-length', str(len(body)).encode('ascii')), *headers,
+        ]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def stream(self, scope, receive, send, user, token):
+        cursor = await sync_to_async(current_cursor)(user.pk)
+        expires_at = time.monotonic() + max(0, token['exp'] - time.time())
+        heartbeat = getattr(settings, 'TASK_EVENTS_HEARTBEAT', 15.0)
+
+        subscription = self.hub.subscribe(user.pk, cursor)
+        watcher = asyncio.get_running_loop().create_task(self.watch_disconnect(receive, subscription))
+        try:
+            await send({'type': 'http.response.start', 'status': 200, 'headers': [
+                *self.headers(scope, b'text/event-stream; charset=utf-8'),
+                (b'x-accel-buffering', b'no'),  # nginx would otherwise hold events back
+            ]})
+            await send({'type': 'http.response.body', 'more_body': True, 'body': (
+                f'retry: {self.retry_ms}\n'.encode('ascii')
+                + frame('ready', {'cursor': None if cursor is None else str(cursor)})
+            )})
+            while True:
+                remaining = expires_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                events, overflowed = await subscription.wait(min(heartbeat, remaining))
+                if subscription.closed:
+                    break
+                if overflowed:
+                    body = frame('reset', {'reason': "Events were dropped; resync from your last cursor."})
+                elif events:
+                    body = b''.join(event.encode() for event in events)
+                else:
+                    body = b': heartbeat\n\n'
+                await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+        finally:
+            disconnected = watcher.done()
+            watcher.cancel()
+            self.hub.unsubscribe(subscription)
+        if not disconnected:
+            await send({'type': 'http.response.body', 'body': b''})
+
+    async def watch_disconnect(self, receive, subscription):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        subscription.close()
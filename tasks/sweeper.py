@@ -0,0 +1,88 @@
+# tasks/sweeper.py
+
+import time
+
+from django.db import OperationalError, connection, transaction
+from django.utils import timezone
+
+from .cache import task_list_cache
+from .models import Task, TaskNotification
+
+
+class OverdueSweeper:
+    """
+    Finds overdue, incomplete tasks that have not been prompted yet, flips
+    `prompted` and writes one outbox notification per task.
+
+    Work is claimed in batches of `batch_size` through the partial
+    `task_unprompted_due_idx` index. Claimed rows stop matching the predicate,
+    so every batch is a fresh `LIMIT` query and memory stays constant.
+
+    Several sweepers may run at once. On databases with `SELECT ... FOR UPDATE
+    SKIP LOCKED` each one claims different rows. SQLite has no row locks but
+    serializes writers: a sweeper whose read went stale fails with
+    "database is locked" and retries the batch.
+    """
+
+    max_retries = 5
+
+    def __init__(self, batch_size=500):
+        self.batch_size = batch_size
+
+    def run(self, max_batches=None):
+        """
+        Sweep until nothing is left (or `max_batches` is reached).
+        Returns `{"claimed": n, "batches": n, "seconds": s}`.
+        """
+        started = time.perf_counter()
+        now = timezone.now()
+        claimed = batches = 0
+        while max_batches is None or batches < max_batches:
+            count = self.claim_batch(now)
+            if not count:
+                break
+            claimed += count
+            batches += 1
+            if count < self.batch_size:
+                break
+        return {'claimed': claimed, 'batches': batches, 'seconds': time.perf_counter() - started}
+
+    def claim_batch(self, now):
+        for attempt in range(self.max_retries):
+            try:
+                return self._claim_batch(now)
+            except OperationalError as exc:
+                if connection.vendor != 'sqlite' or 'locked' not in str(exc) or attempt == self.max_retries - 1:
+                    raise
+                time.sleep(0.05 * (attempt + 1))
+        return 0
+
+    def _claim_batch(self, now):
+        candidates = (
+            Task.objects
+            .filter(is_completed=False, prompted=False, due_at__lt=now)
+            .order_by('due_at', 'id')
+        )
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+
+        with transaction.atomic():
+            rows = list(candidates.values_list('id', 'user_id', 'title')[:self.batch_size])
+            if not rows:
+                return 0
+
+            Task.objects.filter(id__in=[row[0] for row in rows]).update(prompted=True, updated_at=now)
+            TaskNotification.objects.bulk_create([
+                TaskNotification(
+                    task_id=task_id,
+                    user_id=user_id,
+                    kind='overdue',
+                    message=f'"{title[:190]}" is overdue.',
+                    created_at=now,
+                )
+                for task_id, user_id, title in rows
+            ])
+
+        for user_id in {row[1] for row in rows}:
+            task_list_cache.invalidate(user_id)
+        return len(rows)
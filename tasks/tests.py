@@ -1,17 +1,51 @@
 # Create your tests here.
 # tests/tests.py
-from django.test import TestCase
+from django.test import TestCase, override_settings, tag
 from django.urls import reverse
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
+import json
+import os
 from datetime import timedelta
+from unittest import skipUnless
 from django.utils import timezone
 from rest_framework.test import APITestCase, APIClient
 from django.contrib.auth import get_user_model
-from tasks.models import Task
+from tasks.models import Task, TaskQuerySet
 
 User = get_user_model()
 
+
+def slow(test):
+    """
+    Tag a minutes-long test and skip it unless RUN_SLOW_TESTS is set.
+    """
+    return tag('slow')(skipUnless(os.environ.get('RUN_SLOW_TESTS'), "set RUN_SLOW_TESTS=1 to run")(test))
+
+
+def page_query_plan(testcase, url):
+    """
+    SQLite EXPLAIN QUERY PLAN of the page query a list request runs, with its real parameters.
+    """
+    from django.db import connection
+
+    page_queries = []
+
+    def capture(execute, sql, params, many, context):
+        if 'ORDER BY' in sql and 'LIMIT' in sql:
+            page_queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(capture):
+        testcase.assertEqual(testcase.client.get(url).status_code, 200)
+    testcase.assertEqual(len(page_queries), 1, url)
+
+    sql, params = page_queries[0]
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+
+
 class TaskCompletionTestCase(APITestCase):
     def setUp(self):
         self.user = User.objects.create_user(username='olajide', password='testpass123')
@@ -60,3 +94,2023 @@ class TaskCompletionTestCase(APITestCase):
         self.assertIn('A completed task cannot be marked as incomplete.', str(response.data))
 
 
+class TaskListPaginationTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='paginator', password='testpass123')
+        self.client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+
+        base = timezone.now() + timedelta(days=1)
+        # Pairs of tasks share a start time so the id tie-breaker is exercised
+        self.tasks = Task.objects.bulk_create([
+            Task(
+                user=self.user,
+                title=f'Task {i}',
+                description='Paged',
+                start_at=base + timedelta(hours=i // 2),
+                due_at=base + timedelta(hours=i // 2 + 1),
+            )
+            for i in range(25)
+        ])
+        self.expected_ids = list(
+            Task.objects.filter(user=self.user).order_by('start_at', 'id').values_list('id', flat=True)
+        )
+
+    def _walk(self, url):
+        ids, responses = [], []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            responses.append(response)
+            ids.extend(task['id'] for task in response.data['data'])
+            url = response.data['next']
+        return ids, responses
+
+    def test_pages_follow_start_at_then_id_order(self):
+        ids, responses = self._walk('/api/tasks/?page_size=10')
+
+        self.assertEqual(ids, self.expected_ids)
+        self.assertEqual([len(r.data['data']) for r in responses], [10, 10, 5])
+        self.assertIsNone(responses[0].data['previous'])
+        self.assertIsNone(responses[-1].data['next'])
+
+    def test_previous_link_returns_the_preceding_page(self):
+        first = self.client.get('/api/tasks/?page_size=10')
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+
+        self.assertEqual(
+            [t['id'] for t in back.data['data']],
+            [t['id'] for t in first.data['data']],
+        )
+        self.assertIsNone(back.data['previous'])
+        self.assertIsNotNone(back.data['next'])
+
+    def test_page_size_is_capped(self):
+        with self.settings(TASK_LIST_MAX_PAGE_SIZE=7):
+            response = self.client.get('/api/tasks/?page_size=1000')
+        self.assertEqual(len(response.data['data']), 7)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get('/api/tasks/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_values_of_the_wrong_type_are_rejected(self):
+        import base64
+
+        def cursor(position):
+            payload = json.dumps({'p': position, 'r': 0}).encode('ascii')
+            return base64.urlsafe_b64encode(payload).decode('ascii')
+
+        for query, position in [
+            ('ordering=priority', ['abc', 1]),
+            ('ordering=priority', [True, 1]),
+            ('q=task&ordering=relevance', ['abc', 1]),
+            ('ordering=start_at', [{}, 1]),
+            ('ordering=start_at', ['2026-01-01T00:00:00Z', 'x']),
+            ('ordering=start_at', ['2026-01-01T00:00:00', 1]),  # naive
+            ('ordering=start_at', ['2026-02-30T00:00:00Z', 1]),
+            ('ordering=due_at', [None, 1]),
+        ]:
+            response = self.client.get(f'/api/tasks/?{query}&cursor={cursor(position)}')
+            self.assertEqual(response.status_code, 404, (query, position))
+            self.assertEqual(response.data['detail'], 'Invalid cursor')
+
+        response = self.client.get(f'/api/tasks/?ordering=priority&cursor={cursor([2, 1])}')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(TASK_LIST_CACHE_TIMEOUT=0, AUTH_USER_CACHE_TTL=300)
+    def test_every_page_costs_the_same_number_of_queries(self):
+        first = self.client.get('/api/tasks/?page_size=5')
+        url = first.data['next']
+        for _ in range(3):
+            url = self.client.get(url).data['next']
+
+        # The ETag fingerprint, then the page itself. No COUNT, no OFFSET.
+        with self.assertNumQueries(2):
+            self.client.get('/api/tasks/?page_size=5')
+        with self.assertNumQueries(2):
+            self.client.get(url)
+
+    def test_page_query_uses_composite_index(self):
+        from django.db import connection
+        from tasks.pagination import TaskCursorPagination
+
+        if connection.vendor != 'sqlite':
+            self.skipTest('Query plan assertion is written against SQLite EXPLAIN QUERY PLAN output.')
+
+        pagination = TaskCursorPagination()
+        pagination.ordering = ('start_at', 'id')
+        cursor_task = Task.objects.get(pk=self.expected_ids[10])
+        queryset = (
+            Task.objects.filter(user=self.user)
+            .filter(pagination._after([cursor_task.start_at.isoformat(), cursor_task.id], reverse=False))
+            .order_by('start_at', 'id')[:11]
+        )
+        plan = queryset.explain()
+
+        self.assertIn('task_user_start_id_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+class TaskStatusTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='statuses', password='testpass123')
+        self.client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+        self.now = timezone.now()
+
+    def _task(self, start_offset, due_offset, **kwargs):
+        return Task.objects.create(
+            user=self.user,
+            title='Status',
+            description='Status',
+            start_at=self.now + start_offset,
+            due_at=self.now + due_offset,
+            **kwargs,
+        )
+
+    def test_sql_status_matches_python_status(self):
+        hour = timedelta(hours=1)
+        zero = timedelta(0)
+        self._task(-hour, hour, is_completed=True, completed_at=self.now)
+        self._task(-2 * hour, -hour, is_completed=True, completed_at=self.now)
+        self._task(-2 * hour, -hour)           # overdue
+        self._task(-hour, hour)                # in progress
+        self._task(zero, hour)                 # starts exactly now
+        self._task(-hour, zero)                # due exactly now
+        self._task(hour, 2 * hour)             # pending
+        self._task(hour, -hour)                # inconsistent window, falls back
+
+        annotated = Task.objects.filter(user=self.user).with_status(self.now)
+        self.assertEqual(annotated.count(), 8)
+        for task in annotated:
+            self.assertEqual(task.annotated_status, task.status_at(self.now), task.pk)
+
+        for status_name in TaskQuerySet.STATUSES:
+            filtered = set(Task.objects.filter_status(status_name, now=self.now).values_list('id', flat=True))
+            expected = {t.pk for t in annotated if t.status_at(self.now) == status_name}
+            self.assertEqual(filtered, expected, status_name)
+
+    def test_list_filters_by_status(self):
+        overdue = self._task(-timedelta(hours=3), -timedelta(hours=1))
+        self._task(timedelta(hours=1), timedelta(hours=2))
+
+        response = self.client.get('/api/tasks/?status=overdue')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t['id'] for t in response.data['data']], [overdue.id])
+        self.assertEqual(response.data['data'][0]['status'], 'overdue')
+
+    def test_unknown_status_is_rejected(self):
+        response = self.client.get('/api/tasks/?status=late')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('status', response.data)
+
+    def test_status_filter_uses_index(self):
+        from django.db import connection
+
+        if connection.vendor != 'sqlite':
+            self.skipTest('Query plan assertion is written against SQLite EXPLAIN QUERY PLAN output.')
+
+        plan = Task.objects.filter(user=self.user).filter_status('overdue', now=self.now).explain()
+        self.assertIn('task_open_user_due_idx', plan)
+
+@override_settings(TASK_LIST_CACHE_TIMEOUT=0)
+class TaskListFilterOrderingTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='sorter', password='testpass123')
+        self.client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+
+        self.base = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        priorities = ['low', 'high', 'medium']
+        Task.objects.bulk_create([
+            Task(
+                user=self.user,
+                title=f'Task {i}',
+                description='Sorted',
+                priority=priorities[i % 3],
+                start_at=self.base + timedelta(hours=i % 7),
+                due_at=self.base + timedelta(hours=i % 7 + 1 + i % 4),
+                is_completed=i % 5 == 0,
+                created_at=self.base - timedelta(minutes=i % 6),
+            )
+            for i in range(30)
+        ])
+        self.tasks = list(Task.objects.filter(user=self.user))
+
+    def _walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.data)
+            ids.extend(task['id'] for task in response.data['data'])
+            url = response.data['next']
+        return ids
+
+    def _iso(self, hours):
+        return (self.base + timedelta(hours=hours)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    def test_every_ordering_pages_through_all_rows(self):
+        from tasks.models import PriorityRank
+
+        keys = {
+            'start_at': lambda t: t.start_at,
+            'due_at': lambda t: t.due_at,
+            'created_at': lambda t: t.created_at,
+            'priority': lambda t: PriorityRank.RANKS[t.priority],
+        }
+        for name, key in keys.items():
+            for descending in (False, True):
+                expected = [t.id for t in sorted(self.tasks, key=lambda t: (key(t), t.id), reverse=descending)]
+                ordering = f"{'-' if descending else ''}{name}"
+                self.assertEqual(self._walk(f'/api/tasks/?ordering={ordering}&page_size=4'), expected, ordering)
+
+    def test_previous_link_follows_the_priority_ordering(self):
+        first = self.client.get('/api/tasks/?ordering=-priority&page_size=7')
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+
+        self.assertEqual([t['id'] for t in back.data['data']], [t['id'] for t in first.data['data']])
+        self.assertEqual([t['priority'] for t in first.data['data']], ['high'] * 7)
+
+    def test_filters_combine(self):
+        url = (f'/api/tasks/?priority=high,low&is_completed=false'
+               f'&start_at_after={self._iso(2)}&due_at_before={self._iso(8)}')
+        expected = [
+            t.id for t in sorted(self.tasks, key=lambda t: (t.start_at, t.id))
+            if t.priority in ('high', 'low') and not t.is_completed
+            and t.start_at >= self.base + timedelta(hours=2) and t.due_at <= self.base + timedelta(hours=8)
+        ]
+
+        self.assertTrue(expected)
+        self.assertEqual(self._walk(url + '&page_size=3'), expected)
+
+        completed = self._walk('/api/tasks/?is_completed=true')
+        self.assertEqual(sorted(completed), sorted(t.id for t in self.tasks if t.is_completed))
+
+    def test_export_accepts_the_same_filters_and_ordering(self):
+        response = self.client.get('/api/tasks/export?priority=medium&ordering=-due_at')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+        expected = [t.id for t in sorted(self.tasks, key=lambda t: (t.due_at, t.id), reverse=True)
+                    if t.priority == 'medium']
+        self.assertEqual([row['id'] for row in rows], expected)
+
+    def test_invalid_values_are_rejected(self):
+        for query, field in [
+            ('ordering=title', 'ordering'),
+            ('ordering=--priority', 'ordering'),
+            ('priority=urgent', 'priority'),
+            ('priority=high,', None),
+            ('is_completed=maybe', 'is_completed'),
+            ('due_at_after=tomorrow', 'due_at_after'),
+            (f'start_at_after={self._iso(5)}&start_at_before={self._iso(1)}', 'start_at_before'),
+        ]:
+            response = self.client.get(f'/api/tasks/?{query}')
+            if field is None:
+                self.assertEqual(response.status_code, 200, query)
+                continue
+            self.assertEqual(response.status_code, 400, query)
+            self.assertIn(field, response.data, query)
+
+    def test_list_queries_use_indexes(self):
+        from django.db import connection
+
+        if connection.vendor != 'sqlite':
+            self.skipTest('Query plan assertion is written against SQLite EXPLAIN QUERY PLAN output.')
+
+        second_page = self.client.get('/api/tasks/?ordering=-priority&page_size=5').data['next']
+        for url, index in [
+            ('/api/tasks/?ordering=priority', 'task_user_priority_rank_idx'),
+            (second_page, 'task_user_priority_rank_idx'),
+            ('/api/tasks/?ordering=-due_at', 'task_user_due_id_idx'),
+            (f'/api/tasks/?ordering=due_at&due_at_after={self._iso(3)}', 'task_user_due_id_idx'),
+            ('/api/tasks/?ordering=created_at', 'task_user_created_id_idx'),
+            ('/api/tasks/?priority=high', 'task_user_priority_start_idx'),
+            (f'/api/tasks/?start_at_after={self._iso(1)}&start_at_before={self._iso(4)}',
+             'task_user_start_id_idx'),
+        ]:
+            plan = page_query_plan(self, url)
+            self.assertIn(index, plan, url)
+            self.assertNotIn('TEMP B-TREE', plan, url)
+
+
+@override_settings(TASK_LIST_CACHE_TIMEOUT=0)
+class TaskSearchTestCase(APITestCase):
+    def setUp(self):
+        from tasks import search
+        search._backends.clear()  # resolved again by the first search, as in a new process
+        self.user = User.objects.create_user(username='searcher', password='testpass123')
+        self.client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+
+        self.start = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        self.tasks = {
+            key: Task.objects.create(user=self.user, title=title, description=description,
+                                     priority=priority, start_at=self.start + timedelta(hours=hours),
+                                     due_at=self.start + timedelta(hours=hours + 1))
+            for key, title, description, priority, hours in [
+                ('title', 'Quarterly invoice review', 'Check the numbers', 'low', 3),
+                ('description', 'Finance', 'Send the invoice to the client', 'high', 1),
+                ('both', 'Invoice reminder', 'Chase the unpaid invoices', 'medium', 2),
+                ('other', 'Groceries', 'Milk and bread', 'high', 0),
+            ]
+        }
+        other = User.objects.create_user(username='stranger', password='testpass123')
+        Task.objects.create(user=other, title='Invoice for someone else', start_at=self.start,
+                            due_at=self.start + timedelta(hours=1))
+
+    def _ids(self, query):
+        response = self.client.get(f'/api/tasks/?{query}')
+        self.assertEqual(response.status_code, 200, response.data)
+        return [task['id'] for task in response.data['data']]
+
+    def _keys(self, query):
+        by_id = {task.id: key for key, task in self.tasks.items()}
+        return [by_id[task_id] for task_id in self._ids(query)]
+
+    def test_search_ranks_the_users_matches_title_first(self):
+        keys = self._keys('q=invoice')
+        self.assertEqual(set(keys), {'title', 'description', 'both'})
+        self.assertEqual(keys[-1], 'description')
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self._keys('q=invoice+client'), ['description'])
+        self.assertEqual(self._keys('q=INVOICES+unpaid'), ['both'])  # case and stemming
+        self.assertEqual(self._keys('q=invoice+missing'), [])
+
+    def test_stop_words_alone_match_nothing(self):
+        self.assertEqual(self._keys('q=the+and'), [])
+        self.assertEqual(self._keys('q=the+and&ordering=relevance'), [])
+
+    def test_search_combines_with_filters_and_orderings(self):
+        self.assertEqual(set(self._keys('q=invoice&priority=low,medium')), {'title', 'both'})
+        self.assertEqual(self._keys('q=invoice&ordering=start_at'), ['description', 'both', 'title'])
+        self.assertEqual(self._keys('q=invoice&ordering=-start_at'), ['title', 'both', 'description'])
+
+    def test_relevance_ordering_needs_a_search(self):
+        response = self.client.get('/api/tasks/?ordering=relevance')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ordering', response.data)
+
+    def test_relevance_pages_walk_every_match_once(self):
+        for i in range(7):
+            Task.objects.create(user=self.user, title=f'Invoice batch {i}', description='invoice ' * (i % 3),
+                                start_at=self.start, due_at=self.start + timedelta(hours=1))
+        expected = self._ids('q=invoice&page_size=100')
+
+        ids, url = [], '/api/tasks/?q=invoice&page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.data)
+            ids.extend(task['id'] for task in response.data['data'])
+            url = response.data['next']
+        self.assertEqual(ids, expected)
+        self.assertEqual(len(ids), 10)
+
+        first = self.client.get('/api/tasks/?q=invoice&page_size=3').data
+        second = self.client.get(first['next']).data
+        previous = self.client.get(second['previous']).data
+        self.assertEqual([task['id'] for task in previous['data']], expected[:3])
+
+    def test_index_follows_every_kind_of_write(self):
+        task = self.tasks['other']
+        self.assertEqual(self._keys('q=groceries'), ['other'])
+
+        self.client.patch(f'/api/tasks/{task.id}', {'title': 'Market run'}, format='json')
+        self.assertEqual(self._keys('q=groceries'), [])
+        self.assertEqual(self._keys('q=market'), ['other'])
+
+        Task.objects.filter(id=task.id).update(description='Pick up parcels')
+        self.assertEqual(self._keys('q=milk'), [])
+        self.assertEqual(self._keys('q=parcels'), ['other'])
+
+        response = self.client.post('/api/tasks/', {
+            'title': 'Parcel locker code', 'description': '', 'priority': 'low', 'start_at': self.start.strftime('%Y-%m-%dT%H:%M:%S'),
+            'duration_in_hours': 1,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(self._ids('q=parcel')), 2)
+
+        self.client.delete(f'/api/tasks/{task.id}')
+        self.assertEqual(self._keys('q=market'), [])
+
+        Task.objects.filter(id=self.tasks['title'].id).update(is_completed=True)
+        self.assertIn('title', self._keys('q=quarterly'))
+
+    def test_fallback_matches_like_the_index(self):
+        from tasks.search import FallbackTaskSearch, task_search
+
+        queryset = Task.objects.filter(user=self.user)
+        for text in ('invoice', 'invoice client', 'unpaid', 'the', 'milk bread'):
+            indexed = set(task_search().filter(queryset, text, self.user.id).values_list('id', flat=True))
+            scanned = set(FallbackTaskSearch().filter(queryset, text, self.user.id).values_list('id', flat=True))
+            self.assertEqual(indexed, scanned, text)
+
+    def test_search_queries_use_the_full_text_index(self):
+        from django.db import connection
+        from tasks.search import SQLITE_TABLE, SQLiteTaskSearch, task_search
+
+        if connection.vendor != 'sqlite':
+            self.skipTest('Query plan assertion is written against SQLite EXPLAIN QUERY PLAN output.')
+        self.assertIsInstance(task_search(), SQLiteTaskSearch)
+
+        # Ranked: the matches drive the join, each one fetched by primary key and sorted by bm25()
+        plan = page_query_plan(self, '/api/tasks/?q=invoice')
+        self.assertIn(f'SCAN {SQLITE_TABLE} VIRTUAL TABLE INDEX', plan)
+        self.assertIn('SEARCH tasks_task USING INTEGER PRIMARY KEY', plan)
+
+        # Unranked: the matches are looked up once and the page is read in index order
+        plan = page_query_plan(self, '/api/tasks/?q=invoice&ordering=start_at')
+        self.assertIn('task_user_start_id_idx', plan)
+        self.assertIn(f'SCAN {SQLITE_TABLE} VIRTUAL TABLE INDEX', plan)
+        self.assertNotIn('CORRELATED', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+class TaskListSerializerTestCase(APITestCase):
+    def test_fast_list_serializer_matches_task_serializer_byte_for_byte(self):
+        from rest_framework.renderers import JSONRenderer
+        from tasks.serializers import TaskListSerializer, TaskSerializer
+
+        user = User.objects.create_user(username='rows', password='testpass123')
+        now = timezone.now()
+        Task.objects.create(user=user, title='Open', description=None, priority='high',
+                            duration_in_hours=3, start_at=now + timedelta(hours=1),
+                            due_at=now + timedelta(hours=4))
+        Task.objects.create(user=user, title='Überfällig', description='déjà vu', priority='low',
+                            start_at=now - timedelta(days=2), due_at=now - timedelta(days=1))
+        Task.objects.create(user=user, title='Done', description='', start_at=now - timedelta(hours=1),
+                            due_at=now + timedelta(hours=1), is_completed=True, completed_at=now,
+                            prompted=True)
+
+        queryset = Task.objects.filter(user=user).with_status(now).order_by('id')
+        renderer = JSONRenderer()
+        for tz_name in ('UTC', 'Africa/Lagos'):
+            with self.subTest(tz=tz_name), timezone.override(tz_name):
+                expected = renderer.render(TaskSerializer(queryset, many=True).data)
+                actual = renderer.render(TaskListSerializer(TaskListSerializer.rows(queryset), many=True).data)
+                self.assertEqual(actual, expected)
+
+    def test_fast_list_serializer_formats_times_before_1970(self):
+        from datetime import datetime, timezone as dt_timezone
+        from tasks.serializers import TaskListSerializer, TaskSerializer
+
+        user = User.objects.create_user(username='historian', password='testpass123')
+        start_at = datetime(1969, 12, 31, 23, 59, 59, 500000, tzinfo=dt_timezone.utc)
+        Task.objects.create(user=user, title='Moon landing', start_at=start_at,
+                            due_at=start_at + timedelta(minutes=1, seconds=0.25))
+
+        queryset = Task.objects.filter(user=user).with_status(timezone.now())
+        for tz_name in ('UTC', 'Africa/Lagos'):
+            with self.subTest(tz=tz_name), timezone.override(tz_name):
+                [expected] = TaskSerializer(queryset, many=True).data
+                [actual] = TaskListSerializer(TaskListSerializer.rows(queryset), many=True).data
+                self.assertEqual((actual['start_at'], actual['due_at']), (expected['start_at'], expected['due_at']))
+        with timezone.override('UTC'):
+            [actual] = TaskListSerializer(TaskListSerializer.rows(queryset), many=True).data
+        self.assertEqual(actual['start_at'], '1969-12-31 23:59:59')
+
+    def test_fast_list_serializer_formats_times_around_lmt_transitions(self):
+        from datetime import datetime, timezone as dt_timezone
+        from tasks.serializers import TaskListSerializer, TaskSerializer
+
+        user = User.objects.create_user(username='cartographer', password='testpass123')
+        # Paris left its +00:09:21 mean time at 23:50:39 UTC, inside the 23:45 quarter hour
+        start_at = datetime(1911, 3, 10, 23, 46, tzinfo=dt_timezone.utc)
+        Task.objects.create(user=user, title='Switch clocks', start_at=start_at,
+                            due_at=start_at + timedelta(minutes=9))
+
+        queryset = Task.objects.filter(user=user).with_status(timezone.now())
+        with timezone.override('Europe/Paris'):
+            [expected] = TaskSerializer(queryset, many=True).data
+            [actual] = TaskListSerializer(TaskListSerializer.rows(queryset), many=True).data
+        self.assertEqual((actual['start_at'], actual['due_at']), (expected['start_at'], expected['due_at']))
+        self.assertEqual(actual['due_at'], '1911-03-10 23:55:00')
+
+
+@override_settings(TASK_LIST_CACHE_TIMEOUT=0)
+class TaskFieldsetTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='sparse', password='testpass123')
+        self.client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+
+        now = timezone.now().replace(microsecond=0)
+        for i in range(7):
+            Task.objects.create(user=self.user, title=f'Task {i}', description='x' * 500, priority='low',
+                                start_at=now + timedelta(hours=i - 3), due_at=now + timedelta(hours=(i * 5) % 7),
+                                is_completed=i == 2, completed_at=now if i == 2 else None)
+        self.task = Task.objects.filter(user=self.user).first()
+
+    def _select_sql(self, url):
+        from django.db import connection
+
+        statements = []
+
+        def capture(execute, sql, params, many, context):
+            if 'FROM "tasks_task"' in sql and 'COUNT' not in sql.upper() and 'MAX(' not in sql.upper():
+                statements.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            response = self.client.get(url)
+        return response, statements
+
+    def test_list_returns_and_reads_only_the_requested_fields(self):
+        full = self.client.get('/api/tasks/').data['data']
+
+        response, statements = self._select_sql('/api/tasks/?fields=id,title,status')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data'], [
+            {'id': task['id'], 'title': task['title'], 'status': task['status']} for task in full
+        ])
+        page_query = [sql for sql in statements if 'LIMIT' in sql][-1]
+        self.assertNotIn('"description"', page_query.split('FROM')[0])
+        self.assertNotIn('"created_at"', page_query.split('FROM')[0])
+
+        response = self.client.get('/api/tasks/?exclude=description,prompted')
+        expected = [{k: v for k, v in task.items() if k not in ('description', 'prompted')} for task in full]
+        self.assertEqual(response.data['data'], expected)
+
+        response = self.client.get('/api/tasks/?fields=id,title,description&exclude=description')
+        self.assertEqual(response.data['data'], [{'id': t['id'], 'title': t['title']} for t in full])
+
+    def test_pages_follow_an_ordering_that_is_not_returned(self):
+        expected = [task['id'] for task in self.client.get('/api/tasks/?ordering=-due_at').data['data']]
+
+        ids, url = [], '/api/tasks/?ordering=-due_at&fields=id&page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.data)
+            self.assertTrue(all(list(task) == ['id'] for task in response.data['data']))
+            ids.extend(task['id'] for task in response.data['data'])
+            url = response.data['next']
+        self.assertEqual(ids, expected)
+
+    def test_detail_returns_and_reads_only_the_requested_fields(self):
+        url = f'/api/tasks/{self.task.id}'
+        full = self.client.get(url)
+
+        response, statements = self._select_sql(f'{url}?fields=id,status,title')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'id': full.data['id'], 'title': full.data['title'],
+                                         'status': full.data['status']})
+        self.assertNotIn('"description"', statements[-1].split('FROM')[0])
+        self.assertNotEqual(response['ETag'], full['ETag'])
+
+        response = self.client.get(f'{url}?fields=id,status,title', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_writes_ignore_the_fieldset(self):
+        response = self.client.patch(f'/api/tasks/{self.task.id}?fields=id', {'title': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['title'], 'Renamed')
+        self.assertIn('description', response.data)
+
+    def test_unknown_fields_are_rejected(self):
+        for query, param in [
+            ('fields=id,colour', 'fields'),
+            ('exclude=colour', 'exclude'),
+            ('fields=', 'fields'),
+            ('fields=id&exclude=id', 'exclude'),
+        ]:
+            for url in ('/api/tasks/', f'/api/tasks/{self.task.id}'):
+                response = self.client.get(f'{url}?{query}')
+                self.assertEqual(response.status_code, 400, (url, query))
+                self.assertIn(param, response.data, (url, query))
+
+
+class TaskBulkCreateTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='bulk', password='testpass123')
+        self.client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+        self.start = (timezone.now() + timedelta(days=1)).replace(microsecond=0)
+
+    def _item(self, i, **overrides):
+        item = {
+            'title': f'Bulk {i}',
+            'description': 'Imported',
+            'priority': 'low',
+            'duration_in_hours': 2,
+            'start_at': self.start.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        item.update(overrides)
+        return item
+
+    def test_bulk_create_inserts_all_items_in_one_statement(self):
+        payload = [self._item(i) for i in range(50)]
+
+        # auth + SAVEPOINT/INSERT/RELEASE for the atomic bulk insert
+        with self.assertNumQueries(4):
+            response = self.client.post('/api/tasks/bulk', payload, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['data']), 50)
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 50)
+        task = Task.objects.filter(user=self.user).first()
+        self.assertEqual(task.due_at, task.start_at + timedelta(hours=2))
+
+    def test_invalid_items_are_reported_by_index_and_nothing_is_saved(self):
+        past = (timezone.now() - timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%S')
+        payload = [
+            self._item(0),
+            self._item(1, start_at=past),
+            self._item(2, duration_in_hours=0),
+        ]
+
+        response = self.client.post('/api/tasks/bulk', payload, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([e['index'] for e in response.data['errors']], [1, 2])
+        self.assertIn('Start time cannot be in the past.', str(response.data['errors'][0]['errors']))
+        self.assertIn('duration_in_hours', response.data['errors'][1]['errors'])
+        self.assertFalse(Task.objects.filter(user=self.user).exists())
+
+    def test_rejects_batches_over_the_limit(self):
+        with self.settings(TASK_BULK_MAX_ITEMS=2):
+            response = self.client.post('/api/tasks/bulk', [self._item(i) for i in range(3)], format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(response.data['errors'][0]['index'])
+
+class TaskBulkUpdateTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='bulkupdate', password='testpass123')
+        self.other = User.objects.create_user(username='someoneelse', password='testpass123')
+        self.client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+        self.now = timezone.now()
+
+    def _task(self, user=None, hours=2, **kwargs):
+        start_at = kwargs.pop('start_at', self.now + timedelta(hours=1))
+        return Task.objects.create(
+            user=user or self.user, title='Bulk', description='Bulk', duration_in_hours=hours,
+            start_at=start_at, due_at=start_at + timedelta(hours=hours), **kwargs,
+        )
+
+    def test_complete_many_stamps_completed_at_once(self):
+        earlier = self.now - timedelta(days=1)
+        done = self._task(is_completed=True, completed_at=earlier)
+        open_tasks = [self._task() for _ in range(3)]
+        foreign = self._task(user=self.other)
+
+        ids = [t.id for t in open_tasks] + [done.id, foreign.id, 999999]
+        response = self.client.patch('/api/tasks/bulk', {'ids': ids, 'changes': {'is_completed': True}},
+                                     format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 4)
+        self.assertEqual(sorted(response.data['rejected']), sorted([foreign.id, 999999]))
+        for task in open_tasks:
+            task.refresh_from_db()
+            self.assertTrue(task.is_completed)
+            self.assertIsNotNone(task.completed_at)
+        done.refresh_from_db()
+        self.assertEqual(done.completed_at, earlier)
+        foreign.refresh_from_db()
+        self.assertFalse(foreign.is_completed)
+
+    def test_cannot_uncomplete_through_bulk_update(self):
+        done = self._task(is_completed=True, completed_at=self.now)
+        pending = self._task()
+
+        response = self.client.patch('/api/tasks/bulk',
+                                     {'ids': [done.id, pending.id], 'changes': {'is_completed': False, 'priority': 'low'}},
+                                     format='json')
+
+        self.assertEqual(response.data, {'updated': 1, 'rejected': [done.id]})
+        done.refresh_from_db()
+        self.assertTrue(done.is_completed)
+        self.assertEqual(done.priority, 'medium')
+
+    def test_start_at_change_recomputes_due_at_per_duration(self):
+        short, long = self._task(hours=1), self._task(hours=5)
+        new_start = (self.now + timedelta(days=3)).replace(microsecond=0)
+
+        response = self.client.patch('/api/tasks/bulk', {
+            'ids': [short.id, long.id],
+            'changes': {'start_at': new_start.strftime('%Y-%m-%dT%H:%M:%S')},
+        }, format='json')
+
+        self.assertEqual(response.data['updated'], 2)
+        short.refresh_from_db()
+        long.refresh_from_db()
+        self.assertEqual(short.due_at, short.start_at + timedelta(hours=1))
+        self.assertEqual(long.due_at, long.start_at + timedelta(hours=5))
+
+    def test_duration_change_by_filter(self):
+        overdue = self._task(start_at=self.now - timedelta(days=2))
+        upcoming = self._task()
+
+        with self.assertNumQueries(4):  # auth + SAVEPOINT/UPDATE/RELEASE
+            response = self.client.patch('/api/tasks/bulk', {
+                'filter': {'status': 'overdue'}, 'changes': {'duration_in_hours': 72},
+            }, format='json')
+
+        self.assertEqual(response.data, {'updated': 1, 'rejected': []})
+        overdue.refresh_from_db()
+        upcoming.refresh_from_db()
+        self.assertEqual(overdue.due_at, overdue.start_at + timedelta(hours=72))
+        self.assertEqual(upcoming.duration_in_hours, 2)
+
+    def test_requires_ids_or_filter_and_valid_changes(self):
+        response = self.client.patch('/api/tasks/bulk', {'changes': {'priority': 'urgent'}}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('priority', response.data['changes'])
+
+@override_settings(TASK_LIST_CACHE_TIMEOUT=0)  # exercise the database path; see TaskListCacheTestCase
+class TaskConditionalGetTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='conditional', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)  # keeps auth out of the query counts
+        start_at = timezone.now() + timedelta(hours=1)
+        self.task = Task.objects.create(user=self.user, title='Poll me', description='Poll',
+                                        start_at=start_at, due_at=start_at + timedelta(hours=1))
+
+    def test_list_returns_304_with_a_single_query(self):
+        first = self.client.get('/api/tasks/')
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('ETag', first)
+        self.assertNotIn('Last-Modified', first)
+
+        with self.assertNumQueries(1):
+            second = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b'')
+
+    def test_list_etag_depends_on_query_variant(self):
+        plain = self.client.get('/api/tasks/')
+        filtered = self.client.get('/api/tasks/?status=pending')
+        self.assertNotEqual(plain['ETag'], filtered['ETag'])
+
+        response = self.client.get('/api/tasks/?status=pending', HTTP_IF_NONE_MATCH=plain['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_writes_and_deletes_change_the_list_etag(self):
+        etag = self.client.get('/api/tasks/')['ETag']
+
+        self.task.title = 'Renamed'
+        self.task.save()
+        after_update = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(after_update.status_code, 200)
+
+        other = Task.objects.create(user=self.user, title='Extra', description='Extra',
+                                    start_at=self.task.start_at, due_at=self.task.due_at)
+        etag = self.client.get('/api/tasks/')['ETag']
+        other.delete()
+        after_delete = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(after_delete.status_code, 200)
+
+    def test_if_modified_since_does_not_hide_a_delete(self):
+        from django.utils.http import http_date
+
+        other = Task.objects.create(user=self.user, title='Extra', description='Extra',
+                                    start_at=self.task.start_at, due_at=self.task.due_at)
+        self.client.get('/api/tasks/')
+        other.delete()
+
+        response = self.client.get('/api/tasks/', HTTP_IF_MODIFIED_SINCE=http_date())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['data']), 1)
+
+    def test_status_transition_changes_the_list_etag(self):
+        etag = self.client.get('/api/tasks/')['ETag']
+        Task.objects.filter(pk=self.task.pk).update(start_at=timezone.now() - timedelta(minutes=1))
+        # updated_at is untouched, as if time had simply passed
+        response = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_returns_304_with_a_single_query(self):
+        url = f'/api/tasks/{self.task.id}'
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+
+        with self.assertNumQueries(1):
+            second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+
+        self.client.patch(url, {'is_completed': True}, format='json')
+        third = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(third.status_code, 200)
+
+
+class TaskListCacheTestCase(APITestCase):
+    def setUp(self):
+        from tasks.cache import task_list_cache
+
+        self.cache = task_list_cache
+        self.cache.clear()
+        self.user = User.objects.create_user(username='cached', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.start_at = timezone.now() + timedelta(hours=1)
+        self.task = Task.objects.create(user=self.user, title='Cached', description='Cached',
+                                        start_at=self.start_at, due_at=self.start_at + timedelta(hours=1))
+
+    def test_repeat_reads_are_served_from_cache_after_one_check(self):
+        first = self.client.get('/api/tasks/')
+
+        with self.assertNumQueries(1):  # the fingerprint the entry is checked against
+            second = self.client.get('/api/tasks/')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+        with self.assertNumQueries(1):
+            not_modified = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 1))
+
+    def test_query_variants_are_cached_separately(self):
+        self.client.get('/api/tasks/')
+        filtered = self.client.get('/api/tasks/?status=completed')
+        self.assertEqual(filtered.json()['data'], [])
+
+    def test_writes_through_views_and_models_invalidate(self):
+        self.client.get('/api/tasks/')
+
+        self.client.patch(f'/api/tasks/{self.task.id}', {'is_completed': True}, format='json')
+        self.assertEqual(self.client.get('/api/tasks/').json()['data'][0]['status'], 'completed')
+
+        Task.objects.get(pk=self.task.pk).delete()  # e.g. from the admin
+        self.assertEqual(self.client.get('/api/tasks/').json()['data'], [])
+
+    def test_writes_this_process_did_not_see_are_not_served_stale(self):
+        self.client.get('/api/tasks/')
+        # As from another worker or a management command: no signal, no invalidation here
+        Task.objects.filter(pk=self.task.pk).update(title='Elsewhere', updated_at=timezone.now())
+
+        self.assertEqual(self.client.get('/api/tasks/').json()['data'][0]['title'], 'Elsewhere')
+
+    def test_bulk_writes_invalidate(self):
+        self.client.get('/api/tasks/')
+        self.client.patch('/api/tasks/bulk', {'ids': [self.task.id], 'changes': {'priority': 'high'}},
+                          format='json')
+        self.assertEqual(self.client.get('/api/tasks/').json()['data'][0]['priority'], 'high')
+
+    def test_invalidation_is_per_user(self):
+        other = User.objects.create_user(username='bystander', password='testpass123')
+        other_client = APIClient()
+        other_client.force_authenticate(other)
+        other_client.get('/api/tasks/')
+
+        self.task.save()
+        with self.assertNumQueries(1):
+            other_client.get('/api/tasks/')
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def test_entries_expire_before_the_next_status_transition(self):
+        from tasks.models import Task as TaskModel
+
+        fingerprint = TaskModel.objects.filter(user=self.user).fingerprint(timezone.now())
+        self.assertEqual(fingerprint['next_transition'], self.start_at)
+
+        now = self.start_at - timedelta(seconds=5)
+        self.assertAlmostEqual(self.cache.ttl(now, fingerprint['next_transition']), 5)
+        self.assertEqual(self.cache.ttl(now, None), self.cache.timeout)
+
+    @override_settings(TASK_LIST_CACHE_MAX_ENTRIES=2)
+    def test_least_recently_used_entries_are_evicted(self):
+        self.client.get('/api/tasks/?page_size=1')
+        self.client.get('/api/tasks/?page_size=2')
+        self.client.get('/api/tasks/?page_size=1')  # refresh page_size=1
+        self.client.get('/api/tasks/?page_size=3')  # evicts page_size=2
+
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+        with self.assertNumQueries(1):
+            self.client.get('/api/tasks/?page_size=1')
+        with self.assertNumQueries(2):
+            self.client.get('/api/tasks/?page_size=2')
+
+    def test_file_based_backend(self):
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': location,
+            }
+        }):
+            first = self.client.get('/api/tasks/')
+            with self.assertNumQueries(1):
+                second = self.client.get('/api/tasks/')
+            self.assertEqual(second.content, first.content)
+            self.assertEqual(self.cache.stats()['hits'], 1)
+
+class TaskDetailQueryCountTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='testpass123')
+        self.other = User.objects.create_user(username='intruder', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        start_at = timezone.now() + timedelta(hours=1)
+        self.task = Task.objects.create(user=self.user, title='Mine', description='Mine', priority='low',
+                                        duration_in_hours=1, start_at=start_at,
+                                        due_at=start_at + timedelta(hours=1))
+        self.foreign = Task.objects.create(user=self.other, title='Theirs', description='Theirs',
+                                           start_at=start_at, due_at=start_at + timedelta(hours=1))
+        self.url = f'/api/tasks/{self.task.id}'
+
+    def test_get_runs_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_put_runs_a_select_and_an_update(self):
+        payload = {
+            'title': 'Renamed', 'description': 'Mine', 'priority': 'high', 'duration_in_hours': 2,
+            'start_at': (timezone.now() + timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        with self.assertNumQueries(2):
+            response = self.client.put(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.due_at, self.task.start_at + timedelta(hours=2))
+
+    def test_patch_runs_a_select_and_an_update(self):
+        with self.assertNumQueries(2):
+            response = self.client.patch(self.url, {'priority': 'high'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.priority, 'high')
+
+    def test_delete_runs_a_select_and_a_delete(self):
+        with self.assertNumQueries(2):
+            response = self.client.delete(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Task.objects.filter(pk=self.task.pk).exists())
+
+    def test_other_users_task_is_forbidden_without_loading_it(self):
+        url = f'/api/tasks/{self.foreign.id}'
+        for method in ('get', 'put', 'patch', 'delete'):
+            with self.subTest(method=method), self.assertNumQueries(2):
+                response = getattr(self.client, method)(url, {'priority': 'high'}, format='json')
+            self.assertEqual(response.status_code, 403)
+        self.foreign.refresh_from_db()
+        self.assertEqual(self.foreign.priority, 'medium')
+
+    def test_missing_task_is_not_found(self):
+        for method in ('get', 'patch', 'delete'):
+            with self.subTest(method=method):
+                response = getattr(self.client, method)('/api/tasks/999999', format='json')
+            self.assertEqual(response.status_code, 404)
+
+class OverdueSweeperTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='sweeper', password='testpass123')
+        now = timezone.now()
+        self.overdue = [
+            Task.objects.create(user=self.user, title=f'Late {i}', description='Late',
+                                start_at=now - timedelta(days=2), due_at=now - timedelta(hours=i + 1))
+            for i in range(5)
+        ]
+        self.done = Task.objects.create(user=self.user, title='Done', description='Done', is_completed=True,
+                                        start_at=now - timedelta(days=2), due_at=now - timedelta(days=1))
+        self.upcoming = Task.objects.create(user=self.user, title='Soon', description='Soon',
+                                            start_at=now, due_at=now + timedelta(hours=1))
+
+    def test_prompts_each_overdue_task_once(self):
+        from tasks.models import TaskNotification
+        from tasks.sweeper import OverdueSweeper
+
+        result = OverdueSweeper(batch_size=2).run()
+
+        self.assertEqual((result['claimed'], result['batches']), (5, 3))
+        self.assertEqual(
+            set(Task.objects.filter(prompted=True).values_list('id', flat=True)),
+            {t.id for t in self.overdue},
+        )
+        notifications = TaskNotification.objects.filter(user=self.user, kind='overdue')
+        self.assertEqual(sorted(n.task_id for n in notifications), sorted(t.id for t in self.overdue))
+        self.assertEqual(notifications.get(task_id=self.overdue[0].id).message, '"Late 0" is overdue.')
+
+        self.assertEqual(OverdueSweeper().run()['claimed'], 0)
+        self.assertEqual(TaskNotification.objects.count(), 5)
+
+    def test_long_titles_are_shortened_inside_the_quotes(self):
+        from tasks.models import TaskNotification
+        from tasks.sweeper import OverdueSweeper
+
+        self.overdue[0].title = 'x' * 200
+        self.overdue[0].save(update_fields=['title'])
+        OverdueSweeper().run()
+
+        message = TaskNotification.objects.get(task_id=self.overdue[0].id).message
+        self.assertEqual(message, '"' + 'x' * 190 + '" is overdue.')
+
+    def test_each_batch_is_a_constant_number_of_queries(self):
+        from tasks.sweeper import OverdueSweeper
+
+        # SAVEPOINT, SELECT batch, UPDATE, INSERT outbox, RELEASE
+        with self.assertNumQueries(5):
+            OverdueSweeper(batch_size=10).claim_batch(timezone.now())
+
+    def test_candidate_query_uses_partial_index(self):
+        from django.db import connection
+
+        if connection.vendor != 'sqlite':
+            self.skipTest('Query plan assertion is written against SQLite EXPLAIN QUERY PLAN output.')
+        plan = (Task.objects.filter(is_completed=False, prompted=False, due_at__lt=timezone.now())
+                .order_by('due_at', 'id')[:500].explain())
+        self.assertIn('task_unprompted_due_idx', plan)
+
+    def test_management_command_reports_throughput(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command('sweep_overdue_tasks', '--batch-size=3', stdout=out)
+        self.assertIn('Prompted 5 overdue task(s) in 2 batch(es)', out.getvalue())
+        self.assertIn('tasks/s', out.getvalue())
+
+class TaskExportTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='exporter', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.now = timezone.now()
+
+    def _seed(self, count):
+        """
+        Insert `count` tasks for self.user in one INSERT ... SELECT statement.
+        """
+        from django.db import connection
+
+        ops = connection.ops
+        start = ops.adapt_datetimefield_value(self.now + timedelta(days=1))
+        due = ops.adapt_datetimefield_value(self.now + timedelta(days=1, hours=2))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO tasks_task (created_at, updated_at, user_id, title, description, priority,
+                                        duration_in_hours, due_at, start_at, is_completed, prompted)
+                WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < %s)
+                SELECT %s, %s, %s, 'Exported task', 'Exported in bulk', 'medium', 2, %s, %s, %s, %s FROM seq
+                """,
+                [count, start, start, self.user.pk, due, start, False, False],
+            )
+
+    def _export(self, query=''):
+        response = self.client.get('/api/tasks/export' + query)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_ndjson_rows_match_the_list_endpoint(self):
+        import json
+
+        Task.objects.create(user=self.user, title='Zürich', description=None, start_at=self.now,
+                            due_at=self.now + timedelta(hours=1))
+        Task.objects.create(user=self.user, title='Done', description='x', start_at=self.now,
+                            due_at=self.now + timedelta(hours=1), is_completed=True, completed_at=self.now)
+
+        lines = self._export().splitlines()
+
+        listed = self.client.get('/api/tasks/').json()['data']
+        self.assertEqual([json.loads(line) for line in lines], listed)
+
+    def test_csv_export_and_filters(self):
+        import csv
+
+        Task.objects.create(user=self.user, title='Late, very', description='x',
+                            start_at=self.now - timedelta(days=2), due_at=self.now - timedelta(days=1))
+        Task.objects.create(user=self.user, title='Later', description='x',
+                            start_at=self.now + timedelta(days=1), due_at=self.now + timedelta(days=2))
+
+        rows = list(csv.DictReader(self._export('?output=csv&status=overdue').splitlines()))
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['title'], 'Late, very')
+        self.assertEqual(rows[0]['status'], 'overdue')
+        self.assertEqual(rows[0]['completed_at'], 'Not completed')
+
+    def test_unknown_output_format(self):
+        response = self.client.get('/api/tasks/export?output=xml')
+        self.assertEqual(response.status_code, 400)
+
+    @slow
+    def test_peak_memory_stays_flat_for_500k_rows(self):
+        import tracemalloc
+
+        def peak_while_streaming():
+            tracemalloc.start()
+            try:
+                response = self.client.get('/api/tasks/export')
+                received = 0
+                for chunk in response.streaming_content:
+                    received += len(chunk)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            response.close()
+            return peak, received
+
+        self._seed(5_000)
+        small_peak, small_bytes = peak_while_streaming()
+
+        self._seed(495_000)
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 500_000)
+        large_peak, large_bytes = peak_while_streaming()
+
+        # 100x the rows and bytes, yet the same working set (chunk buffers only)
+        self.assertGreater(large_bytes, 90 * small_bytes)
+        self.assertLess(large_peak, small_peak * 1.5 + 1024 * 1024, (small_peak, large_peak))
+
+
+class TaskChangesTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='syncer', password='testpass123')
+        self.client = APIClient()
+        refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(refresh.access_token))
+
+        self.start = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        self.tasks = [self._create(f'Task {i}') for i in range(5)]
+        self.other = User.objects.create_user(username='bystander', password='testpass123')
+        Task.objects.create(user=self.other, title='Not mine', start_at=self.start, due_at=self.start)
+
+    def _create(self, title, user=None):
+        return Task.objects.create(user=user or self.user, title=title, description='Synced',
+                                   start_at=self.start, due_at=self.start + timedelta(hours=1))
+
+    def _sync(self, since, **params):
+        query = '&'.join(f'{key}={value}' for key, value in {'since': since, **params}.items())
+        response = self.client.get(f'/api/tasks/changes?{query}')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def _sync_all(self, since, page_size=500):
+        changed, deleted = [], []
+        while True:
+            data = self._sync(since, page_size=page_size)
+            changed.extend(task['id'] for task in data['changes'])
+            deleted.extend(data['deleted'])
+            since = data['cursor']
+            if not data['has_more']:
+                return changed, deleted, since
+
+    def test_first_sync_returns_every_task_in_change_order(self):
+        data = self._sync(0)
+        self.assertEqual([task['id'] for task in data['changes']], [task.id for task in self.tasks])
+        self.assertEqual(data['deleted'], [])
+        self.assertFalse(data['has_more'])
+
+        listed = self.client.get('/api/tasks/').data['data']
+        self.assertEqual(sorted(data['changes'], key=lambda task: task['id']),
+                         sorted(listed, key=lambda task: task['id']))
+        self.assertEqual(self._sync(data['cursor'])['changes'], [])
+
+    def test_delta_holds_only_what_changed_through_any_write_path(self):
+        from tasks.sweeper import OverdueSweeper
+
+        cursor = self._sync(0)['cursor']
+        first, second, third, fourth, fifth = self.tasks
+
+        self.client.patch(f'/api/tasks/{first.id}', {'title': 'Renamed'}, format='json')
+        self.client.patch('/api/tasks/bulk', {'ids': [second.id], 'changes': {'priority': 'high'}}, format='json')
+        self.client.delete(f'/api/tasks/{third.id}')
+        Task.objects.filter(id=fourth.id).delete()
+        created = self.client.post('/api/tasks/bulk', [{
+            'title': 'Bulk', 'description': 'New', 'priority': 'low', 'duration_in_hours': 1,
+            'start_at': self.start.strftime('%Y-%m-%dT%H:%M:%S'),
+        }], format='json').data['data'][0]['id']
+        Task.objects.filter(id=fifth.id).update(due_at=timezone.now() - timedelta(hours=1))
+        OverdueSweeper().run()  # flips fifth.prompted
+
+        # fifth changed twice but is returned once, at its latest change
+        data = self._sync(cursor)
+        self.assertEqual([task['id'] for task in data['changes']], [first.id, second.id, created, fifth.id])
+        self.assertEqual(data['changes'][0]['title'], 'Renamed')
+        self.assertEqual(data['changes'][1]['priority'], 'high')
+        self.assertTrue(data['changes'][3]['prompted'])
+        self.assertEqual(data['deleted'], [third.id, fourth.id])
+
+        self.assertEqual(self._sync(data['cursor']), {
+            'changes': [], 'deleted': [], 'cursor': data['cursor'], 'has_more': False,
+        })
+
+    def test_pages_resume_from_the_cursor(self):
+        cursor = self._sync(0)['cursor']
+        for task in self.tasks[:3]:
+            task.title += ' (edited)'
+            task.save()
+        deleted_id = self.tasks[3].id
+        self.tasks[3].delete()
+
+        changed, deleted, _ = self._sync_all(cursor, page_size=2)
+        self.assertEqual(changed, [task.id for task in self.tasks[:3]])
+        self.assertEqual(deleted, [deleted_id])
+
+    @override_settings(AUTH_USER_CACHE_TTL=300)
+    def test_sync_reads_only_the_changes(self):
+        from django.db import connection
+
+        cursor = self._sync(0)['cursor']
+        Task.objects.bulk_create([
+            Task(user=self.user, title=f'Bulk {i}', start_at=self.start, due_at=self.start) for i in range(200)
+        ])
+        cursor = self._sync_all(cursor)[2]
+        self.tasks[0].save()
+
+        # counter, change rows, changed tasks (the user comes from the token cache)
+        with self.assertNumQueries(3):
+            data = self._sync(cursor)
+        self.assertEqual([task['id'] for task in data['changes']], [self.tasks[0].id])
+
+        if connection.vendor == 'sqlite':
+            from tasks.models import TaskChange
+
+            queryset = TaskChange.objects.filter(user=self.user, sequence__gt=5).order_by('sequence')[:10]
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as db:
+                db.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                plan = ' '.join(str(row[-1]) for row in db.fetchall())
+            self.assertIn('task_change_user_seq_idx', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_each_user_has_their_own_sequence(self):
+        cursor = self._sync(0)['cursor']
+        for i in range(3):
+            self._create(f'Other {i}', user=self.other)
+        self.assertEqual(self._sync(cursor)['changes'], [])
+
+    def test_compacted_cursors_are_gone(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from tasks.models import TaskChange
+
+        old_cursor = self._sync(0)['cursor']
+        doomed = [task.id for task in self.tasks[:2]]
+        Task.objects.filter(id__in=doomed).delete()
+        cursor = self._sync(old_cursor)['cursor']
+        Task.objects.filter(id=self.tasks[2].id).delete()  # recent tombstone, kept
+
+        TaskChange.objects.filter(task_id__in=doomed).update(changed_at=timezone.now() - timedelta(days=40))
+        call_command('compact_task_changes', '--days=30', stdout=StringIO())
+
+        self.assertEqual(list(TaskChange.objects.filter(deleted=True).values_list('task_id', flat=True)),
+                         [self.tasks[2].id])
+        response = self.client.get(f'/api/tasks/changes?since={old_cursor}')
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(self._sync(cursor)['deleted'], [self.tasks[2].id])
+
+        changed, deleted, _ = self._sync_all(0)
+        self.assertEqual(changed, [task.id for task in self.tasks[3:]])
+        self.assertEqual(deleted, [self.tasks[2].id])
+
+    def test_invalid_cursors_are_rejected(self):
+        last = int(self._sync(0)['cursor'])
+        for since in ('abc', '-1', last + 1):
+            response = self.client.get(f'/api/tasks/changes?since={since}')
+            self.assertEqual(response.status_code, 400, since)
+            self.assertIn('since', response.data)
+
+    def test_deleting_the_user_forgets_their_changes(self):
+        from tasks.models import TaskChange, TaskChangeSequence
+
+        self.user.delete()
+        self.assertFalse(TaskChange.objects.filter(user_id=self.user.pk).exists())
+        self.assertFalse(TaskChangeSequence.objects.filter(user_id=self.user.pk).exists())
+        self.assertTrue(TaskChange.objects.filter(user=self.other).exists())
+
+
+class EventStreamClient:
+    """
+    Drives the ASGI event stream like a server would, collecting the frames it sends.
+    """
+
+    def __init__(self, application, path='/api/tasks/events', headers=(), query_string=b'', method='GET'):
+        import asyncio
+
+        self.scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+            'scheme': 'http', 'path': path, 'raw_path': path.encode('ascii'), 'query_string': query_string,
+            'headers': [(b'host', b'testserver'), *headers], 'server': ('testserver', 80),
+            'client': ('127.0.0.1', 0),
+        }
+        self.requested = False
+        self.disconnected = asyncio.Event()
+        self.messages = asyncio.Queue()
+        self.buffer = b''
+        self.task = asyncio.get_running_loop().create_task(application(self.scope, self.receive, self.send))
+
+    async def receive(self):
+        if not self.requested:
+            self.requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self.disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        self.messages.put_nowait(message)
+
+    async def start(self):
+        import asyncio
+
+        message = await asyncio.wait_for(self.messages.get(), 5)
+        return message['status'], dict(message['headers'])
+
+    async def frames(self, count):
+        """
+        The next `count` frames, as dicts of their fields (`event`, `data` decoded, `id`, or `comment`).
+        """
+        import asyncio
+
+        frames = []
+        while len(frames) < count:
+            if b'\n\n' not in self.buffer:
+                message = await asyncio.wait_for(self.messages.get(), 5)
+                self.buffer += message['body']
+                continue
+            raw, self.buffer = self.buffer.split(b'\n\n', 1)
+            frame = {}
+            for line in raw.decode('utf-8').split('\n'):
+                name, _, value = line.partition(': ')
+                if name == 'data':
+                    value = json.loads(value)
+                frame[name or 'comment'] = value
+            frames.append(frame)
+        return frames
+
+    async def close(self):
+        import asyncio
+
+        self.disconnected.set()
+        await asyncio.wait_for(self.task, 5)
+
+
+@override_settings(TASK_EVENTS_BROKER='tasks.events.LocalBroker', TASK_EVENTS_HEARTBEAT=60)
+class TaskEventStreamTestCase(APITestCase):
+    def setUp(self):
+        from tasks.events import task_events
+        from users.authentication import user_snapshots
+        user_snapshots.clear()
+        self.addCleanup(task_events.stop)
+        self.user = User.objects.create_user(username='watcher', password='testpass123')
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.other = User.objects.create_user(username='bystander', password='testpass123')
+        self.start = timezone.now() + timedelta(days=1)
+        self.task = Task.objects.create(user=self.user, title='Watched', description='Streamed',
+                                        start_at=self.start, due_at=self.start + timedelta(hours=1))
+
+    def _open(self, **kwargs):
+        from tasks.streams import TaskEventStream
+
+        kwargs.setdefault('headers', [(b'authorization', f'Bearer {self.token}'.encode('ascii'))])
+        return EventStreamClient(TaskEventStream(self._unexpected), **kwargs)
+
+    async def _unexpected(self, scope, receive, send):
+        self.fail(f"{scope['path']} was passed on")
+
+    async def _ready(self, stream):
+        status_code, headers = await stream.start()
+        self.assertEqual(status_code, 200)
+        self.assertEqual(headers[b'content-type'], b'text/event-stream; charset=utf-8')
+        self.assertEqual(headers[b'cache-control'], b'no-cache')
+        [ready] = await stream.frames(1)
+        self.assertEqual((ready['retry'], ready['event']), ('3000', 'ready'))
+        return ready
+
+    async def test_streams_own_task_events(self):
+        from django.test import AsyncClient
+
+        stream = self._open()
+        ready = await self._ready(stream)
+        self.assertEqual(ready['data'], {'cursor': '1'})
+
+        client, headers = AsyncClient(), {'Authorization': f'Bearer {self.token}'}
+        response = await client.post('/api/tasks/', {
+            'title': 'New', 'description': 'Pushed', 'priority': 'low', 'duration_in_hours': 1,
+            'start_at': self.start.strftime('%Y-%m-%dT%H:%M:%S'),
+        }, content_type='application/json', headers=headers)
+        created = response.json()['data']
+        await Task.objects.acreate(user=self.other, title='Not mine', start_at=self.start, due_at=self.start)
+        await client.patch(f'/api/tasks/{self.task.id}', {'title': 'Renamed'},
+                           content_type='application/json', headers=headers)
+        response = await client.patch(f'/api/tasks/{self.task.id}', {'is_completed': True},
+                                      content_type='application/json', headers=headers)
+        completed = response.json()
+        await client.delete(f'/api/tasks/{created["id"]}', headers=headers)
+
+        frames = await stream.frames(4)
+        self.assertEqual([frame['event'] for frame in frames],
+                         ['task.created', 'task.updated', 'task.completed', 'task.deleted'])
+        self.assertEqual(frames[0]['data'], created)
+        self.assertEqual(frames[1]['data']['title'], 'Renamed')
+        self.assertEqual(frames[2]['data'], completed)
+        self.assertEqual(frames[3]['data'], {'id': created['id']})
+        await stream.close()
+
+    async def test_access_token_in_query_string(self):
+        stream = self._open(headers=[], query_string=f'access_token={self.token}'.encode('ascii'))
+        await self._ready(stream)
+        await stream.close()
+
+    async def test_rejects_missing_or_invalid_token_and_other_methods(self):
+        for kwargs in ({'headers': []}, {'headers': [(b'authorization', b'Bearer not-a-token')]},
+                       {'headers': [], 'query_string': b'access_token=not-a-token'}):
+            stream = self._open(**kwargs)
+            status_code, headers = await stream.start()
+            self.assertEqual(status_code, 401, kwargs)
+            self.assertIn(b'www-authenticate', headers)
+            await stream.task
+
+        stream = self._open(method='POST')
+        self.assertEqual((await stream.start())[0], 405)
+
+    async def test_overflowing_subscriber_is_told_to_reset(self):
+        from tasks.events import TaskEvent, task_events
+
+        stream = self._open()
+        await self._ready(stream)
+        [subscription] = task_events.subscriptions[self.user.pk]
+        subscription.max_pending = 2
+        for task_id in (1, 2, 3, 4):  # the stream gets no chance to drain in between
+            task_events.dispatch(TaskEvent(self.user.pk, 'deleted', task_id))
+        [reset] = await stream.frames(1)
+        self.assertEqual(reset['event'], 'reset')
+
+        task_events.dispatch(TaskEvent(self.user.pk, 'deleted', 5, sequence=9))
+        [frame] = await stream.frames(1)
+        self.assertEqual(frame, {'id': '9', 'event': 'task.deleted', 'data': {'id': 5}})
+        await stream.close()
+
+    async def test_heartbeat_and_disconnect(self):
+        from tasks.events import task_events
+
+        with self.settings(TASK_EVENTS_HEARTBEAT=0.01):
+            stream = self._open()
+            await self._ready(stream)
+            self.assertEqual(await stream.frames(2), [{'comment': 'heartbeat'}] * 2)
+        self.assertIn(self.user.pk, task_events.subscriptions)
+        await stream.close()
+        self.assertNotIn(self.user.pk, task_events.subscriptions)
+
+    async def test_change_log_broker_sees_every_write(self):
+        from asgiref.sync import sync_to_async
+        from django.db import connection
+
+        with self.settings(TASK_EVENTS_BROKER='tasks.events.ChangeLogBroker', TASK_EVENTS_POLL_INTERVAL=0.01):
+            stream = self._open()
+            await self._ready(stream)
+            # Writes that send no signals: a queryset update and a raw delete
+            await Task.objects.filter(pk=self.task.pk).aupdate(title='Bulk edited')
+            [frame] = await stream.frames(1)
+            self.assertEqual((frame['id'], frame['event'], frame['data']['title']),
+                             ('2', 'task.updated', 'Bulk edited'))
+
+            def delete():
+                with connection.cursor() as cursor:
+                    cursor.execute('DELETE FROM tasks_task WHERE id = %s', [self.task.pk])
+            await sync_to_async(delete)()
+            created = await Task.objects.acreate(user=self.user, title='Later', start_at=self.start,
+                                                 due_at=self.start)
+            await Task.objects.acreate(user=self.other, title='Not mine', start_at=self.start, due_at=self.start)
+            frames = await stream.frames(2)
+            self.assertEqual([(frame['id'], frame['event'], frame['data']['id']) for frame in frames],
+                             [('3', 'task.deleted', self.task.pk), ('4', 'task.created', created.pk)])
+            await stream.close()
+
+    async def test_change_log_broker_resets_streams_behind_compaction(self):
+        from asgiref.sync import sync_to_async
+        from django.db import transaction
+        from tasks.models import TaskChangeSequence
+
+        def edit_and_compact():
+            with transaction.atomic():  # the broker sees both edits and the compaction at once
+                Task.objects.filter(pk=self.task.pk).update(title='Edited')
+                Task.objects.filter(pk=self.task.pk).update(title='Edited again')
+                TaskChangeSequence.objects.filter(user_id=self.user.pk).update(compacted_through=3)
+
+        with self.settings(TASK_EVENTS_BROKER='tasks.events.ChangeLogBroker', TASK_EVENTS_POLL_INTERVAL=0.01):
+            stream = self._open()
+            ready = await self._ready(stream)
+            self.assertEqual(ready['data'], {'cursor': '1'})
+            await sync_to_async(edit_and_compact)()
+            [reset] = await stream.frames(1)
+            self.assertEqual(reset['event'], 'reset')
+
+            # Followed from the current sequence number on, not reset again on every poll
+            await Task.objects.filter(pk=self.task.pk).aupdate(title='After the reset')
+            [frame] = await stream.frames(1)
+            self.assertEqual((frame['id'], frame['event'], frame['data']['title']),
+                             ('4', 'task.updated', 'After the reset'))
+            await stream.close()
+
+    def test_change_log_poll_replaces_a_broken_connection(self):
+        from unittest import mock
+        from django.db import OperationalError, connection
+        from tasks.events import ChangeLogBroker
+
+        class Link:
+            # The poller's connection as Django's housekeeping sees it: dropped by the server while idle
+            in_atomic_block = False
+            broken = True
+            checks = 0
+
+            def close_if_unusable_or_obsolete(self):
+                self.checks += 1
+                self.broken = False  # closed; the next query reconnects
+
+        link = Link()
+
+        def server(execute, sql, params, many, context):
+            if link.broken:
+                raise OperationalError('server closed the connection unexpectedly')
+            return execute(sql, params, many, context)
+
+        Task.objects.filter(pk=self.task.pk).update(title='Edited')
+        with mock.patch('tasks.events.connections.all', return_value=[link]), connection.execute_wrapper(server):
+            events, resets = ChangeLogBroker().poll({self.user.pk: 1}, {}, timezone.now())
+
+        self.assertEqual([(event.type, event.task['title']) for event in events], [('updated', 'Edited')])
+        self.assertEqual(resets, [])
+        self.assertEqual(link.checks, 2)  # before and after the poll
+
+    async def test_other_requests_are_passed_on(self):
+        from tasks.streams import TaskEventStream
+
+        seen = []
+
+        async def application(scope, receive, send):
+            seen.append(scope['path'])
+
+        await TaskEventStream(application)({'type': 'http', 'path': '/api/tasks/'}, None, None)
+        await TaskEventStream(application)({'type': 'lifespan', 'path': '/api/tasks/events'}, None, None)
+        self.assertEqual(seen, ['/api/tasks/', '/api/tasks/events'])
+
+    def test_asgi_application_serves_the_stream(self):
+        from django.core.handlers.asgi import ASGIHandler
+        from taskmanager.asgi import application
+        from tasks.streams import TaskEventStream
+
+        self.assertIsInstance(application, TaskEventStream)
+        self.assertIsInstance(application.application, ASGIHandler)
+
+
+class ImportTasksCommandTestCase(APITestCase):
+    def setUp(self):
+        import tempfile
+        self.user = User.objects.create_user(username='importer', email='Importer@example.com', password='testpass123')
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.start = (timezone.localtime() + timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%S')
+
+    def write(self, name, lines):
+        import os
+        path = os.path.join(self.dir.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        return path
+
+    def call(self, *args):
+        from io import StringIO
+        from django.core.management import call_command
+        out = StringIO()
+        call_command('import_tasks', *args, stdout=out)
+        return out.getvalue()
+
+    def test_csv_rows_are_validated_like_the_serializer(self):
+        path = self.write('tasks.csv', [
+            'user_email,title,description,priority,duration_in_hours,start_at,is_completed',
+            f'importer@example.com,Ok,Desc,high,3,{self.start},false',
+            f'importer@example.com,Bad priority,Desc,Urgent,3,{self.start},',
+            f'importer@example.com,Bad duration,Desc,low,0,{self.start},',
+            'importer@example.com,Past,Desc,low,1,2000-01-01T00:00:00,',
+            f'nobody@example.com,Unknown user,Desc,low,1,{self.start},',
+        ])
+        errors = self.write('errors.ndjson', [])
+
+        output = self.call(path, '--batch-size', '2', '--errors', errors)
+
+        task = Task.objects.get()
+        self.assertEqual((task.title, task.user_id, task.priority), ('Ok', self.user.id, 'high'))
+        self.assertEqual(task.due_at - task.start_at, timedelta(hours=3))
+        self.assertIn('rows/s', output)
+        with open(errors) as f:
+            rejected = [json.loads(line) for line in f if line.strip()]
+        self.assertEqual([r['record'] for r in rejected], [2, 3, 4, 5])
+        self.assertEqual(rejected[0]['errors']['priority'], ['"Urgent" is not a valid choice.'])
+        self.assertEqual(rejected[2]['errors']['start_at'], ['Start time cannot be in the past.'])
+
+    def test_allow_past_start(self):
+        path = self.write('tasks.ndjson', [json.dumps({
+            'user_email': 'importer@example.com', 'title': 'Old', 'description': '',
+            'priority': 'low', 'duration_in_hours': 2, 'start_at': '2000-01-01T00:00:00', 'is_completed': True,
+        })])
+
+        self.call(path, '--allow-past-start')
+
+        task = Task.objects.get()
+        self.assertTrue(task.is_completed)
+        self.assertIsNotNone(task.completed_at)
+
+    def test_resumes_from_checkpoint(self):
+        from tasks.models import TaskImportCheckpoint
+        row = {'user_email': 'importer@example.com', 'description': 'd', 'priority': 'medium',
+               'duration_in_hours': 1, 'start_at': self.start}
+        path = self.write('tasks.ndjson', [json.dumps({**row, 'title': f'T{i}'}) for i in range(5)])
+        # Simulate a crash after the first batch of two records was committed
+        self.call(path, '--batch-size', '2')
+        Task.objects.exclude(title__in=['T0', 'T1']).delete()
+        TaskImportCheckpoint.objects.update(records_done=2, imported=2)
+
+        output = self.call(path, '--batch-size', '2')
+
+        self.assertIn('Resuming', output)
+        self.assertEqual(sorted(Task.objects.values_list('title', flat=True)), ['T0', 'T1', 'T2', 'T3', 'T4'])
+        self.assertEqual(TaskImportCheckpoint.objects.get().imported, 5)
+
+        self.call(path)
+        self.assertEqual(Task.objects.count(), 5)
+
+
+class OpenAPISchemaTestCase(APITestCase):
+    def setUp(self):
+        import os
+        import tempfile
+        from taskmanager.schema import prebuilt_schema
+        self.schema = prebuilt_schema
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.path = os.path.join(self.dir.name, 'openapi-schema.json')
+        settings_override = override_settings(OPENAPI_SCHEMA_PATH=self.path)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.schema.clear()
+        self.addCleanup(self.schema.clear)
+        self.url = reverse('schema-swagger-ui') + '?format=openapi'
+
+    def test_prebuilt_document_matches_the_generated_one(self):
+        from rest_framework.test import APIRequestFactory
+        from taskmanager.schema import schema_view
+        live = schema_view.without_ui()(APIRequestFactory().get(self.url))
+        live.render()
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content), json.loads(live.content))
+        with open(self.path) as f:
+            self.assertEqual(json.load(f)['schema'], json.loads(live.content))
+
+    def test_etag_and_gzip(self):
+        import gzip
+        response = self.client.get(self.url)
+        etag = response['ETag']
+
+        not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified.content, b'')
+
+        compressed = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(compressed['ETag'], etag)
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+        self.assertEqual(gzip.decompress(compressed.content), response.content)
+
+        for accept_encoding in ('gzip;q=0, deflate', 'br, *;q=0', 'identity'):
+            with self.subTest(accept_encoding=accept_encoding):
+                plain = self.client.get(self.url, HTTP_ACCEPT_ENCODING=accept_encoding)
+                self.assertNotIn('Content-Encoding', plain)
+                self.assertIn('Accept-Encoding', plain['Vary'])
+                self.assertEqual(plain.content, response.content)
+        for accept_encoding in ('GZIP;q=0.5', 'br;q=1, *;q=0.1'):
+            with self.subTest(accept_encoding=accept_encoding):
+                self.assertEqual(self.client.get(self.url, HTTP_ACCEPT_ENCODING=accept_encoding)['Content-Encoding'],
+                                 'gzip')
+        self.assertIn('Accept-Encoding', not_modified['Vary'])
+
+    def test_stored_document_is_reused_until_the_code_changes(self):
+        from unittest import mock
+        self.schema.build()
+        self.schema.clear()
+        with mock.patch.object(self.schema, 'build') as build:
+            self.schema.get()
+        build.assert_not_called()
+
+        with open(self.path) as f:
+            stored = json.load(f)
+        stored['fingerprint'] = 'stale'
+        with open(self.path, 'w') as f:
+            json.dump(stored, f)
+        self.schema.clear()
+
+        self.schema.get()
+        with open(self.path) as f:
+            self.assertEqual(json.load(f)['fingerprint'], self.schema.fingerprint())
+
+    def test_unwritable_path_still_serves_the_document(self):
+        import os
+        from io import StringIO
+        from django.core.management import CommandError, call_command
+        blocker = os.path.join(self.dir.name, 'not-a-directory')
+        open(blocker, 'w').close()
+        with override_settings(OPENAPI_SCHEMA_PATH=os.path.join(blocker, 'openapi-schema.json')):
+            with self.assertLogs('taskmanager.schema', 'ERROR'):
+                response = self.client.get(self.url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIn('paths', json.loads(response.content))
+            self.assertEqual(os.listdir(self.dir.name), ['not-a-directory'])
+
+            with self.assertLogs('taskmanager.schema', 'ERROR'), self.assertRaises(CommandError):
+                call_command('build_openapi_schema', stdout=StringIO())
+
+    def test_build_command_check(self):
+        from io import StringIO
+        from django.core.management import CommandError, call_command
+        with self.assertRaises(CommandError):
+            call_command('build_openapi_schema', '--check', stdout=StringIO())
+
+        call_command('build_openapi_schema', stdout=StringIO())
+        out = StringIO()
+        call_command('build_openapi_schema', '--check', stdout=out)
+        self.assertIn('up to date', out.getvalue())
+
+
+class StartupWarmUpTestCase(APITestCase):
+    def test_warm_up_runs_every_step_without_touching_data(self):
+        from django.core.wsgi import get_wsgi_application
+        from taskmanager.warmup import warm_up
+        application = get_wsgi_application()
+
+        with self.assertNumQueries(0):
+            timings = warm_up(application, database=False)
+
+        self.assertEqual(list(timings), ['urls', 'serializers', 'authentication', 'requests'])
+        self.assertGreater(timings['urls'][0], 0)
+        self.assertGreater(timings['serializers'][0], 0)
+
+    def test_database_warm_up_skips_connections_closed_after_each_request(self):
+        from unittest import mock
+        from django.db import connection
+        from taskmanager.warmup import warm_database_connections
+
+        for max_age, opened in ((0, 0), (600, 1), (None, 1)):
+            with self.subTest(max_age=max_age), \
+                    mock.patch.dict(connection.settings_dict, CONN_MAX_AGE=max_age), \
+                    mock.patch.object(connection, 'ensure_connection') as ensure_connection:
+                self.assertEqual(warm_database_connections(), opened)
+                self.assertEqual(ensure_connection.call_count, opened)
+
+    def test_lazily_built_docs_views_serve_the_ui(self):
+        self.assertEqual(self.client.get('/redoc/').status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get('/swagger/').status_code, status.HTTP_200_OK)
+
+    @slow
+    def test_profile_startup_reports_phases_and_imports(self):
+        from io import StringIO
+        from django.core.management import call_command
+        out = StringIO()
+        call_command('profile_startup', '--warm', '--top', '3', stdout=out)
+
+        output = out.getvalue()
+        for phase in ('settings', 'apps', 'urls', 'warm-up', 'first request'):
+            self.assertIn(phase, output)
+        self.assertIn('-> 401', output)
+        self.assertIn('modules imported', output)
+
+
+class AsyncTaskURLs:
+    """
+    URLconf serving the task endpoints with the async views (TASK_ASYNC_VIEWS=True).
+    """
+    from django.urls import include, path
+    from tasks.urls import task_urlpatterns
+
+    urlpatterns = [
+        path('api/', include(task_urlpatterns(use_async=True))),
+        path('api/auth/', include('users.urls')),
+    ]
+
+
+# The async views must behave exactly like the sync ones: rerun the endpoint suites against them
+
+@override_settings(ROOT_URLCONF=AsyncTaskURLs)
+class AsyncTaskCompletionTestCase(TaskCompletionTestCase):
+    pass
+
+
+@override_settings(ROOT_URLCONF=AsyncTaskURLs)
+class AsyncTaskListPaginationTestCase(TaskListPaginationTestCase):
+    pass
+
+
+@override_settings(ROOT_URLCONF=AsyncTaskURLs)
+class AsyncTaskStatusTestCase(TaskStatusTestCase):
+    pass
+
+
+@override_settings(ROOT_URLCONF=AsyncTaskURLs)
+class AsyncTaskConditionalGetTestCase(TaskConditionalGetTestCase):
+    pass
+
+
+@override_settings(ROOT_URLCONF=AsyncTaskURLs)
+class AsyncTaskListCacheTestCase(TaskListCacheTestCase):
+    pass
+
+
+@override_settings(ROOT_URLCONF=AsyncTaskURLs)
+class AsyncTaskDetailQueryCountTestCase(TaskDetailQueryCountTestCase):
+    pass
+
+
+@override_settings(ROOT_URLCONF=AsyncTaskURLs)
+class AsyncTaskFieldsetTestCase(TaskFieldsetTestCase):
+    pass
+
+
+@override_settings(ROOT_URLCONF=AsyncTaskURLs)
+class AsyncTaskListFilterOrderingTestCase(TaskListFilterOrderingTestCase):
+    pass
+
+
+@override_settings(ROOT_URLCONF=AsyncTaskURLs)
+class AsyncTaskSearchTestCase(TaskSearchTestCase):
+    pass
+
+
+@override_settings(ROOT_URLCONF=AsyncTaskURLs)
+class AsyncTaskViewsASGITestCase(APITestCase):
+    def setUp(self):
+        from users.authentication import user_snapshots
+        user_snapshots.clear()
+        self.user = User.objects.create_user(username='asyncuser', password='testpass123')
+        self.headers = {'Authorization': 'Bearer ' + str(RefreshToken.for_user(self.user).access_token)}
+
+    def test_routes_use_async_views(self):
+        from django.urls import resolve
+        from tasks.async_views import AsyncUserTaskDetailView, AsyncUserTaskListCreateView
+
+        self.assertIs(resolve('/api/tasks/').func.view_class, AsyncUserTaskListCreateView)
+        self.assertIs(resolve('/api/tasks/1').func.view_class, AsyncUserTaskDetailView)
+
+    async def test_create_list_update_delete_through_asgi(self):
+        from django.test import AsyncClient
+
+        # Per-request headers: Django 4.2's AsyncClient(headers=...) does not reach the ASGI scope
+        client, headers = AsyncClient(), self.headers
+        start_at = (timezone.now() + timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%S')
+        response = await client.post('/api/tasks/', {
+            'title': 'Async', 'description': 'Via ASGI', 'priority': 'low',
+            'duration_in_hours': 2, 'start_at': start_at,
+        }, content_type='application/json', headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        task_id = response.json()['data']['id']
+
+        response = await client.get('/api/tasks/', headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([t['id'] for t in response.json()['data']], [task_id])
+
+        response = await client.patch(f'/api/tasks/{task_id}', {'is_completed': True},
+                                      content_type='application/json', headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['status'], 'completed')
+
+        response = await client.delete(f'/api/tasks/{task_id}', headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(await Task.objects.filter(pk=task_id).aexists())
+
+    async def test_rejects_missing_token(self):
+        from django.test import AsyncClient
+
+        response = await AsyncClient().get('/api/tasks/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn('WWW-Authenticate', response)
+
+
+class MetricsTestCase(APITestCase):
+    def setUp(self):
+        from taskmanager.metrics import install, registry
+        from tasks.cache import task_list_cache
+        from users.authentication import user_snapshots
+        task_list_cache.clear()
+        user_snapshots.clear()
+        # The test connection was opened before the middleware was loaded (possibly in another thread)
+        install()
+        self.registry = registry
+        self.registry.reset()
+        self.addCleanup(self.registry.reset)
+        self.user = User.objects.create_user(username='measured', password='testpass123')
+        self.headers = {'HTTP_AUTHORIZATION': 'Bearer ' + str(RefreshToken.for_user(self.user).access_token)}
+        start_at = timezone.now() + timedelta(hours=1)
+        Task.objects.create(user=self.user, title='Measured', description='Measured',
+                            start_at=start_at, due_at=start_at + timedelta(hours=1))
+
+    def series(self, name):
+        return self.registry.snapshot()['histograms'][name]
+
+    def test_requests_are_recorded_per_route(self):
+        list_response = self.client.get('/api/tasks/', **self.headers)
+        self.client.get('/api/tasks/', **self.headers)
+        self.client.post('/api/auth/login/', {'username': 'measured', 'password': 'wrong'}, format='json')
+
+        latency = self.series('taskmanager_http_request_duration_seconds')
+        self.assertEqual(sum(latency['task-list-create\tGET\t200'][:-1]), 2)
+        self.assertEqual(sum(latency['login\tPOST\t400'][:-1]), 1)
+        sizes = self.series('taskmanager_http_response_size_bytes')
+        self.assertEqual(sizes['task-list-create'][-1], 2 * len(list_response.content))
+        queries = self.series('taskmanager_db_queries')
+        self.assertGreater(queries['task-list-create'][-1], 0)
+        self.assertGreater(queries['login'][-1], 0)
+        self.assertIn('task-list-create', self.series('taskmanager_serializer_duration_seconds'))
+
+        with override_settings(METRICS_TOKEN='s3cret'):
+            body = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret').content.decode()
+        self.assertIn('# TYPE taskmanager_http_request_duration_seconds histogram', body)
+        self.assertIn('taskmanager_http_request_duration_seconds_count'
+                      '{route="task-list-create",method="GET",status="200"} 2', body)
+        self.assertIn('taskmanager_http_request_duration_seconds_bucket'
+                      '{route="login",method="POST",status="400",le="+Inf"} 1', body)
+        self.assertIn('taskmanager_task_list_cache{stat="hits"} 1', body)
+
+    def test_serializers_are_timed_without_patching_drf(self):
+        from rest_framework.serializers import BaseSerializer
+        from taskmanager.metrics import TimedSerializerMixin
+        from tasks.serializers import TaskListSerializer, TaskSerializer
+        from users.serializers import UserLoginSerializer
+
+        self.assertFalse(hasattr(BaseSerializer.is_valid, '__wrapped__'))
+        self.assertFalse(hasattr(BaseSerializer.data.fget, '__wrapped__'))
+        for serializer_class in (TaskSerializer, TaskListSerializer, UserLoginSerializer):
+            self.assertTrue(issubclass(serializer_class, TimedSerializerMixin), serializer_class)
+
+        self.client.post('/api/auth/login/', {'username': 'measured', 'password': 'wrong'}, format='json')
+        self.assertIn('login', self.series('taskmanager_serializer_duration_seconds'))
+
+    def test_metrics_token(self):
+        with override_settings(METRICS_TOKEN='s3cret'):
+            self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_403_FORBIDDEN)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code,
+                             status.HTTP_403_FORBIDDEN)
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_metrics_are_staff_only_without_a_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.get('/metrics', **self.headers).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_login(User.objects.create_user(username='operator', password='testpass123', is_staff=True))
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_200_OK)
+
+    def test_processes_share_snapshots_through_the_metrics_dir(self):
+        import os
+        import tempfile
+        from taskmanager.metrics import mark_process_dead
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        other = {'histograms': {'taskmanager_db_queries': {'task-detail': [0, 3, 0, 0, 0, 0, 0, 0, 0, 0, 3]}},
+                 'stats': {'task_list_cache': {'hits': 5}}}
+        with open(os.path.join(directory.name, '999999.json'), 'w') as f:
+            json.dump(other, f)
+
+        with override_settings(METRICS_DIR=directory.name):
+            self.client.get(f'/api/tasks/{Task.objects.get().pk}', **self.headers)
+            merged = self.registry.collect()
+            self.assertEqual(merged['histograms']['taskmanager_db_queries']['task-detail'][1], 3)
+            self.assertEqual(sum(merged['histograms']['taskmanager_db_queries']['task-detail'][:-1]), 4)
+            self.assertEqual(merged['stats']['task_list_cache']['hits'], 5)
+
+            mark_process_dead(999999)
+            self.assertFalse(os.path.exists(os.path.join(directory.name, '999999.json')))
+            self.assertEqual(self.registry.collect()['histograms'], merged['histograms'])
+
+    def test_metrics_dir_is_ignored_without_fcntl(self):
+        import os
+        import tempfile
+        from unittest import mock
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        with override_settings(METRICS_DIR=directory.name), \
+                mock.patch('taskmanager.metrics._file_locks_available', return_value=False):
+            self.client.get(f'/api/tasks/{Task.objects.get().pk}', **self.headers)
+            collected = self.registry.collect()
+
+        self.assertEqual(os.listdir(directory.name), [])
+        self.assertEqual(sum(collected['histograms']['taskmanager_db_queries']['task-detail'][:-1]), 1)
+
+    @override_settings(ROOT_URLCONF=AsyncTaskURLs)
+    async def test_async_views_are_measured(self):
+        from django.test import AsyncClient
+        response = await AsyncClient().get('/api/tasks/', headers={'Authorization': self.headers['HTTP_AUTHORIZATION']})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertGreater(self.series('taskmanager_db_queries')['task-list-create'][-1], 0)
+        self.assertIn('task-list-create\tGET\t200', self.series('taskmanager_http_request_duration_seconds'))
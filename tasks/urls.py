@@ -1,7 +1,24 @@
+from django.conf import settings
 from django.urls import path
-from .views import UserTaskListCreateView, UserTaskDetailView
+from .views import UserTaskListCreateView, UserTaskDetailView, TaskBulkView, TaskChangesView, TaskExportView
 
-urlpatterns = [
-    path('tasks/', UserTaskListCreateView.as_view(), name='task-list-create'),
-    path('tasks/<int:pk>', UserTaskDetailView.as_view(), name='task-detail'),
-]
+
+def task_urlpatterns(use_async=False):
+    """
+    The task routes, served by the async views (for ASGI deployments) when `use_async` is set.
+    """
+    list_view, detail_view = UserTaskListCreateView, UserTaskDetailView
+    if use_async:
+        from .async_views import AsyncUserTaskDetailView, AsyncUserTaskListCreateView
+        list_view, detail_view = AsyncUserTaskListCreateView, AsyncUserTaskDetailView
+
+    return [
+        path('tasks/', list_view.as_view(), name='task-list-create'),
+        path('tasks/bulk', TaskBulkView.as_view(), name='task-bulk'),
+        path('tasks/export', TaskExportView.as_view(), name='task-export'),
+        path('tasks/changes', TaskChangesView.as_view(), name='task-changes'),
+        path('tasks/<int:pk>', detail_view.as_view(), name='task-detail'),
+    ]
+
+
+urlpatterns = task_urlpatterns(use_async=settings.TASK_ASYNC_VIEWS)
@@ -7,39 +7,210 @@ from drf_yasg import openapi
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.exceptions import PermissionDenied
+from django.conf import settings
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
 
-from .models import Task
-from .serializers import TaskSerializer
+from . import changes
+from .cache import task_list_cache
+from .conditional import make_etag, not_modified, set_validators
+from .export import csv_stream, ndjson_stream
+from .fieldsets import DETAIL_COLUMNS, columns_for, requested_fields
+from .filters import TaskFieldFilter, TaskOrderingFilter, TaskSearchFilter, TaskStatusFilter
+from .models import Task, TaskQuerySet
+from .pagination import TaskCursorPagination
+from .serializers import (
+    TaskBulkCreateSerializer, TaskBulkUpdateSerializer, TaskListSerializer, TaskSerializer,
+)
 
-@swagger_auto_schema(tags=["Tasks"])
-class UserTaskListCreateView(generics.ListCreateAPIView):
+# Query parameters of every view that reads the task list (see TaskListQueryMixin)
+TASK_LIST_PARAMETERS = [
+    openapi.Parameter('status', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      enum=list(TaskQuerySet.STATUSES),
+                      description="Only return tasks with this status"),
+    openapi.Parameter('priority', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      description="Only return tasks with this priority (high, medium, low); "
+                                  "comma-separate several"),
+    openapi.Parameter('is_completed', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN,
+                      description="Only return completed (true) or open (false) tasks"),
+    openapi.Parameter('start_at_after', openapi.IN_QUERY, type=openapi.TYPE_STRING, format='date-time',
+                      description="Only return tasks starting at or after this time"),
+    openapi.Parameter('start_at_before', openapi.IN_QUERY, type=openapi.TYPE_STRING, format='date-time',
+                      description="Only return tasks starting at or before this time"),
+    openapi.Parameter('due_at_after', openapi.IN_QUERY, type=openapi.TYPE_STRING, format='date-time',
+                      description="Only return tasks due at or after this time"),
+    openapi.Parameter('due_at_before', openapi.IN_QUERY, type=openapi.TYPE_STRING, format='date-time',
+                      description="Only return tasks due at or before this time"),
+    openapi.Parameter('q', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      description="Full-text search: only return tasks whose title or description contain "
+                                  "every word"),
+    openapi.Parameter('ordering', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      enum=[f'{sign}{name}' for name in TaskOrderingFilter.fields for sign in ('', '-')],
+                      description="Sort field, descending with a leading '-' (default: relevance with ?q=, "
+                                  "start_at otherwise). 'priority' sorts by rank: low < medium < high"),
+]
+
+# Sparse fieldsets of the task reads (see TaskFieldsetMixin)
+FIELDSET_PARAMETERS = [
+    openapi.Parameter('fields', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      description="Only return these fields, comma-separated (e.g. id,title,status)"),
+    openapi.Parameter('exclude', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      description="Leave these fields out, comma-separated (e.g. description)"),
+]
+
+
+class TaskFieldsetMixin:
     """
-    Handles listing and creating tasks for the authenticated user.
+    The fields a task read returns (?fields= / ?exclude=), validated once per request.
+    Only the columns behind those fields are loaded, and only those fields are rendered.
     """
 
-    serializer_class = TaskSerializer
-    permission_classes = [IsAuthenticated]
+    def get_fieldset(self):
+        if not hasattr(self, 'fieldset'):
+            self.fieldset = requested_fields(self.request)
+        return self.fieldset
+
+
+class TaskListQueryMixin:
+    """
+    The authenticated user's tasks with their SQL-computed status, plus the
+    list filters and ordering. Shared by every view that reads the task list.
+    """
+
+    filter_backends = [TaskStatusFilter, TaskFieldFilter, TaskSearchFilter, TaskOrderingFilter]
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # One clock reading per request, shared by the status filter and annotation
+        self.request_now = timezone.now()
 
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
             return Task.objects.none()  # Return an empty queryset for schema generation
-        return Task.objects.filter(user=self.request.user)
+        return Task.objects.filter(user=self.request.user).with_status(self.request_now)
+
+    def get_ordering(self):
+        # Read by TaskCursorPagination, which pages through the same ordering
+        return TaskOrderingFilter().get_ordering(self.request)
+
+
+@swagger_auto_schema(tags=["Tasks"])
+class UserTaskListCreateView(TaskFieldsetMixin, TaskListQueryMixin, generics.ListCreateAPIView):
+    """
+    Handles listing and creating tasks for the authenticated user.
+    """
+
+    serializer_class = TaskSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = TaskCursorPagination
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
     @swagger_auto_schema(
-        operation_description="Retrieve all tasks created by the authenticated user",
-        responses={200: TaskSerializer(many=True)}
+        operation_description="Retrieve the authenticated user's tasks ordered by start time (or ?ordering=), "
+                              "one page at a time. Follow the 'next'/'previous' links to move between pages.",
+        manual_parameters=[
+            openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="Opaque cursor taken from a 'next' or 'previous' link"),
+            openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                              description="Number of tasks per page"),
+            *TASK_LIST_PARAMETERS,
+            *FIELDSET_PARAMETERS,
+        ],
+        responses={
+            200: TaskSerializer(many=True),
+            304: openapi.Response(description="Not modified since the ETag the client sent."),
+            400: openapi.Response(description="Invalid filter, ordering or field name."),
+        }
     )
     def get(self, request, *args, **kwargs):
-        tasks = self.get_queryset()
-        serializer = self.get_serializer(tasks, many=True)
-        custom_response_data = {
-            "data": serializer.data,
-            #"message": "Tasks retrieved successfully!"
-        }
-        return Response(custom_response_data, status=status.HTTP_200_OK)
+        fields = self.get_fieldset()
+        variant = self.get_cache_variant(request)
+        fingerprint = Task.objects.filter(user=request.user).fingerprint(self.request_now)
+        etag, last_modified = self.get_validators(request, fingerprint)
+        if variant is not None:
+            entry = task_list_cache.get(request.user.pk, variant)
+            if self.is_current(entry, etag):
+                return self.cached_response(request, entry)
+
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        queryset = TaskListSerializer.rows(self.filter_queryset(self.get_queryset()), fields, self.get_ordering())
+        tasks = self.paginate_queryset(queryset)
+        return self.list_response(tasks, variant, fingerprint, etag, last_modified)
+
+    def get_validators(self, request, fingerprint):
+        """
+        `(etag, last_modified)` for a list response. Lists carry only the ETag: a delete moves the
+        row count but no timestamp, so a Last-Modified date would let If-Modified-Since answer 304
+        for a list that lost a task.
+        """
+        etag = make_etag(
+            request.get_full_path(),
+            *(fingerprint[key] for key in ('last_modified', 'total', 'in_progress', 'overdue'))
+        )
+        return etag, None
+
+    def list_response(self, tasks, variant, fingerprint, etag, last_modified):
+        serializer = TaskListSerializer(tasks, many=True, fields=self.get_fieldset())
+        response = set_validators(self.get_paginated_response(serializer.data), etag, last_modified)
+
+        if variant is not None:
+            self.cache_entry = {
+                'variant': variant,
+                'etag': etag,
+                'last_modified': last_modified,
+                'timeout': task_list_cache.ttl(self.request_now, fingerprint['next_transition']),
+            }
+        return response
+
+    def get_cache_variant(self, request):
+        """
+        Cache key part for this query variant, or None when the response should not be cached.
+        """
+        if not task_list_cache.enabled or request.accepted_renderer.format != 'json':
+            return None
+        return f'{request.accepted_media_type}|{request.get_full_path()}'
+
+    @staticmethod
+    def is_current(entry, etag):
+        """
+        Whether a cached entry still matches the rows. Invalidation only reaches the caches this process
+        writes to; this catches what it never heard of (other workers, management commands, bulk writes).
+        """
+        return entry is not None and entry['etag'] == etag
+
+    def cached_response(self, request, entry):
+        response = not_modified(request, entry['etag'], entry['last_modified'])
+        if response is None:
+            response = set_validators(
+                HttpResponse(entry['content'], content_type=entry['content_type']),
+                entry['etag'], entry['last_modified'],
+            )
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        entry = self.pop_cache_entry(response)
+        if entry is not None:
+            task_list_cache.set(request.user.pk, *entry)
+        return response
+
+    def pop_cache_entry(self, response):
+        """
+        `(variant, entry, timeout)` to cache for a successful list response, or None.
+        """
+        entry = getattr(self, 'cache_entry', None)
+        self.cache_entry = None
+        if entry is None or response.status_code != status.HTTP_200_OK:
+            return None
+        response.render()
+        entry['content'] = response.content
+        entry['content_type'] = response['Content-Type']
+        return entry.pop('variant'), entry, entry.pop('timeout')
 
     @swagger_auto_schema(
         operation_description="Create a task. The 'due_at' field is automatically calculated from 'start_at' + 'duration_in_hours'.",
@@ -71,31 +242,283 @@ class UserTaskListCreateView(generics.ListCreateAPIView):
 
 
 @swagger_auto_schema(tags=["Tasks"])
+class TaskExportView(TaskListQueryMixin, generics.GenericAPIView):
+    """
+    Stream every task of the authenticated user as NDJSON or CSV.
+    """
+
+    serializer_class = TaskSerializer
+    permission_classes = [IsAuthenticated]
+    streams = {
+        'ndjson': (ndjson_stream, 'application/x-ndjson; charset=utf-8'),
+        'csv': (csv_stream, 'text/csv; charset=utf-8'),
+    }
+
+    @swagger_auto_schema(
+        operation_description="Download all of the authenticated user's tasks ordered by start time (or ?ordering=). "
+                              "The body is streamed, one task per line, and accepts the same filters as the list.",
+        manual_parameters=[
+            openapi.Parameter('output', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['ndjson', 'csv'],
+                              description="Export format (default: ndjson)"),
+            *TASK_LIST_PARAMETERS,
+        ],
+        responses={
+            200: openapi.Response(description="Streamed NDJSON or CSV file."),
+            400: openapi.Response(description="Unknown output format or filter value."),
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        output = request.query_params.get('output', 'ndjson')
+        if output not in self.streams:
+            return Response(
+                {"output": f"Must be one of: {', '.join(self.streams)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())  # ordered by TaskOrderingFilter
+        stream, content_type = self.streams[output]
+        response = StreamingHttpResponse(stream(queryset), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="tasks.{output}"'
+        return response
+
+
+@swagger_auto_schema(tags=["Tasks"])
+class TaskChangesView(TaskFieldsetMixin, generics.GenericAPIView):
+    """
+    Delta sync: the tasks created or updated and the ids deleted since a cursor.
 
-class UserTaskDetailView(generics.RetrieveUpdateDestroyAPIView):
+    Every write to a task takes the next number of its owner's change
+    sequence (see tasks/changes.py); a cursor is the last number a client has
+    seen. `status` is returned as of the request, but it also changes with
+    time alone, so clients work it out from `start_at` / `due_at` between syncs.
+    """
+
+    serializer_class = TaskSerializer
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Tasks created or updated ('changes', oldest change first) and ids of tasks deleted "
+                              "('deleted') since the cursor. Start with since=0, then pass the returned 'cursor'; "
+                              "repeat while 'has_more' is true. A 410 means the cursor is too old to know every "
+                              "deletion: sync again from since=0 and replace the local copy.",
+        manual_parameters=[
+            openapi.Parameter('since', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="Cursor returned by the previous sync (default: 0, everything)"),
+            openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                              description="Number of changes per response"),
+            *FIELDSET_PARAMETERS,
+        ],
+        responses={
+            200: openapi.Response(
+                description="A page of changes and the cursor to continue from.",
+                examples={"application/json": {
+                    "changes": [{"id": 12, "title": "Renamed task", "...": "..."}],
+                    "deleted": [7],
+                    "cursor": "1042",
+                    "has_more": False,
+                }},
+            ),
+            400: openapi.Response(description="Invalid cursor or field name."),
+            410: openapi.Response(description="Deletions before this cursor have been compacted away."),
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        fields = self.get_fieldset()
+        since = request.query_params.get('since') or '0'
+        if not since.isdigit():
+            return Response({"since": "Must be a cursor returned by a previous sync, or 0."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not changes.is_supported():
+            return Response({"detail": "Change tracking is only available on SQLite and PostgreSQL."},
+                            status=status.HTTP_501_NOT_IMPLEMENTED)
+
+        try:
+            page, cursor, has_more = changes.changes_since(request.user.pk, int(since), self.get_page_size(request))
+        except changes.UnknownCursor:
+            return Response({"since": "Must be a cursor returned by a previous sync, or 0."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        except changes.CompactedCursor:
+            return Response({"detail": "Deletions since this cursor are no longer known. Sync again from since=0."},
+                            status=status.HTTP_410_GONE)
+
+        queryset = Task.objects.filter(user=request.user, id__in=[c.task_id for c in page if not c.deleted])
+        rows = TaskListSerializer.rows(queryset.with_status(timezone.now()), fields, keep=('id',))
+        by_id = {row.id: row for row in rows}
+        return Response({
+            "changes": TaskListSerializer([by_id[c.task_id] for c in page if c.task_id in by_id],
+                                          many=True, fields=fields).data,
+            # Tombstones, and tasks deleted after their change was read (their tombstone follows later)
+            "deleted": [c.task_id for c in page if c.task_id not in by_id],
+            "cursor": str(cursor),
+            "has_more": has_more,
+        })
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params['page_size'])
+        except (KeyError, ValueError):
+            return settings.TASK_CHANGES_PAGE_SIZE
+        if size <= 0:
+            return settings.TASK_CHANGES_PAGE_SIZE
+        return min(size, settings.TASK_CHANGES_MAX_PAGE_SIZE)
+
+
+@swagger_auto_schema(tags=["Tasks"])
+class TaskBulkView(generics.GenericAPIView):
+    """
+    Create or update many tasks for the authenticated user in one request.
+    """
+
+    serializer_class = TaskSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return Task.objects.none()
+        return Task.objects.filter(user=self.request.user)
+
+    @swagger_auto_schema(
+        operation_description="Create up to TASK_BULK_MAX_ITEMS tasks at once. Every item is validated like a "
+                              "single create; if any item is invalid nothing is saved and the errors are "
+                              "reported per item index.",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_ARRAY,
+            items=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                required=['title', 'description', 'priority', 'duration_in_hours', 'start_at'],
+                properties={
+                    'title': openapi.Schema(type=openapi.TYPE_STRING, example="New Task"),
+                    'description': openapi.Schema(type=openapi.TYPE_STRING, example="Some task details"),
+                    'priority': openapi.Schema(type=openapi.TYPE_STRING, example="high"),
+                    'duration_in_hours': openapi.Schema(type=openapi.TYPE_INTEGER, example=3),
+                    'start_at': openapi.Schema(type=openapi.TYPE_STRING, format='date-time',
+                                               example="2025-07-13T10:00:00Z"),
+                },
+            ),
+        ),
+        responses={
+            201: TaskSerializer(many=True),
+            400: openapi.Response(description="Per-item validation errors, e.g. "
+                                              "{\"errors\": [{\"index\": 1, \"errors\": {...}}]}"),
+        }
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = TaskBulkCreateSerializer(
+            child=TaskSerializer(),
+            data=request.data,
+            max_length=settings.TASK_BULK_MAX_ITEMS,
+            context=self.get_serializer_context(),
+        )
+        if not serializer.is_valid():
+            return Response({"errors": serializer.item_errors()}, status=status.HTTP_400_BAD_REQUEST)
+
+        tasks = serializer.save()
+        task_list_cache.invalidate(request.user.pk)  # bulk_create sends no post_save signals
+        return Response(
+            {"data": TaskListSerializer(tasks, many=True).data},
+            status=status.HTTP_201_CREATED
+        )
+
+    @swagger_auto_schema(
+        operation_description="Apply one change set to many tasks, selected by 'ids' or by 'filter'. "
+                              "Completed tasks cannot be marked incomplete; their ids are returned in 'rejected' "
+                              "along with ids that do not exist or belong to someone else.",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=['changes'],
+            properties={
+                'ids': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_INTEGER),
+                                      example=[1, 2, 3]),
+                'filter': openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'status': openapi.Schema(type=openapi.TYPE_STRING, enum=list(TaskQuerySet.STATUSES)),
+                        'priority': openapi.Schema(type=openapi.TYPE_STRING, example="low"),
+                        'is_completed': openapi.Schema(type=openapi.TYPE_BOOLEAN),
+                    },
+                ),
+                'changes': openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'title': openapi.Schema(type=openapi.TYPE_STRING),
+                        'description': openapi.Schema(type=openapi.TYPE_STRING),
+                        'priority': openapi.Schema(type=openapi.TYPE_STRING, example="high"),
+                        'duration_in_hours': openapi.Schema(type=openapi.TYPE_INTEGER),
+                        'start_at': openapi.Schema(type=openapi.TYPE_STRING, format='date-time'),
+                        'is_completed': openapi.Schema(type=openapi.TYPE_BOOLEAN, example=True),
+                    },
+                ),
+            },
+        ),
+        responses={
+            200: openapi.Response(
+                description="Number of tasks changed and the ids that were rejected.",
+                examples={"application/json": {"updated": 3, "rejected": [7]}},
+            ),
+            400: openapi.Response(description="Invalid input."),
+        }
+    )
+    def patch(self, request, *args, **kwargs):
+        serializer = TaskBulkUpdateSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        result = serializer.perform(self.get_queryset())
+        task_list_cache.invalidate(request.user.pk)  # queryset.update() sends no post_save signals
+        return Response(result, status=status.HTTP_200_OK)
+
+
+@swagger_auto_schema(tags=["Tasks"])
+
+class UserTaskDetailView(TaskFieldsetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update, or delete a task belonging to the authenticated user.
     """
-    queryset = Task.objects.all()
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return Task.objects.none()
+        queryset = Task.objects.filter(user=self.request.user)
+        if self.request.method == 'GET' and self.get_fieldset() is not None:
+            queryset = queryset.only(*columns_for(self.get_fieldset(), keep=DETAIL_COLUMNS))
+        return queryset
+
     def get_object(self):
-        task = super().get_object()
-        if task.user != self.request.user:
-            raise PermissionDenied("You do not have permission to access this task.")
-        return task
+        # One owner-scoped query on the happy path; the existence check below
+        # only runs to tell "someone else's task" (403) from "no such task" (404).
+        try:
+            return super().get_object()
+        except Http404:
+            if Task.objects.filter(pk=self.kwargs[self.lookup_field]).exists():
+                raise PermissionDenied("You do not have permission to access this task.")
+            raise
 
     @swagger_auto_schema(
         operation_description="Retrieve a single task by ID belonging to the authenticated user.",
+        manual_parameters=FIELDSET_PARAMETERS,
         responses={
             200: TaskSerializer(),
+            304: openapi.Response(description="Not modified since the ETag / Last-Modified the client sent."),
+            400: openapi.Response(description="Unknown field name."),
             403: openapi.Response(description="You do not have permission to view this task."),
             404: openapi.Response(description="Task not found.")
         }
     )
     def get(self, request, *args, **kwargs):
-        return self.retrieve(request, *args, **kwargs)
+        return self.detail_response(request, self.get_object())
+
+    def detail_response(self, request, instance):
+        now = timezone.now()
+        fields = self.get_fieldset()
+        etag = make_etag(instance.pk, instance.updated_at.isoformat(), instance.status_at(now), *(fields or ()))
+        last_modified = instance.status_changed_at(now)
+
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        serializer = self.get_serializer(instance, fields=fields)
+        return set_validators(Response(serializer.data), etag, last_modified)
 
     @swagger_auto_schema(
         operation_description="Fully update a task by ID belonging to the authenticated user.",
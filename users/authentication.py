@@ -0,0 +1,187 @@
+# users/authentication.py
+
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+class UserSnapshotCache:
+    """
+    TTL cache of user rows in Django's cache framework (the AUTH_USER_CACHE_ALIAS
+    cache), keyed by primary key (as a string, matching the token's user id claim).
+
+    Entries expire after AUTH_USER_CACHE_TTL seconds and are deleted as soon
+    as the user is saved or deleted (see users/signals.py). That deletion only
+    reaches every worker through a shared cache backend; with the per-process
+    LocMemCache the TTL defaults to 30 seconds, so the worker that made a
+    change sees it at once and the others within the TTL. This process deletes
+    its least recently written snapshots once it has written more than
+    AUTH_USER_CACHE_MAX_ENTRIES of them.
+    """
+
+    key_prefix = 'user-snapshot'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._recent = OrderedDict()
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'AUTH_USER_CACHE_TTL', 0)
+
+    @property
+    def max_entries(self):
+        return getattr(settings, 'AUTH_USER_CACHE_MAX_ENTRIES', 10000)
+
+    @property
+    def backend(self):
+        return caches[getattr(settings, 'AUTH_USER_CACHE_ALIAS', 'default')]
+
+    def get(self, user_id):
+        if self.ttl <= 0:
+            return None
+        return self._build(self.backend.get(self._key(user_id)))
+
+    async def aget(self, user_id):
+        if self.ttl <= 0:
+            return None
+        return self._build(await self.backend.aget(self._key(user_id)))
+
+    def put(self, user):
+        if self.ttl <= 0:
+            return
+        key, user_row = self._entry(user)
+        self.backend.set(key, user_row, self.ttl)
+        evicted = self._record_set(key)
+        if evicted:
+            self.backend.delete_many(evicted)
+
+    async def aput(self, user):
+        if self.ttl <= 0:
+            return
+        key, user_row = self._entry(user)
+        await self.backend.aset(key, user_row, self.ttl)
+        evicted = self._record_set(key)
+        if evicted:
+            await self.backend.adelete_many(evicted)
+
+    def evict(self, user_id):
+        self.backend.delete(self._key(user_id))
+
+    def clear(self):
+        """
+        Delete every snapshot this process wrote.
+        """
+        with self._lock:
+            keys = list(self._recent)
+            self._recent.clear()
+        self.backend.delete_many(keys)
+
+    def _key(self, user_id):
+        return f'{self.key_prefix}:{user_id}'
+
+    def _entry(self, user):
+        field_names = tuple(field.attname for field in user._meta.concrete_fields)
+        return self._key(user.pk), (field_names, tuple(getattr(user, name) for name in field_names))
+
+    def _record_set(self, key):
+        """
+        Track a written key and return the least recently written keys to delete.
+        """
+        evicted = []
+        with self._lock:
+            self._recent[key] = None
+            self._recent.move_to_end(key)
+            while len(self._recent) > self.max_entries:
+                evicted.append(self._recent.popitem(last=False)[0])
+        return evicted
+
+    @staticmethod
+    def _build(user_row):
+        if user_row is None:
+            return None
+        field_names, values = user_row
+        return get_user_model().from_db(DEFAULT_DB_ALIAS, field_names, values)
+
+
+user_snapshots = UserSnapshotCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves `request.user` without a database query.
+
+    The token's signed user id claim selects a cached snapshot of the user row,
+    which is rebuilt into a regular `User` instance (so foreign keys and
+    `task.user_id == request.user.pk` comparisons work unchanged). The database
+    is only read when the snapshot is missing or expired. Active status (and
+    the password-hash claim, with CHECK_REVOKE_TOKEN) is re-checked against the
+    snapshot on every request.
+    """
+
+    def get_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        user = user_snapshots.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_snapshots.put(user)
+            return user
+
+        self.check_user(user, validated_token)
+        return user
+
+    async def aauthenticate(self, request):
+        """
+        `authenticate()` for async views: token checks are CPU-only, and the
+        user row is read with the async ORM only on a snapshot miss.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        user = await user_snapshots.aget(user_id)
+        if user is None:
+            try:
+                user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist as e:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+            self.check_user(user, validated_token)
+            await user_snapshots.aput(user)
+            return user
+
+        self.check_user(user, validated_token)
+        return user
+
+    @staticmethod
+    def get_user_id(validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+    @staticmethod
+    def check_user(user, validated_token):
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
@@ -0,0 +1,226 @@
+# users/blacklist.py
+
+import hashlib
+import math
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings.
+
+    Sized for `capacity` items at a `false_positive_rate`; membership tests can
+    return false positives but never false negatives.
+    """
+
+    def __init__(self, capacity, false_positive_rate):
+        self.capacity = max(int(capacity), 1)
+        bits = -self.capacity * math.log(false_positive_rate) / (math.log(2) ** 2)
+        self.size = max(int(math.ceil(bits)), 8)
+        self.hashes = max(int(round(self.size / self.capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    @property
+    def full(self):
+        return self.count >= self.capacity
+
+    def _positions(self, item):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+
+class TokenBlacklistIndex:
+    """
+    In-process Bloom filter of blacklisted refresh-token JTIs.
+
+    A JTI that is not in the filter is certainly not blacklisted, so the
+    blacklist lookup only reaches the database for tokens that are (or
+    collide with) blacklisted ones. The filter is built from the database on
+    first use, picks up rows blacklisted by other processes every
+    TOKEN_BLACKLIST_SYNC_INTERVAL seconds with a primary-key range query, and
+    is rebuilt once it holds more JTIs than it was sized for.
+
+    Primary keys are handed out before commit, so a row can become visible
+    after a higher one. Each sync therefore starts from the high-water mark of
+    a sync at least TOKEN_BLACKLIST_SYNC_OVERLAP seconds old rather than the
+    latest one. Queries run outside the lock; one thread refreshes while the
+    others keep using the current filter.
+
+    Tokens blacklisted in this process are added immediately. A token
+    blacklisted elsewhere within the sync interval still cannot be rotated
+    twice: `BlacklistRefreshToken.blacklist()` is the authoritative check.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+        self._filter = None
+        self._marks = deque()  # (monotonic time, highest id seen by then), oldest first
+        self._synced_at = 0.0
+        self._stats = {'checks': 0, 'database_checks': 0, 'false_positives': 0, 'rebuilds': 0}
+
+    @property
+    def sync_interval(self):
+        return getattr(settings, 'TOKEN_BLACKLIST_SYNC_INTERVAL', 5)
+
+    @property
+    def sync_overlap(self):
+        return getattr(settings, 'TOKEN_BLACKLIST_SYNC_OVERLAP', 60)
+
+    @property
+    def false_positive_rate(self):
+        return getattr(settings, 'TOKEN_BLACKLIST_FALSE_POSITIVE_RATE', 0.001)
+
+    @property
+    def min_capacity(self):
+        return getattr(settings, 'TOKEN_BLACKLIST_MIN_CAPACITY', 100000)
+
+    def might_contain(self, jti):
+        self._refresh()
+        with self._lock:
+            self._stats['checks'] += 1
+            return jti in self._filter
+
+    def add(self, jti):
+        with self._lock:
+            if self._filter is None:
+                return  # built from the database on first use
+            self._filter.add(jti)
+
+    def record_database_check(self, blacklisted):
+        with self._lock:
+            self._stats['database_checks'] += 1
+            if not blacklisted:
+                self._stats['false_positives'] += 1
+
+    def reset(self):
+        """
+        Drop the filter; the next check rebuilds it.
+        """
+        with self._lock:
+            self._filter = None
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, size=self._filter.count if self._filter else 0)
+
+    def _refresh(self):
+        with self._lock:
+            missing = self._filter is None
+            due = missing or self._filter.full or time.monotonic() - self._synced_at >= self.sync_interval
+        # Only the first check has to wait; later ones use the filter they have while another thread refreshes
+        if not due or not self._refreshing.acquire(blocking=missing):
+            return
+        try:
+            with self._lock:
+                rebuild = self._filter is None or self._filter.full
+                due = rebuild or time.monotonic() - self._synced_at >= self.sync_interval
+            if rebuild:
+                self._rebuild()
+            elif due:
+                self._sync()
+        finally:
+            self._refreshing.release()
+
+    def _rebuild(self):
+        # Rows blacklisted up to the overlap ago have committed; anything later gets a higher id than
+        # theirs, so later syncs start there and pick up whatever this read did not see yet
+        started = time.monotonic()
+        recent = timezone.now() - timedelta(seconds=self.sync_overlap)
+        floor = BlacklistedToken.objects.filter(blacklisted_at__lt=recent).aggregate(floor=Max('id'))['floor'] or 0
+        last_id = BlacklistedToken.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+        live = BlacklistedToken.objects.filter(id__lte=last_id, token__expires_at__gt=timezone.now())
+        jtis = list(live.values_list('token__jti', flat=True).iterator())
+
+        bloom = BloomFilter(max(2 * len(jtis), self.min_capacity), self.false_positive_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        with self._lock:
+            self._filter = bloom
+            self._marks = deque([(started - self.sync_overlap, floor), (started, last_id)])
+            self._synced_at = started
+            self._stats['rebuilds'] += 1
+
+    def _sync(self):
+        started = time.monotonic()
+        with self._lock:
+            while len(self._marks) > 1 and self._marks[1][0] <= started - self.sync_overlap:
+                self._marks.popleft()
+            floor, last_id = self._marks[0][1], self._marks[-1][1]
+
+        rows = list(BlacklistedToken.objects.filter(id__gt=floor).values_list('id', 'token__jti'))
+        with self._lock:
+            for blacklisted_id, jti in rows:
+                if jti not in self._filter:  # rows in the overlap are read again
+                    self._filter.add(jti)
+                last_id = max(last_id, blacklisted_id)
+            self._marks.append((started, last_id))
+            self._synced_at = started
+
+
+token_blacklist = TokenBlacklistIndex()
+
+
+class BlacklistRefreshToken(RefreshToken):
+    """
+    RefreshToken whose blacklist check is answered by `token_blacklist` and
+    only confirmed against the database when the filter reports a hit.
+
+    `blacklist()` refuses tokens that are already blacklisted, so two requests
+    racing to rotate the same refresh token cannot both succeed.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        """
+        Issue a token without inserting its `OutstandingToken` row.
+
+        The row is only needed once the token is blacklisted, and `blacklist()`
+        creates it then (via `outstand()`), so logins stay read-only.
+        """
+        return super(BlacklistMixin, cls).for_user(user)
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if not token_blacklist.might_contain(jti):
+            return
+
+        blacklisted = BlacklistedToken.objects.filter(token__jti=jti).exists()
+        token_blacklist.record_database_check(blacklisted)
+        if blacklisted:
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        with transaction.atomic():
+            token, _created = self.outstand()
+            blacklisted, created = BlacklistedToken.objects.get_or_create(token=token)
+        if not created:
+            raise TokenError(_("Token is blacklisted"))
+
+        token_blacklist.add(token.jti)
+        return blacklisted, created
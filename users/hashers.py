@@ -0,0 +1,30 @@
+# users/hashers.py
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+# PBKDF2-SHA256 iteration counts per PASSWORD_HASH_TIER
+PASSWORD_HASH_TIERS = {
+    'high': PBKDF2PasswordHasher.iterations,  # Django's default
+    'medium': 310000,  # OWASP's 2021 recommendation
+    'low': 120000,
+}
+
+
+class TieredPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with a configurable cost.
+
+    The iteration count comes from PASSWORD_HASH_ITERATIONS when set, otherwise
+    from the PASSWORD_HASH_TIER preset. The algorithm name is unchanged, so
+    existing hashes keep verifying. Django rehashes a password with the current
+    cost on the next successful login whenever `must_update()` reports a stored
+    hash with different parameters.
+    """
+
+    @property
+    def iterations(self):
+        explicit = getattr(settings, 'PASSWORD_HASH_ITERATIONS', None)
+        if explicit:
+            return explicit
+        return PASSWORD_HASH_TIERS[getattr(settings, 'PASSWORD_HASH_TIER', 'high')]
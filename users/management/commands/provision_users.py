@@ -0,0 +1,96 @@
+import csv
+import json
+import os
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from users.provisioning import UserProvisioner
+
+
+class Command(BaseCommand):
+    help = ("Register users in bulk from a CSV or NDJSON file with first_name, last_name, username, "
+            "email and password columns, applying the registration rules.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or NDJSON file, or '-' for stdin.")
+        parser.add_argument('--format', choices=['csv', 'ndjson'], default=None,
+                            help="Input format (default: inferred from the file extension).")
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help="Users validated and inserted per batch (default: 1000).")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Processes used to hash passwords (default: USER_PROVISION_WORKERS or one per CPU).")
+        parser.add_argument('--report', default=None,
+                            help="Write every record's outcome to this file as NDJSON.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        fmt = options['format'] or self.infer_format(path)
+
+        workers = options['workers'] or settings.USER_PROVISION_WORKERS or os.cpu_count() or 1
+        provisioner = UserProvisioner(workers=workers)  # one process pool for every batch
+        stream = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8', newline='')
+        report = open(options['report'], 'w', encoding='utf-8') if options['report'] else None
+
+        started = time.monotonic()
+        created = rejected = offset = 0
+        try:
+            batch = []
+            for record in self.read_records(stream, fmt):
+                batch.append(record)
+                if len(batch) == options['batch_size']:
+                    created, rejected = self.flush(provisioner, batch, offset, report, created, rejected)
+                    offset += len(batch)
+                    batch = []
+                    self.stdout.write(f"{offset} record(s) processed, {created} created, {rejected} rejected")
+            if batch:
+                created, rejected = self.flush(provisioner, batch, offset, report, created, rejected)
+        finally:
+            provisioner.close()
+            if stream is not sys.stdin:
+                stream.close()
+            if report:
+                report.close()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {created} user(s), rejected {rejected} in {elapsed:.1f}s "
+            f"({(created + rejected) / elapsed if elapsed else 0:.0f} records/s)."
+        ))
+
+    @staticmethod
+    def flush(provisioner, batch, offset, report, created, rejected):
+        for outcome in provisioner.provision(batch):
+            outcome['index'] += offset  # position in the whole file
+            if outcome['status'] == 'created':
+                created += 1
+            else:
+                rejected += 1
+            if report:
+                report.write(json.dumps(outcome) + '\n')
+        return created, rejected
+
+    @staticmethod
+    def read_records(stream, fmt):
+        if fmt == 'csv':
+            yield from csv.DictReader(stream)
+            return
+        for line in stream:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield None  # rejected by the serializer as invalid data
+
+    @staticmethod
+    def infer_format(path):
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.csv':
+            return 'csv'
+        if extension in ('.ndjson', '.jsonl'):
+            return 'ndjson'
+        raise CommandError("Cannot infer the input format, pass --format csv or --format ndjson.")
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = "Delete expired outstanding and blacklisted refresh tokens in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="Tokens deleted per transaction (default: 5000).")
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep pruning every --interval seconds instead of exiting.")
+        parser.add_argument('--interval', type=float, default=3600.0,
+                            help="Seconds to sleep between cycles with --loop (default: 3600).")
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            deleted, batches = self.prune(options['batch_size'])
+            self.stdout.write(
+                f"Deleted {deleted} expired token(s) in {batches} batch(es), {time.monotonic() - started:.3f}s"
+            )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    @staticmethod
+    def prune(batch_size):
+        """
+        Walk expired tokens in primary-key order so each batch resumes where the
+        last one stopped instead of rescanning the table from the start.
+        """
+        now = timezone.now()
+        last_id = 0
+        deleted = batches = 0
+        while True:
+            ids = list(
+                OutstandingToken.objects.filter(id__gt=last_id, expires_at__lte=now)
+                .order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                return deleted, batches
+            with transaction.atomic():
+                BlacklistedToken.objects.filter(token_id__in=ids).delete()
+                OutstandingToken.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+            batches += 1
+            last_id = ids[-1]
@@ -0,0 +1,182 @@
+# users/provisioning.py
+
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q
+
+from .serializers import UserProvisionSerializer
+
+User = get_user_model()
+
+USERNAME_TAKEN = "A user with that username already exists."
+EMAIL_TAKEN = "A user with this email already exists."
+
+
+def _setup_worker():
+    import django
+    from django.apps import apps
+
+    if not apps.ready:  # "spawn" start method; forked workers inherit the parent's setup
+        django.setup()
+
+
+def _hash_passwords(passwords):
+    return [make_password(password) for password in passwords]
+
+
+class UserProvisioner:
+    """
+    Registers many users at once with the `RegisterView` rules.
+
+    Records are validated with `UserProvisionSerializer` (the registration
+    field, password and name rules), usernames and emails are checked against
+    the database with one query per batch, passwords are hashed and the users
+    are inserted with one `bulk_create`.
+
+    Passwords are hashed in-process unless `workers` is above 1: then large
+    batches are spread over a process pool, started on first use and kept
+    until `close()` (or the end of a `with` block). Only the provision_users
+    command does that; a request worker must not fork a pool per request.
+
+    `provision()` returns one outcome per record, in input order:
+    `{"index", "username", "status": "created", "id"}` or
+    `{"index", "username", "status": "rejected", "errors"}`.
+
+    Usernames are unique in the database, so a concurrent registration of the
+    same username makes the insert fail and the batch is re-checked and
+    retried. Emails are only unique by convention (as in `RegisterView`); they
+    are re-checked inside the insert transaction and any user whose email was
+    taken meanwhile is not committed.
+    """
+
+    insert_attempts = 3
+    min_pool_batch = 16  # smaller batches are hashed in-process
+
+    def __init__(self, workers=1):
+        self.workers = workers
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def provision(self, records):
+        outcomes = [None] * len(records)
+        candidates = {}  # index -> validated data
+
+        seen_usernames, seen_emails = set(), set()
+        for index, record in enumerate(records):
+            serializer = UserProvisionSerializer(data=record)
+            if not serializer.is_valid():
+                outcomes[index] = self._rejected(index, record, serializer.errors)
+                continue
+
+            data = dict(serializer.validated_data)
+            data['username'] = User.normalize_username(data['username'])
+            data['email'] = User.objects.normalize_email(data['email'])
+            errors = {}
+            if data['username'] in seen_usernames:
+                errors['username'] = ["Duplicate username in this batch."]
+            if data['email'] in seen_emails:
+                errors['email'] = ["Duplicate email in this batch."]
+            seen_usernames.add(data['username'])
+            seen_emails.add(data['email'])
+            if errors:
+                outcomes[index] = self._rejected(index, record, errors)
+            else:
+                candidates[index] = data
+
+        self._reject_taken(candidates, outcomes)
+        passwords = self.hash_passwords([data['password'] for data in candidates.values()])
+        for data, password in zip(candidates.values(), passwords):
+            data['password'] = password
+
+        for attempt in range(self.insert_attempts):
+            try:
+                created = self._insert(candidates, outcomes)
+                break
+            except IntegrityError:
+                if attempt == self.insert_attempts - 1:
+                    raise
+                self._reject_taken(candidates, outcomes)  # a username was registered meanwhile
+
+        for index, user in created.items():
+            outcomes[index] = {'index': index, 'username': user.username, 'status': 'created', 'id': user.pk}
+        return outcomes
+
+    def hash_passwords(self, passwords):
+        if self.workers <= 1 or len(passwords) < self.min_pool_batch:
+            return _hash_passwords(passwords)
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_setup_worker)
+        chunk = -(-len(passwords) // self.workers)
+        chunks = [passwords[i:i + chunk] for i in range(0, len(passwords), chunk)]
+        return [encoded for hashed in self._pool.map(_hash_passwords, chunks) for encoded in hashed]
+
+    def _reject_taken(self, candidates, outcomes):
+        """
+        Reject candidates whose username or email already exists, with one query.
+        """
+        if not candidates:
+            return
+        usernames = {data['username'] for data in candidates.values()}
+        emails = {data['email'] for data in candidates.values()}
+        taken = User.objects.filter(Q(username__in=usernames) | Q(email__in=emails)).values_list('username', 'email')
+        taken_usernames, taken_emails = set(), set()
+        for username, email in taken:
+            taken_usernames.add(username)
+            taken_emails.add(email)
+
+        for index, data in list(candidates.items()):
+            errors = {}
+            if data['username'] in taken_usernames:
+                errors['username'] = [USERNAME_TAKEN]
+            if data['email'] in taken_emails:
+                errors['email'] = [EMAIL_TAKEN]
+            if errors:
+                del candidates[index]
+                outcomes[index] = self._rejected(index, data, errors)
+
+    def _insert(self, candidates, outcomes):
+        with transaction.atomic():
+            users = User.objects.bulk_create([
+                User(
+                    username=data['username'],
+                    email=data['email'],
+                    password=data['password'],
+                    first_name=data['first_name'],
+                    last_name=data['last_name'],
+                )
+                for data in candidates.values()
+            ])
+            created = dict(zip(candidates, users))
+
+            # Emails have no unique constraint: drop ours if another user committed the same one meanwhile
+            emails = [user.email for user in users]
+            duplicated = set(
+                User.objects.filter(email__in=emails).values('email')
+                .annotate(users=Count('id')).filter(users__gt=1).values_list('email', flat=True)
+            )
+            if duplicated:
+                conflicts = [index for index, user in created.items() if user.email in duplicated]
+                User.objects.filter(pk__in=[created[index].pk for index in conflicts]).delete()
+                for index in conflicts:
+                    outcomes[index] = self._rejected(index, candidates.pop(index), {'email': [EMAIL_TAKEN]})
+                    del created[index]
+        return created
+
+    @staticmethod
+    def _rejected(index, record, errors):
+        username = record.get('username') if hasattr(record, 'get') else None
+        return {'index': index, 'username': username, 'status': 'rejected', 'errors': errors}
@@ -1,13 +1,43 @@
 # users/serializers.py
 
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 from django.contrib.auth import get_user_model
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+
+from taskmanager.metrics import TimedSerializerMixin
+
+from .blacklist import BlacklistRefreshToken
 
 User = get_user_model()
 
-class UserRegistrationSerializer(serializers.ModelSerializer):
+PASSWORD_SPECIAL_CHARACTERS = '!@#$%^&*()_+-=[]{}|;:,.<>?/'
+
+
+def registration_policy_error(password, first_name, last_name):
+    """
+    The first password / name rule a registration breaks, as a message, or None.
+    """
+    if len(password) < 8:
+        return "Password must be at least 8 characters long."
+    if not any(char.isdigit() for char in password):
+        return "Password must contain at least one numeral."
+    if not any(char.isalpha() for char in password):
+        return "Password must contain at least one letter."
+    if not any(char.isupper() for char in password):
+        return "Password must contain at least one uppercase letter."
+    if not any(char.islower() for char in password):
+        return "Password must contain at least one lowercase letter."
+    if not any(char in PASSWORD_SPECIAL_CHARACTERS for char in password):
+        return "Password must contain at least one special character."
+    if len(first_name) < 2 or len(last_name) < 2:
+        return "First name and last name must be at least 2 characters long."
+    return None
+
+
+class UserRegistrationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
     
 
@@ -28,28 +58,10 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         first_name = validated_data.get('first_name')
         last_name = validated_data.get('last_name')
         
-        if len(password) < 8:
-            raise serializers.ValidationError("Password must be at least 8 characters long.")
-        
-        if not any(char.isdigit() for char in password):
-            raise serializers.ValidationError("Password must contain at least one numeral.")
-        
-        if not any(char.isalpha() for char in password):
-                raise serializers.ValidationError("Password must contain at least one letter.")
-            
-        if not any(char.isupper() for char in password):
-            raise serializers.ValidationError("Password must contain at least one uppercase letter.")
-        
-        if not any(char.islower() for char in password):
-            raise serializers.ValidationError("Password must contain at least one lowercase letter.")
-        
-        if not any(char in '!@#$%^&*()_+-=[]{}|;:,.<>?/' for char in password):
-            raise serializers.ValidationError("Password must contain at least one special character.")
-        
-        if len(first_name) < 2 or len(last_name) < 2:
-            raise serializers.ValidationError("First name and last name must be at least 2 characters long.")
-                    
-        
+        error = registration_policy_error(password, first_name, last_name)
+        if error is not None:
+            raise serializers.ValidationError(error)
+
         user = User.objects.create_user(
             username=validated_data['username'],
             email=validated_data['email'],
@@ -71,6 +83,35 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return value
 
 
+
+class UserProvisionSerializer(UserRegistrationSerializer):
+    """
+    One record of a bulk provisioning request: the registration field rules
+    without the per-record uniqueness queries, which `UserProvisioner` runs
+    once for the whole batch.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fields['username'].validators = [
+            validator for validator in fields['username'].validators
+            if not isinstance(validator, UniqueValidator)
+        ]
+        return fields
+
+    def validate_email(self, value):
+        try:
+            validate_email(value)
+        except DjangoValidationError:
+            raise serializers.ValidationError("Enter a valid email address.")
+        return value
+
+    def validate(self, attrs):
+        error = registration_policy_error(attrs['password'], attrs['first_name'], attrs['last_name'])
+        if error is not None:
+            raise serializers.ValidationError(error)
+        return attrs
+
 # login users/serializers.py
 def validate_username(value):
     # Check if it's a valid email
@@ -86,6 +127,13 @@ def validate_username(value):
     return value
 
 
-class UserLoginSerializer(serializers.Serializer):
+class UserLoginSerializer(TimedSerializerMixin, serializers.Serializer):
     username = serializers.CharField(required=True)
-    password = serializers.CharField(required=True)
\ No newline at end of file
+    password = serializers.CharField(required=True)
+
+
+class BlacklistTokenRefreshSerializer(TimedSerializerMixin, TokenRefreshSerializer):
+    """
+    Refresh serializer that checks and rotates tokens through the in-process blacklist filter.
+    """
+    token_class = BlacklistRefreshToken
@@ -0,0 +1,17 @@
+# users/signals.py
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import user_snapshots
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def evict_user_snapshot(sender, instance, **kwargs):
+    # Deactivation and password changes must take effect on the next request, in every worker; evicted
+    # again on commit so a request that read the old row meanwhile cannot leave it cached
+    user_snapshots.evict(instance.pk)
+    transaction.on_commit(lambda: user_snapshots.evict(instance.pk))
@@ -0,0 +1,395 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from tasks.models import Task
+from users.authentication import user_snapshots
+
+User = get_user_model()
+
+
+@override_settings(AUTH_USER_CACHE_TTL=300)
+class CachedJWTAuthenticationTestCase(APITestCase):
+    def setUp(self):
+        user_snapshots.clear()
+        self.user = User.objects.create_user(username='jwt@example.com', password='Testpass123!')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(RefreshToken.for_user(self.user).access_token))
+        start_at = timezone.now() + timedelta(hours=1)
+        self.task = Task.objects.create(user=self.user, title='Auth', description='Auth',
+                                        start_at=start_at, due_at=start_at + timedelta(hours=1))
+        self.url = f'/api/tasks/{self.task.id}'
+
+    def test_warm_requests_run_no_auth_queries(self):
+        self.client.get(self.url)  # loads the user once
+
+        with self.assertNumQueries(1):  # the task lookup only
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user'], self.user.pk)
+
+        self.client.get('/api/tasks/')
+        with self.assertNumQueries(1):  # the list cache's fingerprint check, no user lookup
+            self.client.get('/api/tasks/')
+
+    def test_request_user_is_a_real_user_instance(self):
+        self.client.get(self.url)
+        response = self.client.post('/api/tasks/', {
+            'title': 'Created', 'description': 'Created', 'priority': 'low', 'duration_in_hours': 1,
+            'start_at': (timezone.now() + timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%S'),
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Task.objects.get(pk=response.data['data']['id']).user_id, self.user.pk)
+
+    def test_deactivation_takes_effect_immediately(self):
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+
+    def test_tokens_are_not_tied_to_the_password_hash(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        token = AccessToken.for_user(self.user)
+        token['hash_password'] = 'digest-of-an-older-hash'  # issued before a rehash or while CHECK_REVOKE_TOKEN was on
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(client.get(self.url).status_code, 200)
+
+    def test_snapshots_are_shared_and_evicted_for_every_worker(self):
+        from django.core.cache import cache
+
+        self.client.get(self.url)
+        self.assertIsNotNone(cache.get(f'user-snapshot:{self.user.pk}'))
+
+        self.user.set_password('Changed123!')
+        self.user.save()
+        self.assertIsNone(cache.get(f'user-snapshot:{self.user.pk}'))
+
+    def test_snapshots_default_to_a_short_ttl_with_a_per_process_cache(self):
+        from taskmanager import settings as project_settings  # the module, as configured: no overrides
+
+        self.assertEqual(project_settings.CACHES['default']['BACKEND'],
+                         'django.core.cache.backends.locmem.LocMemCache')
+        self.assertFalse(project_settings.CACHE_IS_SHARED)
+        self.assertEqual(project_settings.AUTH_USER_CACHE_TTL, 30)
+
+    @override_settings(AUTH_USER_CACHE_TTL=0)
+    def test_cache_can_be_disabled(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+
+class TokenBlacklistFilterTestCase(APITestCase):
+    def setUp(self):
+        from users.blacklist import token_blacklist
+        token_blacklist.reset()
+        self.user = User.objects.create_user(username='blacklist', password='Testpass123!')
+        self.refresh_url = '/api/auth/token/refresh/'
+
+    def test_negative_checks_skip_the_database(self):
+        from users.blacklist import BlacklistRefreshToken
+
+        raw = str(BlacklistRefreshToken.for_user(self.user))
+        BlacklistRefreshToken(raw)  # builds the filter
+
+        with self.assertNumQueries(0):
+            BlacklistRefreshToken(raw)
+
+    def test_rotated_token_cannot_be_reused(self):
+        raw = str(RefreshToken.for_user(self.user))
+
+        response = self.client.post(self.refresh_url, {'refresh': raw}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.post(self.refresh_url, {'refresh': raw}, format='json')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['detail'], 'Token is blacklisted')
+
+    def test_logout_blacklists_for_later_refresh(self):
+        raw = str(RefreshToken.for_user(self.user))
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(RefreshToken(raw).access_token))
+
+        response = self.client.post('/api/auth/logout/', {'refresh': raw}, format='json')
+        self.assertEqual(response.status_code, 205)
+
+        response = self.client.post(self.refresh_url, {'refresh': raw}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_blacklisted_elsewhere_is_still_refused(self):
+        from rest_framework_simplejwt.exceptions import TokenError
+        from users.blacklist import BlacklistRefreshToken, token_blacklist
+
+        token = BlacklistRefreshToken.for_user(self.user)
+        BlacklistRefreshToken(str(token))  # filter built before the token is blacklisted
+        RefreshToken(str(token)).blacklist()  # another process, not seen by this filter yet
+
+        with self.settings(TOKEN_BLACKLIST_SYNC_INTERVAL=3600):
+            stale = BlacklistRefreshToken(str(token))  # passes the stale filter
+            with self.assertRaisesMessage(TokenError, 'Token is blacklisted'):
+                stale.blacklist()
+
+        with self.settings(TOKEN_BLACKLIST_SYNC_INTERVAL=0):
+            with self.assertRaisesMessage(TokenError, 'Token is blacklisted'):
+                BlacklistRefreshToken(str(token))
+        self.assertEqual(token_blacklist.stats()['false_positives'], 0)
+
+    def test_sync_picks_up_rows_that_commit_out_of_id_order(self):
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+        from users.blacklist import token_blacklist
+
+        early, late = (RefreshToken.for_user(self.user) for _ in range(2))
+        early_row, late_row = (token.outstand()[0] for token in (early, late))
+        BlacklistedToken.objects.create(id=50, token=early_row)
+        token_blacklist.might_contain(early['jti'])  # builds the filter, high-water mark 50
+        BlacklistedToken.objects.create(id=10, token=late_row)  # allocated earlier, committed now
+
+        with self.settings(TOKEN_BLACKLIST_SYNC_INTERVAL=0):
+            self.assertTrue(token_blacklist.might_contain(late['jti']))
+
+    def test_sync_overlap_bounds_the_reread(self):
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+        from users.blacklist import token_blacklist
+
+        early, late = (RefreshToken.for_user(self.user) for _ in range(2))
+        early_row, late_row = (token.outstand()[0] for token in (early, late))
+        BlacklistedToken.objects.create(id=50, token=early_row)
+        with self.settings(TOKEN_BLACKLIST_SYNC_OVERLAP=0, TOKEN_BLACKLIST_SYNC_INTERVAL=0):
+            token_blacklist.might_contain(early['jti'])
+            token_blacklist.might_contain(early['jti'])  # a sync; the next one starts above 50
+            BlacklistedToken.objects.create(id=10, token=late_row)
+            self.assertFalse(token_blacklist.might_contain(late['jti']))
+
+    def test_refresh_queries_run_outside_the_lock(self):
+        from django.db import connection
+        from users.blacklist import BlacklistRefreshToken, token_blacklist
+
+        held = []
+
+        def check_lock(execute, sql, params, many, context):
+            held.append(token_blacklist._lock.locked())
+            return execute(sql, params, many, context)
+
+        raw = str(BlacklistRefreshToken.for_user(self.user))
+        with self.settings(TOKEN_BLACKLIST_SYNC_INTERVAL=0), connection.execute_wrapper(check_lock):
+            BlacklistRefreshToken(raw)  # rebuild
+            BlacklistRefreshToken(raw)  # sync
+        self.assertTrue(held)
+        self.assertNotIn(True, held)
+
+    def test_prune_tokens_deletes_expired_tokens_in_batches(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+        tokens = [RefreshToken.for_user(self.user) for _ in range(5)]
+        for token in tokens[:3]:
+            token.blacklist()
+        expired = [t['jti'] for t in tokens[1:4]]
+        OutstandingToken.objects.filter(jti__in=expired).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        out = StringIO()
+        call_command('prune_tokens', '--batch-size', '2', stdout=out)
+
+        self.assertIn('Deleted 3 expired token(s) in 2 batch(es)', out.getvalue())
+        self.assertEqual(
+            set(OutstandingToken.objects.values_list('jti', flat=True)),
+            {tokens[0]['jti'], tokens[4]['jti']},
+        )
+        self.assertEqual(list(BlacklistedToken.objects.values_list('token__jti', flat=True)), [tokens[0]['jti']])
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class LoginFastPathTestCase(APITestCase):
+    def setUp(self):
+        from users.backends import hash_timer
+        hash_timer.reset()
+        self.user = User.objects.create_user(username='login', password='Testpass123!')
+        self.url = '/api/auth/login/'
+
+    def test_login_issues_tokens_without_writes(self):
+        from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+        with self.assertNumQueries(1):  # the user lookup
+            response = self.client.post(self.url, {'username': 'login', 'password': 'Testpass123!'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(OutstandingToken.objects.exists())
+
+        # The row is created when the token is first blacklisted, so rotation still revokes it
+        refresh = response.data['refresh']
+        self.assertEqual(self.client.post('/api/auth/token/refresh/', {'refresh': refresh}, format='json').status_code, 200)
+        self.assertEqual(self.client.post('/api/auth/token/refresh/', {'refresh': refresh}, format='json').status_code, 401)
+
+    def test_stale_hash_is_upgraded_on_login(self):
+        access = str(RefreshToken.for_user(self.user).access_token)  # another session
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+
+        with self.settings(PASSWORD_HASH_ITERATIONS=2000):
+            response = self.client.post(self.url, {'username': 'login', 'password': 'Testpass123!'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$2000$'))
+        self.assertTrue(self.user.check_password('Testpass123!'))
+
+        response = self.client.get('/api/tasks/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(response.status_code, 200)
+
+    def test_tier_presets(self):
+        from django.contrib.auth.hashers import make_password
+        from users.hashers import PASSWORD_HASH_TIERS
+
+        with self.settings(PASSWORD_HASH_ITERATIONS=0, PASSWORD_HASH_TIER='low'):
+            self.assertIn(f"${PASSWORD_HASH_TIERS['low']}$", make_password('x'))
+
+    def test_unknown_username_sleeps_instead_of_hashing(self):
+        from unittest import mock
+        from users.backends import hash_timer
+
+        hash_timer.observe(0.05)
+        hash_timer.observe(0.07)
+        with mock.patch('users.backends.time.sleep') as sleep, \
+                mock.patch('django.contrib.auth.hashers.PBKDF2PasswordHasher.encode') as encode:
+            response = self.client.post(self.url, {'username': 'nobody', 'password': 'Testpass123!'}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        sleep.assert_called_once()
+        self.assertIn(sleep.call_args.args[0], (0.05, 0.07))  # a recent verification, not their mean
+        encode.assert_not_called()
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000, USER_PROVISION_WORKERS=2)
+class UserBulkProvisionTestCase(APITestCase):
+    url = '/api/auth/users/bulk'
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', email='admin@example.com',
+                                              password='Testpass123!', is_staff=True)
+        self.client.force_authenticate(self.admin)
+
+    @staticmethod
+    def record(i, **overrides):
+        return {'first_name': 'Jane', 'last_name': 'Doe', 'username': f'user{i}',
+                'email': f'user{i}@example.com', 'password': 'Testpass123!', **overrides}
+
+    def test_each_record_gets_an_outcome(self):
+        records = [
+            self.record(0),
+            self.record(1, email='admin@example.com'),
+            self.record(2, username='user0'),
+            self.record(3, password='weakpass'),
+            self.record(4, first_name='J'),
+            self.record(5, email='not-an-email'),
+            self.record(6),
+        ]
+
+        response = self.client.post(self.url, records, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['rejected']), (2, 5))
+        outcomes = response.data['data']
+        self.assertEqual([o['status'] for o in outcomes],
+                         ['created', 'rejected', 'rejected', 'rejected', 'rejected', 'rejected', 'created'])
+        self.assertEqual(outcomes[1]['errors'], {'email': ['A user with this email already exists.']})
+        self.assertEqual(outcomes[2]['errors'], {'username': ['Duplicate username in this batch.']})
+        self.assertEqual(outcomes[3]['errors']['non_field_errors'],
+                         ['Password must contain at least one numeral.'])
+        self.assertEqual(outcomes[4]['errors']['non_field_errors'],
+                         ['First name and last name must be at least 2 characters long.'])
+        self.assertIn('email', outcomes[5]['errors'])
+
+        user = User.objects.get(pk=outcomes[0]['id'])
+        self.assertEqual(user.email, 'user0@example.com')
+        self.assertTrue(user.check_password('Testpass123!'))
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(self.url, [self.record(i) for i in range(2)], format='json')
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.post(self.url, [self.record(i) for i in range(100, 140)], format='json')
+
+        self.assertEqual(response.data['created'], 40)
+        self.assertEqual(len(large), len(small))
+        self.assertTrue(all(User.objects.get(username=f'user{i}').check_password('Testpass123!')
+                            for i in (100, 139)))
+
+    def test_api_hashes_in_process(self):
+        from unittest import mock
+
+        with mock.patch('users.provisioning.ProcessPoolExecutor') as pool:
+            response = self.client.post(self.url, [self.record(i) for i in range(40)], format='json')
+        self.assertEqual(response.data['created'], 40)
+        pool.assert_not_called()
+
+    def test_email_registered_during_the_batch_is_not_duplicated(self):
+        from unittest import mock
+        from users.provisioning import UserProvisioner
+
+        User.objects.create_user(username='racer', email='user1@example.com', password='Testpass123!')
+        with mock.patch.object(UserProvisioner, '_reject_taken'):  # simulate losing the race
+            outcomes = UserProvisioner(workers=1).provision([self.record(0), self.record(1)])
+
+        self.assertEqual([o['status'] for o in outcomes], ['created', 'rejected'])
+        self.assertEqual(User.objects.filter(email='user1@example.com').count(), 1)
+
+    def test_requires_staff(self):
+        self.client.force_authenticate(User.objects.create_user(username='plain', password='Testpass123!'))
+        self.assertEqual(self.client.post(self.url, [self.record(0)], format='json').status_code, 403)
+
+    def test_command_writes_a_report(self):
+        import csv
+        import json
+        import os
+        import tempfile
+        from io import StringIO
+        from django.core.management import call_command
+
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'users.csv')
+            report = os.path.join(directory, 'report.ndjson')
+            with open(source, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=list(self.record(0)))
+                writer.writeheader()
+                for i in range(3):
+                    writer.writerow(self.record(i, email='admin@example.com') if i == 1 else self.record(i))
+
+            out = StringIO()
+            call_command('provision_users', source, '--batch-size', '2', '--report', report, stdout=out)
+            with open(report) as f:
+                outcomes = [json.loads(line) for line in f]
+
+        self.assertIn('Created 2 user(s), rejected 1', out.getvalue())
+        self.assertEqual([(o['index'], o['status']) for o in outcomes],
+                         [(0, 'created'), (1, 'rejected'), (2, 'created')])
+
+    def test_command_hashes_every_batch_in_one_pool(self):
+        import json
+        import os
+        import tempfile
+        from concurrent.futures import ProcessPoolExecutor
+        from io import StringIO
+        from unittest import mock
+        from django.core.management import call_command
+
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'users.ndjson')
+            with open(source, 'w') as f:
+                f.writelines(json.dumps(self.record(i)) + '\n' for i in range(40))
+
+            with mock.patch('users.provisioning.ProcessPoolExecutor', wraps=ProcessPoolExecutor) as pool:
+                out = StringIO()
+                call_command('provision_users', source, '--batch-size', '20', stdout=out)
+
+        self.assertIn('Created 40 user(s), rejected 0', out.getvalue())
+        pool.assert_called_once()
+        self.assertTrue(User.objects.get(username='user39').check_password('Testpass123!'))
@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import RegisterView, LoginView, LogoutView, CustomTokenRefreshView
+from .views import RegisterView, LoginView, LogoutView, CustomTokenRefreshView, UserBulkProvisionView
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
+    path('users/bulk', UserBulkProvisionView.as_view(), name='user-bulk'),
     path('login/', LoginView.as_view(), name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('token/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
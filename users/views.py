@@ -2,7 +2,8 @@
 from datetime import datetime
 from django.contrib.auth import authenticate
 from rest_framework import generics, status
-from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.exceptions import TokenError
@@ -12,7 +13,10 @@ from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from rest_framework.permissions import AllowAny
 
-from .serializers import UserRegistrationSerializer, UserLoginSerializer
+from .authentication import user_snapshots
+from .blacklist import BlacklistRefreshToken
+from .provisioning import UserProvisioner
+from .serializers import UserProvisionSerializer, UserRegistrationSerializer, UserLoginSerializer
 
 class RegisterView(generics.CreateAPIView):
     serializer_class = UserRegistrationSerializer
@@ -52,6 +56,51 @@ class RegisterView(generics.CreateAPIView):
         return Response(self.get_serializer(user).data, status=status.HTTP_201_CREATED)
 
 
+class UserBulkProvisionView(APIView):
+    """
+    Register many users in one request (staff only).
+    """
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        operation_summary="Provision users in bulk",
+        operation_description="Register up to USER_BULK_MAX_ITEMS users with the same rules as /register/. "
+                              "Valid records are created even when others are rejected; every record gets "
+                              "an outcome, in input order.",
+        request_body=UserProvisionSerializer(many=True),
+        responses={
+            200: openapi.Response(
+                description="One outcome per record",
+                examples={
+                    "application/json": {
+                        "data": [
+                            {"index": 0, "username": "jane.doe", "status": "created", "id": 42},
+                            {"index": 1, "username": "john", "status": "rejected",
+                             "errors": {"email": ["A user with this email already exists."]}},
+                        ],
+                        "created": 1,
+                        "rejected": 1,
+                    }
+                }
+            ),
+            400: openapi.Response(description="The body is not a list or has too many records."),
+        }
+    )
+    def post(self, request):
+        records = request.data
+        if not isinstance(records, list):
+            return Response({"detail": "Expected a list of users."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(records) > settings.USER_BULK_MAX_ITEMS:
+            return Response(
+                {"detail": f"Ensure this list has no more than {settings.USER_BULK_MAX_ITEMS} users."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        outcomes = UserProvisioner().provision(records)
+        created = sum(outcome['status'] == 'created' for outcome in outcomes)
+        return Response({"data": outcomes, "created": created, "rejected": len(outcomes) - created})
+
+
 class LoginView(APIView):
     permission_classes = [AllowAny]
 
@@ -82,7 +131,8 @@ class LoginView(APIView):
         )
 
         if user:
-            refresh = RefreshToken.for_user(user)
+            refresh = BlacklistRefreshToken.for_user(user)
+            user_snapshots.put(user)  # the client's first authenticated request skips the user query
             access_token = refresh.access_token
 
             expire_at = datetime.fromtimestamp(access_token['exp'])
@@ -124,7 +174,7 @@ class LogoutView(APIView):
             )
 
         try:
-            token = RefreshToken(refresh_token)
+            token = BlacklistRefreshToken(refresh_token)
             token.blacklist()
             return Response(
                 {"detail": "Logged out successfully"},